@@ -0,0 +1,99 @@
+"""
+Measures the import time of the modules behind the console scripts.
+
+Runs every console script module in a fresh interpreter with
+`python -X importtime` and reports the cumulative import time of the
+module itself and the total time of the interpreter start up until the
+command line interface is ready. Use `--max-ms` to fail (exit code 1)
+if one of the modules exceeds a budget.
+
+    python benchmarks/import_time.py [--repeat 5] [--max-ms 300]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CONSOLE_SCRIPT_PATTERN = re.compile(r'"([\w-]+)=([\w.]+):(\w+)')
+
+
+def console_scripts():
+    """:returns [(script name, module, attribute), ...] as defined in setup.py"""
+    setup_py = (ROOT / "setup.py").read_text()
+    return CONSOLE_SCRIPT_PATTERN.findall(setup_py)
+
+
+def import_time_us(module: str) -> int:
+    """
+    :returns the cumulative import time of `module` in microseconds
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No import time found for {module}")
+
+
+def help_time_ms(module: str, attr: str) -> float:
+    """
+    :returns the wall time of running the app with `--help` in milliseconds
+    """
+    code = f"from {module} import {attr}; {attr}(['--help'])"
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="fail if the median import time of a module exceeds this value",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'script':<32}{'import [ms]':>14}{'--help [ms]':>14}")
+    for script, module, attr in console_scripts():
+        try:
+            import_ms = statistics.median(
+                import_time_us(module) / 1000 for _ in range(args.repeat)
+            )
+        except subprocess.CalledProcessError as err:
+            error = err.stderr.strip().splitlines()[-1]
+            print(f"{script:<32} import failed: {error}")
+            failed = True
+            continue
+        help_ms = statistics.median(
+            help_time_ms(module, attr) for _ in range(args.repeat)
+        )
+        print(f"{script:<32}{import_ms:>14.1f}{help_ms:>14.1f}")
+        if args.max_ms is not None and import_ms > args.max_ms:
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
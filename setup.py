@@ -22,6 +22,10 @@ api_requirements = [
     'threedi-api-client>3.0.24'
 ]
 
+analysis_requirements = [
+    'numpy>=1.17',
+]
+
 test_requirements = ['pytest>=3', ]
 
 setup(
@@ -47,6 +51,7 @@ setup(
     keywords='threedi_settings',
     name='threedi_settings',
     packages=find_packages(include=['threedi_settings', 'threedi_settings.*']),
+    package_data={'threedi_settings': ['data/*.json']},
     test_suite='tests',
     tests_require=test_requirements,
     entry_points={
@@ -54,11 +59,14 @@ setup(
             "export-settings=threedi_settings.commands.export_legacy_settings:settings_app ",  # noqa
             "describe-simulation-settings=threedi_settings.commands.helpers:helper_app",  # noqa
             "global-settings=threedi_settings.commands.global_settings:global_settings_app",  # noqa
+            "settings-payloads=threedi_settings.commands.payloads:payloads_app",  # noqa
+            "settings-mirror=threedi_settings.commands.mirror:mirror_app",  # noqa
         ]
     },
     extras_require={
         'cmd': cmd_requirements,
-        'api': api_requirements
+        'api': api_requirements,
+        'analysis': analysis_requirements,
     },
     url='https://github.com/nens/threedi-settings',
     version='0.0.7.dev0',
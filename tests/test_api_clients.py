@@ -10,13 +10,18 @@ from threedi_settings.http.api_clients import OpenAPIPhysicalSettings
 from threedi_settings.http.api_clients import OpenApiSettingsModel
 from threedi_settings.http.api_clients import OpenAPIAggregationSettings
 from threedi_settings.http.api_clients import OpenAPISimulationSettings
+from threedi_settings.http.api_clients import get_api_client
+from threedi_settings.http.api_clients import settings_overview_from_responses
+from threedi_settings.http.api_clients import overview_cache
 from openapi_client.models import PhysicalSettings
 from openapi_client.models import TimeStepSettings
 from openapi_client.models import NumericalSettings
 from openapi_client.models import AggregationSettings
 from openapi_client.models import SimulationSettingsOverview
 from openapi_client import ApiException
+from openapi_client import SimulationsApi
 from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import convert_aggregations
 
 from tests.fixtures import model_ini
 from tests.fixtures import aggregation_ini
@@ -144,3 +149,80 @@ def test_get_aggregations(simulation_overview):
     client = OpenAPISimulationSettings(1)
     aggr = client._get_aggregations(simulation_overview, "1")
     assert len(aggr) == 10
+
+
+def test_api_client_is_shared():
+    client = OpenAPISimulationSettings(1)
+    other_client = OpenAPISimulationSettings(2)
+    assert client.api_client.api_client is other_client.api_client.api_client
+
+
+def test_api_client_per_credentials():
+    config = {
+        "API_HOST": "http://localhost:8000/v3.0",
+        "API_USERNAME": "user",
+        "API_PASSWORD": "secret",
+    }
+    other_config = {**config, "API_USERNAME": "other"}
+    assert get_api_client(config) is get_api_client(config)
+    assert get_api_client(config) is not get_api_client(other_config)
+
+
+@patch.object(SimulationsApi, "simulations_settings_aggregation_create")
+def test_aggregation_settings_bulk_create(mock_create, aggregation_ini):
+    client = OpenAPIAggregationSettings(1, aggregation_ini.as_dict())
+    mock_create.side_effect = [
+        ApiException if i == 3 else instance
+        for i, instance in enumerate(client.instances)
+    ]
+    results = client.bulk_create(max_workers=1)
+    assert [r.index for r in results] == list(range(len(client.instances)))
+    assert [r.ok for r in results].count(False) == 1
+    assert not results[3].ok
+    assert results[0].response == client.instances[0]
+
+
+def test_settings_overview_from_responses(simulation_overview):
+    resp = settings_overview_from_responses(
+        simulation_overview.physical_settings,
+        simulation_overview.time_step_settings,
+        simulation_overview.numerical_settings,
+        simulation_overview.aggregation_settings,
+    )
+    assert isinstance(resp, SimulationSettingsOverview)
+    assert resp.to_dict() == simulation_overview.to_dict()
+
+
+def test_settings_overview_from_responses_failed_create(simulation_overview):
+    resp = settings_overview_from_responses(
+        simulation_overview.physical_settings,
+        None,
+        simulation_overview.numerical_settings,
+        [],
+    )
+    assert resp is None
+
+
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_overview_cache(mock_overview, mock_create, model_ini, simulation_overview):
+    overview_cache.clear()
+    mock_overview.return_value = simulation_overview
+    mock_create.return_value = simulation_overview.physical_settings
+    assert OpenAPISimulationSettings(7).retrieve() is simulation_overview
+    assert OpenAPISimulationSettings(7).retrieve() is simulation_overview
+    assert mock_overview.call_count == 1
+    assert overview_cache.stats().hits == 1
+    OpenAPIPhysicalSettings(7, model_ini.as_dict(), SourceTypes.ini_file).create()
+    OpenAPISimulationSettings(7).retrieve()
+    assert mock_overview.call_count == 2
+    OpenAPISimulationSettings(7).retrieve(use_cache=False)
+    assert mock_overview.call_count == 3
+
+
+def test_aggregation_settings_from_payloads(aggregation_ini):
+    payloads = convert_aggregations(aggregation_ini.as_dict())
+    client = OpenAPIAggregationSettings.from_payloads(3, payloads)
+    assert len(client.instances) == len(payloads)
+    assert all(isinstance(i, AggregationSettings) for i in client.instances)
+    assert client.instances[0].flow_variable == payloads[0]["flow_variable"]
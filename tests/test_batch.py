@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from threedi_settings.http.batch import BatchExporter
+from threedi_settings.http.export import ConcurrentExporter
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.state import ExportState
+
+from tests.fixtures import INI, AGGRE
+from tests.client_fixtures import simulation_overview
+
+
+@patch.object(ConcurrentExporter, "run")
+def test_batch_exporter(mock_run, simulation_overview, tmp_path):
+    mock_run.return_value = simulation_overview
+    entries = [
+        ManifestEntry(1, INI, 1, AGGRE),
+        ManifestEntry(2, tmp_path / "missing.ini"),
+    ]
+    summary = BatchExporter(entries, workers=2).run()
+    assert len(summary.results) == 2
+    failure, = summary.failures
+    assert failure.entry.simulation_id == 2
+    assert summary.throughput > 0
+
+
+@patch.object(ConcurrentExporter, "run")
+def test_batch_exporter_skips_unchanged_entries(mock_run, simulation_overview, tmp_path):
+    mock_run.return_value = simulation_overview
+    ini = tmp_path / "model.ini"
+    ini.write_text(INI.read_text())
+    entries = [ManifestEntry(1, ini, 1, AGGRE), ManifestEntry(2, INI, 1, AGGRE)]
+    with ExportState(tmp_path / "state.sqlite") as state:
+        BatchExporter(entries, workers=2, state=state).run()
+        assert mock_run.call_count == 2
+
+        summary = BatchExporter(entries, workers=2, state=state).run()
+        assert len(summary.skipped) == 2
+        assert mock_run.call_count == 2
+
+        # touched, but the settings did not change
+        ini.write_text(INI.read_text() + "\n")
+        summary = BatchExporter(entries, workers=2, state=state).run()
+        assert len(summary.skipped) == 2
+        assert mock_run.call_count == 2
+
+        summary = BatchExporter(entries, workers=2, state=state, force=True).run()
+        assert not summary.skipped
+        assert mock_run.call_count == 4
@@ -0,0 +1,49 @@
+from threedi_settings.http.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expiry():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set(("host", 1), "overview")
+    assert cache.get(("host", 1)) == "overview"
+    timer.now = 5
+    assert cache.get(("host", 1)) is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 0)
+    assert stats.hit_ratio == 0.5
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats().evictions == 1
+
+
+def test_ttl_cache_invalidate_and_clear():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    cache.set(1, "a")
+    cache.clear()
+    assert cache.stats() == cache.stats().__class__(0, 0, 0, 0)
+
+
+def test_ttl_cache_disabled():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set(1, "a")
+    assert cache.get(1) is None
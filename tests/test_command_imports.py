@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("typer")
+
+HEAVY_MODULES = ("openapi_client", "threedi_api_client", "yaml", "rich.tree")
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "threedi_settings.commands.export_legacy_settings",
+        "threedi_settings.commands.global_settings",
+        "threedi_settings.commands.helpers",
+        "threedi_settings.commands.payloads",
+        "threedi_settings.commands.mirror",
+    ],
+)
+def test_commands_import_lazily(module):
+    code = (
+        f"import sys, {module}; "
+        f"heavy = [m for m in sys.modules if m.startswith({HEAVY_MODULES!r})]; "
+        "assert not heavy, heavy"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,96 @@
+import shutil
+import sqlite3
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    pytest.skip("requires numpy", allow_module_level=True)
+
+from threedi_settings.compare import (
+    COMPARED_FIELDS,
+    compare_sources,
+    compute_deviations,
+    read_reference,
+    read_source,
+)
+from threedi_settings.mappings import (
+    get_sqlite_table_schemas,
+    numerical_settings_map,
+    SettingsTables,
+)
+
+from tests.fixtures import INI
+from tests.sqlite_fixture import model_sqlite
+
+
+def test_read_source(model_sqlite):
+    entries, error = read_source(model_sqlite)
+    assert error is None
+    assert entries[0][0] == f"{model_sqlite}#1"
+    assert set(entries[0][1]) == set(COMPARED_FIELDS)
+    assert read_source(model_sqlite.with_suffix(".txt"))[1]
+
+
+def test_compute_deviations():
+    names = list(COMPARED_FIELDS)
+    reference = {name: 1.0 for name in names}
+    values = np.ones((3, len(names)))
+    values[1, names.index("time_step")] = 2.0
+    values[2, names.index("time_step")] = np.nan
+    values[2, names.index("use_of_cg")] = 1.0 + 1e-12
+    deviations, deviating_sources = compute_deviations(
+        ["a", "b", "c"], values, reference
+    )
+    assert deviating_sources == 2
+    assert len(deviations) == 1
+    assert deviations[0].field == "time_step"
+    assert deviations[0].count == 2
+    assert deviations[0].outliers == [("b", 2.0), ("c", None)]
+
+
+def test_compare_sources(model_sqlite, tmp_path):
+    ini = tmp_path / "model.ini"
+    shutil.copy(INI, ini)
+    broken = tmp_path / "broken.ini"
+    broken.write_text("no settings here")
+    report = compare_sources(
+        [ini, model_sqlite, broken],
+        reference=read_reference(ini),
+        workers=2,
+        use_processes=False,
+    )
+    assert report.labels[0] == str(ini)
+    assert list(report.errors) == [str(broken)]
+    for deviation in report.deviations:
+        assert all(label != str(ini) for label, _ in deviation.outliers)
+
+
+def test_compare_sources_without_numerical_settings(model_sqlite, tmp_path):
+    sqlite = tmp_path / "model.sqlite"
+    shutil.copy(model_sqlite, sqlite)
+    conn = sqlite3.connect(sqlite)
+    with conn:
+        conn.execute("UPDATE v2_global_settings SET numerical_settings_id = 9999")
+    conn.close()
+    # the API fields read from the v2_numerical_settings table
+    numerical_columns = get_sqlite_table_schemas()[SettingsTables.numerical_settings]
+    numerical_fields = [
+        name
+        for name, (_, _, sqlite_info) in numerical_settings_map.items()
+        if sqlite_info.name in numerical_columns
+    ]
+    assert numerical_fields
+    entries, error = read_source(sqlite)
+    assert error is None
+    # not filled with the API defaults
+    assert all(entries[0][1][name] is None for name in numerical_fields)
+
+    reference = read_reference(model_sqlite)
+    report = compare_sources([sqlite], reference=reference, use_processes=False)
+    deviating = {d.field: d.outliers for d in report.deviations}
+    for name in numerical_fields:
+        if reference[name] is not None:
+            assert deviating[name] == [(f"{sqlite}#1", None)]
+    assert report.deviating_sources == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from threedi_settings.conversion import compile_plan, convert, get_conversion_plan
+from threedi_settings.mappings import numerical_settings_map, physical_settings_map
+from threedi_settings.models import SourceTypes
+
+from tests.fixtures import model_ini
+
+
+def test_compile_plan_skips_excluded_fields():
+    fields = ["id", "url", "simulation_id", "use_advection_1d"]
+    plan = compile_plan(physical_settings_map, SourceTypes.ini_file, fields)
+    assert [step.api_name for step in plan] == [
+        "simulation_id", "use_advection_1d"
+    ]
+    assert plan[0].source_key is None
+    assert plan[1].source_key == "advection_1d"
+    assert plan[1].api_coercer is None
+
+
+def test_compile_plan_invalid_source_type():
+    with pytest.raises(TypeError):
+        compile_plan(physical_settings_map, 3)
+
+
+def test_get_conversion_plan_is_cached():
+    plan = get_conversion_plan(
+        "test-numerical", numerical_settings_map, SourceTypes.ini_file
+    )
+    assert plan is get_conversion_plan(
+        "test-numerical", numerical_settings_map, SourceTypes.ini_file
+    )
+
+
+def test_get_conversion_plan_depends_on_mapping_and_fields():
+    plan = get_conversion_plan(
+        "test-plan", numerical_settings_map, SourceTypes.ini_file
+    )
+    other_mapping = get_conversion_plan(
+        "test-plan", physical_settings_map, SourceTypes.ini_file
+    )
+    assert other_mapping == compile_plan(physical_settings_map, SourceTypes.ini_file)
+    fields = ["simulation_id", "cfl_strictness_factor_1d"]
+    other_fields = get_conversion_plan(
+        "test-plan", numerical_settings_map, SourceTypes.ini_file, fields
+    )
+    assert [step.api_name for step in other_fields] == fields
+    assert plan is get_conversion_plan(
+        "test-plan", numerical_settings_map, SourceTypes.ini_file
+    )
+
+
+def test_convert(model_ini):
+    plan = compile_plan(
+        numerical_settings_map,
+        SourceTypes.ini_file,
+        ["simulation_id", *numerical_settings_map.keys()],
+    )
+    data = convert(plan, model_ini.as_dict(), 1)
+    assert data["simulation_id"] == 1
+    # type conversion int -> bool
+    assert data["use_nested_newton"] is False
+    # default from mapping
+    assert data["friction_shallow_water_depth_correction"] == 0
@@ -0,0 +1,87 @@
+import pytest
+
+from threedi_settings.definitions import (
+    bundled_index,
+    build_index,
+    client_definitions,
+    SettingsDefinitionsIndex,
+    write_index,
+)
+from threedi_settings.mappings import swagger_definitions_map
+
+SWAGGER_DEFINITIONS = {
+    "PhysicalSettings": {
+        "properties": {
+            "use_advection_1d": {
+                "type": "integer",
+                "description": "Use advection 1D",
+                "minimum": 0,
+                "maximum": 3,
+                "readOnly": False,
+                "x-nullable": False,
+            }
+        }
+    }
+}
+
+
+def test_build_index_from_mapping():
+    index = build_index()
+    assert set(index.keys()) == set(swagger_definitions_map.keys())
+    assert index["NumericalSettings"]["use_nested_newton"] == {
+        "type": "boolean", "default": True
+    }
+
+
+def test_build_index_from_swagger():
+    index = build_index(SWAGGER_DEFINITIONS)
+    assert index["PhysicalSettings"]["use_advection_1d"] == {
+        "type": "integer",
+        "description": "Use advection 1D",
+        "minimum": 0,
+        "maximum": 3,
+        "default": 1,
+        "nullable": False,
+    }
+
+
+def test_bundled_index_is_complete():
+    index = bundled_index()
+    for mapping in swagger_definitions_map.values():
+        for field_name in mapping:
+            assert index.lookup(field_name)
+    # the index contains the constraints of the API specification
+    (_, field_def), = index.lookup("pump_implicit_ratio")
+    assert (field_def["minimum"], field_def["maximum"]) == (0, 1)
+    (_, field_def), = index.lookup("time_integration_method")
+    assert field_def["nullable"] and field_def["description"]
+
+
+def test_client_definitions():
+    pytest.importorskip("openapi_client")
+    definitions = client_definitions()
+    assert set(definitions) == set(swagger_definitions_map)
+    numerical = definitions["NumericalSettings"]["properties"]
+    assert numerical["pump_implicit_ratio"]["minimum"] == 0
+    assert numerical["pump_implicit_ratio"]["maximum"] == 1
+    assert numerical["pump_implicit_ratio"]["x-nullable"] is False
+    assert numerical["time_integration_method"]["x-nullable"] is True
+    method = definitions["AggregationSettings"]["properties"]["method"]
+    assert "cum" in method["enum"]
+    assert method["type"] == "string"
+
+
+def test_index_lookup_and_search(tmp_path):
+    path = tmp_path / "index.json"
+    write_index(build_index(SWAGGER_DEFINITIONS), path)
+    index = SettingsDefinitionsIndex.from_file(path)
+    (swagger_key, field_def), = index.lookup("use_advection_1d")
+    assert swagger_key == "PhysicalSettings"
+    assert field_def["maximum"] == 3
+    assert index.lookup("unknown") == []
+    assert set(index.search("advection")["PhysicalSettings"]) == {
+        "use_advection_1d", "use_advection_2d"
+    }
+    assert set(index.search("*_time_step")["TimeStepSettings"]) == {
+        "min_time_step", "max_time_step", "output_time_step"
+    }
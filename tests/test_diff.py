@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+from threedi_settings.diff import diff_overview, values_differ
+from threedi_settings.models import (
+    AggregationConfig,
+    NumericalConfig,
+    PhysicalSimulationConfig,
+    SourceTypes,
+    TimeStepConfig,
+)
+from threedi_settings.payloads import convert_aggregations, convert_settings
+
+from tests.fixtures import model_ini, aggregation_ini
+
+
+@pytest.fixture
+def payloads(model_ini, aggregation_ini):
+    payloads = convert_settings(model_ini.as_dict(), SourceTypes.ini_file)
+    payloads["aggregation_settings"] = convert_aggregations(
+        aggregation_ini.as_dict()
+    )
+    return payloads
+
+
+def _overview(payloads):
+    """stands in for a `SimulationSettingsOverview` with the same settings"""
+    ids = {"uid": "1", "sim_uid": "1"}
+    return SimpleNamespace(
+        physical_settings=PhysicalSimulationConfig(
+            **ids, **payloads["physical_settings"]
+        ),
+        time_step_settings=TimeStepConfig(**ids, **payloads["time_step_settings"]),
+        numerical_settings=NumericalConfig(**ids, **payloads["numerical_settings"]),
+        aggregation_settings=[
+            AggregationConfig(**ids, **payload)
+            for payload in payloads["aggregation_settings"]
+        ],
+    )
+
+
+def test_values_differ():
+    assert not values_differ(0.1 + 0.2, 0.3)
+    assert values_differ(1.0, 1.1)
+    assert values_differ("cum", "current")
+    assert values_differ(None, 1.0)
+
+
+def test_diff_overview_unchanged(payloads):
+    diff = diff_overview(_overview(payloads), payloads)
+    assert diff.changed == []
+    assert diff.extra_aggregations == 0
+
+
+def test_diff_overview_changed(payloads):
+    overview = _overview(payloads)
+    overview.time_step_settings.time_step += 1
+    removed = overview.aggregation_settings.pop()
+    diff = diff_overview(overview, payloads)
+    assert diff.changed == ["time_step_settings", "aggregation_settings"]
+    assert list(diff.settings["time_step_settings"]) == ["time_step"]
+    assert len(diff.missing_aggregations) == 1
+    assert diff.missing_aggregations[0]["flow_variable"] == removed.flow_variable
+
+
+def test_diff_overview_missing(payloads):
+    overview = _overview(payloads)
+    overview.physical_settings = None
+    overview.aggregation_settings = []
+    diff = diff_overview(overview, payloads)
+    assert diff.settings == {
+        "physical_settings": None,
+        "time_step_settings": {},
+        "numerical_settings": {},
+    }
+    assert len(diff.missing_aggregations) == 10
+    assert diff.changed == ["physical_settings", "aggregation_settings"]
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import pytest
+
+from threedi_settings.http.api_clients import OpenAPINumericalSettings
+from threedi_settings.http.api_clients import OpenAPITimeStepSettings
+from threedi_settings.http.api_clients import OpenAPIPhysicalSettings
+from threedi_settings.http.api_clients import OpenAPIAggregationSettings
+from threedi_settings.http.api_clients import OpenAPISimulationSettings
+from threedi_settings.http.export import ConcurrentExporter
+from threedi_settings.models import SourceTypes
+
+from tests.fixtures import model_ini, aggregation_ini
+from tests.client_fixtures import simulation_overview
+
+
+@patch.object(OpenAPISimulationSettings, "retrieve")
+@patch.object(OpenAPIAggregationSettings, "create")
+@patch.object(OpenAPIPhysicalSettings, "create")
+@patch.object(OpenAPITimeStepSettings, "create")
+@patch.object(OpenAPINumericalSettings, "create")
+def test_concurrent_exporter(
+    mock_numerical,
+    mock_time_step,
+    mock_physical,
+    mock_aggregation,
+    mock_retrieve,
+    model_ini,
+    aggregation_ini,
+    simulation_overview,
+):
+    mock_retrieve.return_value = simulation_overview
+    exporter = ConcurrentExporter(
+        1,
+        SourceTypes.ini_file,
+        model_ini.as_dict(),
+        aggregation_ini.as_dict(),
+        max_concurrency=2,
+        verify=True,
+    )
+    assert exporter.run() == simulation_overview
+    for mock in (
+        mock_numerical, mock_time_step, mock_physical, mock_aggregation
+    ):
+        mock.assert_called_once()
+
+
+def test_concurrent_exporter_invalid_concurrency(model_ini):
+    with pytest.raises(ValueError):
+        ConcurrentExporter(
+            1, SourceTypes.ini_file, model_ini.as_dict(), max_concurrency=0
+        )
+
+
+@patch.object(OpenAPISimulationSettings, "retrieve")
+@patch.object(OpenAPIPhysicalSettings, "create")
+@patch.object(OpenAPITimeStepSettings, "create")
+@patch.object(OpenAPINumericalSettings, "create")
+def test_concurrent_exporter_overview_from_responses(
+    mock_numerical,
+    mock_time_step,
+    mock_physical,
+    mock_retrieve,
+    model_ini,
+    simulation_overview,
+):
+    mock_numerical.return_value = simulation_overview.numerical_settings
+    mock_time_step.return_value = simulation_overview.time_step_settings
+    mock_physical.return_value = simulation_overview.physical_settings
+    exporter = ConcurrentExporter(
+        1, SourceTypes.ini_file, model_ini.as_dict()
+    )
+    resp = exporter.run()
+    mock_retrieve.assert_not_called()
+    assert resp.physical_settings == simulation_overview.physical_settings
+    assert resp.numerical_settings == simulation_overview.numerical_settings
+    assert resp.aggregation_settings == []
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from threedi_settings.fingerprint import canonical_json, fingerprint
+from threedi_settings.models import SourceTypes
+
+
+def test_canonical_json():
+    assert canonical_json({"b": 1, "a": [-0.0, None]}) == '{"a":[0.0,null],"b":1}'
+    assert canonical_json(SourceTypes.ini_file) == "1"
+    assert canonical_json(Path("a") / "b") == '"a/b"'
+
+
+def test_fingerprint():
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+    assert len(fingerprint([])) == 64
@@ -0,0 +1,134 @@
+from dataclasses import replace
+import sys
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    pytest.skip("requires numpy", allow_module_level=True)
+
+from threedi_settings.frame import SettingsFrame
+from threedi_settings.mirror import SettingsMirror
+
+from tests.fixtures import simulation_config_no_aggregation
+
+
+@pytest.fixture
+def configs(simulation_config_no_aggregation):
+    configs = []
+    for simulation_id in range(1, 101):
+        config = simulation_config_no_aggregation
+        sim_uid = str(simulation_id)
+        configs.append(
+            replace(
+                config,
+                sim_uid=sim_uid,
+                physical_config=replace(config.physical_config, sim_uid=sim_uid),
+                time_step_config=replace(config.time_step_config, sim_uid=sim_uid),
+                numerical_config=replace(
+                    config.numerical_config,
+                    sim_uid=sim_uid,
+                    time_integration_method=simulation_id % 3,
+                ),
+            )
+        )
+    return configs
+
+
+def test_from_configs(configs):
+    frame = SettingsFrame.from_configs(configs)
+    assert len(frame) == 100
+    assert frame["time_integration_method"].dtype == np.int32
+    assert frame["use_nested_newton"].dtype == np.bool_
+    numerical_columns = [
+        name for name in vars(configs[0].numerical_config)
+        if name not in {"uid", "sim_uid"}
+    ]
+    boxed = sum(
+        sys.getsizeof(c.numerical_config)
+        + sys.getsizeof(vars(c.numerical_config))
+        + sum(sys.getsizeof(v) for v in vars(c.numerical_config).values())
+        for c in configs
+    )
+    columnar = sum(frame[name].nbytes for name in numerical_columns)
+    assert columnar * 5 < boxed
+
+
+def test_filter_and_groupby(configs):
+    frame = SettingsFrame.from_configs(configs)
+    selection = frame.where(time_integration_method=1)
+    assert len(selection) == 34
+    assert selection.simulation_ids[:2].tolist() == [1, 4]
+    groups = frame.groupby("time_integration_method")
+    assert {key: len(rows) for key, rows in groups.items()} == {0: 33, 1: 34, 2: 33}
+    groups = frame.groupby("time_integration_method", "use_of_cg")
+    assert set(groups) == {(0, 20), (1, 20), (2, 20)}
+    assert frame.value_counts("use_of_cg") == {20: 100}
+
+
+def test_to_config(configs):
+    frame = SettingsFrame.from_configs(configs)
+    config = frame.to_config(frame.row_of(42))
+    assert config == configs[41]
+    assert isinstance(config.numerical_config.use_nested_newton, bool)
+    assert list(frame.iter_configs([0, 1])) == configs[:2]
+
+
+def test_from_mirror(configs, tmp_path):
+    with SettingsMirror(tmp_path / "mirror.sqlite") as mirror:
+        for config in configs[:10]:
+            mirror.store(int(config.sim_uid), config)
+        frame = SettingsFrame.from_mirror(mirror)
+    assert frame.simulation_ids.tolist() == list(range(1, 11))
+    assert list(frame.iter_configs()) == configs[:10]
+
+
+@pytest.fixture
+def configs_with_none(configs):
+    configs = list(configs[:6])
+    for i in (1, 4):
+        configs[i] = replace(
+            configs[i],
+            numerical_config=replace(
+                configs[i].numerical_config,
+                time_integration_method=None,
+                use_nested_newton=None,
+            ),
+        )
+    return configs
+
+
+def test_missing_values(configs_with_none):
+    frame = SettingsFrame.from_configs(configs_with_none)
+    assert frame.valid["time_integration_method"].tolist() == [
+        True, False, True, True, False, True
+    ]
+    assert frame.where(time_integration_method=None).simulation_ids.tolist() == [2, 5]
+    # missing values do not match the value they are stored as
+    assert frame.where(time_integration_method=0).simulation_ids.tolist() == [3, 6]
+    assert frame.where(use_nested_newton=False).simulation_ids.tolist() == []
+    assert frame.value_counts("time_integration_method") == {0: 2, 1: 2, None: 2}
+    groups = frame.groupby("time_integration_method")
+    assert groups[None].tolist() == [1, 4]
+    assert groups[1].tolist() == [0, 3]
+    assert list(frame.iter_configs()) == configs_with_none
+
+
+def test_missing_values_from_mirror(configs_with_none, tmp_path):
+    with SettingsMirror(tmp_path / "mirror.sqlite") as mirror:
+        for config in configs_with_none:
+            mirror.store(int(config.sim_uid), config)
+        frame = SettingsFrame.from_mirror(mirror)
+    assert frame.valid["use_nested_newton"].tolist() == [
+        True, False, True, True, False, True
+    ]
+    assert list(frame.iter_configs()) == configs_with_none
+
+
+def test_from_configs_without_sim_uid(simulation_config_no_aggregation):
+    config = replace(simulation_config_no_aggregation, sim_uid="")
+    with pytest.raises(ValueError):
+        SettingsFrame.from_configs([config])
+    frame = SettingsFrame.from_configs([config], simulation_ids=[7])
+    assert frame.simulation_ids.tolist() == [7]
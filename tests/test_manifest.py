@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from threedi_settings.manifest import ManifestEntry, ManifestError, read_manifest
+from threedi_settings.models import SourceTypes
+
+from tests.fixtures import INI, AGGRE
+from tests.sqlite_fixture import model_sqlite
+
+
+def test_read_csv_manifest(tmp_path, model_sqlite):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "simulation_id,source,settings_row,aggregation_file\n"
+        f"1,{INI},,{AGGRE}\n"
+        f"2,{model_sqlite},1,\n"
+    )
+    entries = list(read_manifest(manifest))
+    assert entries == [
+        ManifestEntry(1, INI, 1, AGGRE),
+        ManifestEntry(2, model_sqlite, 1, None),
+    ]
+    assert entries[0].source_type == SourceTypes.ini_file
+    assert entries[1].source_type == SourceTypes.sqlite_file
+
+
+def test_read_json_manifest_relative_paths(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"simulation_id": 3, "source": "a.ini"}]))
+    entry, = read_manifest(manifest)
+    assert entry.simulation_id == 3
+    assert entry.source == tmp_path.resolve() / "a.ini"
+
+
+def test_read_manifest_invalid_entry(tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("simulation_id,source\nabc,model.ini\n")
+    with pytest.raises(ManifestError):
+        list(read_manifest(manifest))
+
+
+def test_manifest_entry_unknown_source_type(tmp_path):
+    with pytest.raises(ManifestError):
+        ManifestEntry(1, tmp_path / "model.txt").source_type
+
+
+def test_manifest_entry_load_ini():
+    settings, aggregations = ManifestEntry(1, INI, 1, AGGRE).load()
+    assert "timestep" in settings
+    assert len(aggregations) == 10
+
+
+def test_manifest_entry_load_sqlite(model_sqlite):
+    settings, aggregations = ManifestEntry(1, model_sqlite).load()
+    assert "sim_time_step" in settings
+    assert len(aggregations) == 10
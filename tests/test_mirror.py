@@ -0,0 +1,78 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from threedi_settings.http.mirror import refresh_mirror
+from threedi_settings.mirror import MirrorError, SettingsMirror
+
+from tests.fixtures import simulation_config, simulation_config_no_aggregation
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    with SettingsMirror(tmp_path / "mirror.sqlite") as mirror:
+        yield mirror
+
+
+def test_store_and_load(mirror, simulation_config):
+    assert mirror.store(1, simulation_config)
+    assert not mirror.store(1, simulation_config)
+    assert mirror.load(1) == simulation_config
+    assert mirror.load(2) is None
+    assert mirror.simulation_ids == [1]
+
+
+def test_store_replaces(mirror, simulation_config, simulation_config_no_aggregation):
+    mirror.store(1, simulation_config)
+    assert mirror.store(1, simulation_config_no_aggregation)
+    assert mirror.load(1).aggregation_config == []
+
+
+def test_find(mirror, simulation_config, simulation_config_no_aggregation):
+    mirror.store(1, simulation_config)
+    mirror.store(2, simulation_config_no_aggregation)
+    assert mirror.find(time_integration_method=0) == [1, 2]
+    assert mirror.find(time_integration_method="1") == []
+    assert mirror.find(use_nested_newton="true", flow_variable="rain") == [1]
+    with pytest.raises(MirrorError):
+        mirror.find(unknown_field=1)
+    with pytest.raises(MirrorError):
+        mirror.find(time_step="fast")
+
+
+def test_stale_ids(mirror, simulation_config):
+    mirror.store(1, simulation_config)
+    mirror.store(2, simulation_config)
+    assert mirror.stale_ids([1, 2, 3]) == [3]
+    mirror.mark_dirty([2])
+    assert mirror.stale_ids([1, 2, 3]) == [2, 3]
+    time.sleep(0.01)
+    assert mirror.stale_ids([1, 2, 3], max_age=0) == [1, 2, 3]
+
+
+@patch("threedi_settings.http.mirror.fetch_settings")
+def test_refresh_mirror_dirty(mock_fetch, mirror, simulation_config):
+    mock_fetch.return_value = simulation_config
+    summary = refresh_mirror(mirror, [1, 2])
+    assert sorted(summary.fetched) == [1, 2]
+    # fresh simulations are skipped, unless they are known to be changed
+    summary = refresh_mirror(mirror, [1, 2], dirty=[2])
+    assert summary.fetched == [2]
+    assert summary.skipped == [1]
+    assert mock_fetch.call_count == 3
+    assert mirror.stale_ids([1, 2]) == []
+    # dirty simulations are fetched even if they are not listed
+    summary = refresh_mirror(mirror, [1], dirty=[2])
+    assert summary.fetched == [2]
+
+
+@patch("threedi_settings.http.mirror.fetch_settings")
+def test_refresh_mirror_dirty_failure(mock_fetch, mirror, simulation_config):
+    mock_fetch.return_value = simulation_config
+    refresh_mirror(mirror, [1])
+    mock_fetch.side_effect = RuntimeError("API unavailable")
+    summary = refresh_mirror(mirror, [1], dirty=[1])
+    assert summary.failures == {1: "API unavailable"}
+    # still dirty, it is fetched again on the next refresh
+    assert mirror.stale_ids([1]) == [1]
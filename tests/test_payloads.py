@@ -0,0 +1,130 @@
+import subprocess
+import sys
+
+import pytest
+
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import (
+    ConversionMemo,
+    convert_aggregations,
+    convert_settings,
+    entry_payload,
+    iter_payloads,
+    payload_fingerprint,
+    read_ndjson,
+    record_fingerprints,
+    settings_fingerprint,
+    write_ndjson,
+)
+
+from tests.fixtures import model_ini, aggregation_ini, INI, AGGRE
+from tests.sqlite_fixture import model_sqlite
+
+
+def test_convert_settings(model_ini):
+    payloads = convert_settings(model_ini.as_dict(), SourceTypes.ini_file)
+    assert set(payloads.keys()) == {
+        "physical_settings", "time_step_settings", "numerical_settings"
+    }
+    assert payloads["physical_settings"] == {
+        "use_advection_1d": 0, "use_advection_2d": 0
+    }
+    assert payloads["numerical_settings"]["use_nested_newton"] is False
+
+
+def test_convert_aggregations(aggregation_ini):
+    payloads = convert_aggregations(aggregation_ini.as_dict())
+    assert len(payloads) == 10
+    for payload in payloads:
+        assert set(payload.keys()) == {"flow_variable", "method", "interval"}
+        assert isinstance(payload["interval"], float)
+
+
+def test_entry_payload_sqlite(model_sqlite):
+    record = entry_payload(ManifestEntry(5, model_sqlite))
+    assert record["simulation_id"] == 5
+    assert len(record["aggregation_settings"]) == 10
+
+
+def test_iter_payloads_collects_errors(tmp_path):
+    errors = []
+    entries = [
+        ManifestEntry(1, INI, 1, AGGRE),
+        ManifestEntry(2, tmp_path / "missing.ini"),
+    ]
+    records = list(iter_payloads(entries, errors))
+    assert [r["simulation_id"] for r in records] == [1]
+    assert errors[0][0].simulation_id == 2
+
+
+def test_iter_payloads_converts_identical_inputs_once(tmp_path):
+    copy = tmp_path / "copy.ini"
+    copy.write_text(INI.read_text())
+    entries = [
+        ManifestEntry(1, INI, 1, AGGRE),
+        ManifestEntry(2, INI, 1, AGGRE),
+        ManifestEntry(3, copy, 1, AGGRE),
+    ]
+    memo = ConversionMemo()
+    records = list(iter_payloads(entries, memo=memo))
+    assert (memo.misses, memo.hits) == (1, 2)
+    assert len({settings_fingerprint(record) for record in records}) == 1
+
+
+def test_payload_fingerprint(aggregation_ini):
+    payload = {"use_advection_1d": 1, "use_advection_2d": 0}
+    assert payload_fingerprint("physical_settings", payload) == payload_fingerprint(
+        "physical_settings", {"use_advection_2d": 0.0, "use_advection_1d": 1}
+    )
+    assert payload_fingerprint("physical_settings", payload) != payload_fingerprint(
+        "numerical_settings", payload
+    )
+    aggregations = convert_aggregations(aggregation_ini.as_dict())
+    assert payload_fingerprint(
+        "aggregation_settings", aggregations
+    ) == payload_fingerprint("aggregation_settings", aggregations[::-1])
+
+
+@pytest.mark.parametrize(
+    "key, field, value, other",
+    [
+        ("numerical_settings", "use_nested_newton", True, "false"),
+        ("numerical_settings", "max_degree_gauss_seidel", 1, 1.7),
+        ("numerical_settings", "max_degree_gauss_seidel", 1, "1"),
+        ("time_step_settings", "time_step", 30.0, "30"),
+    ],
+)
+def test_payload_fingerprint_raw_values(key, field, value, other):
+    assert payload_fingerprint(key, {field: value}) != payload_fingerprint(
+        key, {field: other}
+    )
+
+
+def test_record_fingerprints(model_ini):
+    record = {
+        "simulation_id": 1,
+        **convert_settings(model_ini.as_dict(), SourceTypes.ini_file),
+    }
+    assert set(record_fingerprints(record)) == {
+        "physical_settings", "time_step_settings", "numerical_settings"
+    }
+    assert settings_fingerprint(record) == settings_fingerprint(
+        {**record, "simulation_id": 2}
+    )
+
+
+def test_ndjson_roundtrip(tmp_path):
+    records = [{"simulation_id": i, "a": [1.0, None]} for i in range(3)]
+    for name in ("payloads.ndjson", "payloads.ndjson.gz"):
+        path = tmp_path / name
+        assert write_ndjson(iter(records), path) == 3
+        assert list(read_ndjson(path)) == records
+
+
+def test_payloads_do_not_import_api_client():
+    code = (
+        "import sys, threedi_settings.payloads; "
+        "assert not [m for m in sys.modules if m.startswith('openapi_client')]"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
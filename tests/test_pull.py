@@ -0,0 +1,34 @@
+from unittest.mock import patch
+
+from openapi_client import ApiException, SimulationsApi
+
+from threedi_settings.http.api_clients import overview_cache
+from threedi_settings.http.pull import SettingsPuller
+from threedi_settings.threedimodel_config import AggregationIni, ThreedimodelIni
+
+from tests.client_fixtures import simulation_overview
+from tests.fixtures import INI
+
+
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_settings_puller(mock_overview, simulation_overview, tmp_path):
+    def overview(simulation_id):
+        if simulation_id == 3:
+            raise ApiException(status=404, reason="Not Found")
+        return simulation_overview
+
+    overview_cache.clear()
+    mock_overview.side_effect = overview
+    puller = SettingsPuller(
+        [1, 2, 3, 4], tmp_path / "pulled", max_in_flight=2, legacy_ini_file=INI
+    )
+    results = {r.simulation_id: r for r in puller.iter_results()}
+    assert set(results) == {1, 2, 3, 4}
+    assert not results[3].ok
+    assert "Not Found" in results[3].error
+    for simulation_id in (1, 2, 4):
+        result = results[simulation_id]
+        assert result.ok
+        assert "physics" in ThreedimodelIni(result.ini_file).as_dict(flat=False)
+        aggregations = AggregationIni(result.aggregation_file).as_dict()
+        assert len(aggregations) == len(simulation_overview.aggregation_settings)
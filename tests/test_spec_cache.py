@@ -0,0 +1,53 @@
+import io
+from unittest.mock import patch
+
+from threedi_settings.http.helpers import SwaggerSpecificationCode
+from threedi_settings.http.spec_cache import SpecificationCache
+
+SPEC = """
+swagger: '2.0'
+definitions:
+  PhysicalSettings:
+    properties:
+      use_advection_1d:
+        type: integer
+        maximum: 3
+"""
+
+
+class FakeResponse(io.BytesIO):
+    headers = {"ETag": '"abc"', "Last-Modified": None}
+
+
+@patch("threedi_settings.http.spec_cache.get_threedi_openapi_specification")
+def test_specification_cache(mock_get_spec, tmp_path):
+    mock_get_spec.return_value = (
+        SwaggerSpecificationCode.ok, FakeResponse(SPEC.encode())
+    )
+    cache = SpecificationCache(tmp_path, "http://localhost:8000")
+    code, definitions = cache.definitions()
+    assert code == SwaggerSpecificationCode.ok
+    assert "PhysicalSettings" in definitions
+    assert cache.spec_file.exists()
+
+    # served from the cache without any request
+    code, cached = SpecificationCache(tmp_path, "http://localhost:8000").definitions()
+    assert cached == definitions
+    assert mock_get_spec.call_count == 1
+
+    # revalidation sends the ETag
+    mock_get_spec.return_value = (SwaggerSpecificationCode.not_modified, "")
+    code, revalidated = cache.definitions(refresh=True)
+    assert revalidated == definitions
+    mock_get_spec.assert_called_with({"If-None-Match": '"abc"'})
+
+
+@patch("threedi_settings.http.spec_cache.get_threedi_openapi_specification")
+def test_specification_cache_error(mock_get_spec, tmp_path):
+    mock_get_spec.return_value = (
+        SwaggerSpecificationCode.connection_error, "no connection"
+    )
+    cache = SpecificationCache(tmp_path, "http://localhost:8000")
+    assert cache.definitions() == (
+        SwaggerSpecificationCode.connection_error, "no connection"
+    )
@@ -0,0 +1,162 @@
+import os
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from threedi_settings.sqlite_files import (
+    connect,
+    iter_zip_members,
+    split_zip_path,
+    sqlite_file_exists,
+    SqliteConnections,
+)
+from threedi_settings.threedimodel_config import ThreedimodelSqlite
+
+from tests.sqlite_fixture import SQLITE, model_sqlite
+
+MEMBER = SQLITE / "tests" / "v2_bergermeer_download.sqlite"
+
+
+def test_split_zip_path(tmp_path):
+    assert split_zip_path(MEMBER) == (SQLITE, "tests/v2_bergermeer_download.sqlite")
+    assert split_zip_path(tmp_path / "model.sqlite") is None
+    # a directory named like an archive
+    (tmp_path / "models.zip").mkdir()
+    assert split_zip_path(tmp_path / "models.zip" / "model.sqlite") is None
+
+
+def test_iter_zip_members():
+    assert list(iter_zip_members(SQLITE)) == [MEMBER]
+    assert list(iter_zip_members(SQLITE, ".ini")) == []
+
+
+def test_sqlite_file_exists():
+    assert sqlite_file_exists(MEMBER)
+    assert not sqlite_file_exists(SQLITE / "missing.sqlite")
+    assert not sqlite_file_exists(Path("missing.sqlite"))
+
+
+def test_connect_temporary_copy():
+    conn = connect(MEMBER, max_in_memory_size=0)
+    temp_dir = Path(conn.temp_dir.name)
+    assert temp_dir.exists()
+    assert conn.execute("SELECT count(*) FROM v2_global_settings").fetchone()[0]
+    conn.close()
+    assert not temp_dir.exists()
+
+
+def _database(path, value=1):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS t (value INTEGER)")
+        conn.execute("DELETE FROM t")
+        conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.close()
+    return path
+
+
+def test_connect_read_only(tmp_path):
+    conn = connect(_database(tmp_path / "a.sqlite"))
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO t VALUES (2)")
+    conn = connect(MEMBER)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM v2_global_settings")
+
+
+def test_connections_are_shared(tmp_path):
+    path = _database(tmp_path / "a.sqlite")
+    with SqliteConnections() as connections:
+        with connections.connection(path) as conn:
+            assert connections.acquire(path) is conn
+            assert conn.execute("SELECT value FROM t").fetchone()["value"] == 1
+        connections.release(conn)
+        assert len(connections) == 1
+        assert (connections.hits, connections.misses) == (1, 1)
+    assert len(connections) == 0
+
+
+def test_connections_of_changed_file(tmp_path):
+    path = _database(tmp_path / "a.sqlite")
+    connections = SqliteConnections()
+    old = connections.acquire(path)
+    _database(path, 2)
+    os.utime(path, ns=(10 ** 9, 10 ** 9))
+    new = connections.acquire(path)
+    assert new is not old
+    assert new.execute("SELECT value FROM t").fetchone()["value"] == 2
+    # the connection to the old version stays open while it is used
+    assert old.execute("SELECT value FROM t").fetchone()
+    connections.release(old)
+    assert len(connections) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.execute("SELECT value FROM t")
+
+
+def test_connections_see_write_ahead_log(tmp_path):
+    path = _database(tmp_path / "a.sqlite")
+    writer = sqlite3.connect(path)
+    writer.execute("PRAGMA journal_mode=WAL")
+    connections = SqliteConnections()
+    with connections.connection(path) as conn:
+        assert conn.execute("SELECT value FROM t").fetchone()["value"] == 1
+    stamp = os.stat(path).st_mtime_ns, os.stat(path).st_size
+    with writer:
+        writer.execute("UPDATE t SET value = 2")
+    # the change is in the -wal file only
+    assert (os.stat(path).st_mtime_ns, os.stat(path).st_size) == stamp
+    with connections.connection(path) as conn:
+        assert conn.execute("SELECT value FROM t").fetchone()["value"] == 2
+    assert connections.hits == 1
+    writer.close()
+    connections.close()
+
+
+@pytest.mark.skipif(
+    not hasattr(sqlite3.Connection, "deserialize"),
+    reason="in-memory copies require Python 3.11",
+)
+def test_connections_close_unused_in_memory_copies():
+    connections = SqliteConnections()
+    conn = connections.acquire(MEMBER)
+    assert connections.acquire(MEMBER) is conn
+    connections.release(conn)
+    assert conn.execute("SELECT count(*) FROM v2_global_settings").fetchone()
+    connections.release(conn)
+    # the in-memory copy is not kept once it is unused
+    assert len(connections) == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT count(*) FROM v2_global_settings")
+    # temporary copies are cached like plain files
+    with connections.connection(MEMBER, max_in_memory_size=0):
+        pass
+    assert len(connections) == 1
+    connections.close()
+
+
+def test_connections_lru_eviction(tmp_path):
+    paths = [_database(tmp_path / f"{i}.sqlite") for i in range(3)]
+    connections = SqliteConnections(maxsize=2)
+    in_use = connections.acquire(paths[0])
+    for path in paths[1:]:
+        with connections.connection(path):
+            pass
+    # the least recently used idle connection has been closed
+    assert len(connections) == 2
+    assert connections.evictions == 1
+    assert in_use.execute("SELECT value FROM t").fetchone()
+    with connections.connection(paths[1]):
+        pass
+    assert connections.misses == 4
+
+
+def test_threedimodel_sqlite_releases_connection(model_sqlite):
+    connections = SqliteConnections(maxsize=0)
+    with ThreedimodelSqlite(model_sqlite, 1, connections=connections) as tms:
+        other = ThreedimodelSqlite(model_sqlite, 2, connections=connections)
+        assert other.connection is tms.connection
+        assert tms.as_dict()
+        del other
+        assert len(connections) == 1
+    assert len(connections) == 0
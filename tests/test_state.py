@@ -0,0 +1,40 @@
+import os
+
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.state import ExportState, input_stamp
+
+from tests.fixtures import AGGRE
+from tests.sqlite_fixture import SQLITE
+
+
+def test_input_stamp(tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text("[model]\n")
+    stamp = input_stamp(ManifestEntry(1, ini))
+    assert stamp.source_size == 8
+    assert stamp.aggregation_file is None
+    stamp = input_stamp(ManifestEntry(1, ini, 1, AGGRE))
+    assert stamp.aggregation_file == str(AGGRE)
+    os.utime(ini, ns=(0, 0))
+    assert input_stamp(ManifestEntry(1, ini, 1, AGGRE)) != stamp
+
+
+def test_input_stamp_zip_member():
+    member = SQLITE / "tests" / "v2_bergermeer_download.sqlite"
+    stamp = input_stamp(ManifestEntry(1, member))
+    assert stamp.source_size == SQLITE.stat().st_size
+
+
+def test_export_state(tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text("[model]\n")
+    entry = ManifestEntry(1, ini)
+    path = tmp_path / "state.sqlite"
+    with ExportState(path) as state:
+        assert state.last_export(entry) is None
+        state.record_export(entry, input_stamp(entry), "abc")
+    with ExportState(path) as state:
+        assert state.last_export(entry) == (input_stamp(entry), "abc")
+        assert state.last_export(ManifestEntry(2, ini)) is None
+        state.forget(entry)
+        assert state.last_export(entry) is None
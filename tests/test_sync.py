@@ -0,0 +1,131 @@
+from copy import deepcopy
+from unittest.mock import patch
+
+from openapi_client import ApiException, SimulationsApi
+import pytest
+
+from threedi_settings.http.api_clients import (
+    OpenAPISimulationSettings,
+    overview_cache,
+)
+from threedi_settings.http.sync import SettingsSync, SyncError
+from threedi_settings.models import SourceTypes
+
+from tests.fixtures import model_ini, aggregation_ini
+from tests.client_fixtures import simulation_overview
+
+
+@patch.object(SimulationsApi, "simulations_settings_aggregation_create")
+@patch.object(SimulationsApi, "simulations_settings_numerical_partial_update")
+@patch.object(SimulationsApi, "simulations_settings_time_step_partial_update")
+@patch.object(SimulationsApi, "simulations_settings_physical_partial_update")
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_settings_sync(
+    mock_overview,
+    mock_physical_create,
+    mock_physical_update,
+    mock_time_step_update,
+    mock_numerical_update,
+    mock_aggregation_create,
+    model_ini,
+    aggregation_ini,
+    simulation_overview,
+):
+    overview_cache.clear()
+    mock_overview.return_value = simulation_overview
+    mock_physical_update.return_value = simulation_overview.physical_settings
+    mock_time_step_update.return_value = simulation_overview.time_step_settings
+    mock_numerical_update.return_value = simulation_overview.numerical_settings
+    result = SettingsSync.from_settings(
+        3, SourceTypes.ini_file, model_ini.as_dict(), aggregation_ini.as_dict()
+    ).run()
+    assert result.ok
+    mock_overview.assert_called_once()
+    mock_physical_create.assert_not_called()
+    mock_aggregation_create.assert_not_called()
+    assert result.created == []
+    assert result.updated == [
+        "physical_settings", "time_step_settings", "numerical_settings"
+    ]
+    assert result.unchanged == ["aggregation_settings"]
+    assert sorted(result.diff.settings["physical_settings"]) == [
+        "use_advection_1d", "use_advection_2d"
+    ]
+    assert result.write_requests == 3
+
+
+@patch.object(SimulationsApi, "simulations_settings_aggregation_create")
+@patch.object(SimulationsApi, "simulations_settings_numerical_partial_update")
+@patch.object(SimulationsApi, "simulations_settings_time_step_partial_update")
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_settings_sync_partial_overview(
+    mock_overview,
+    mock_physical_create,
+    mock_time_step_update,
+    mock_numerical_update,
+    mock_aggregation_create,
+    model_ini,
+    aggregation_ini,
+    simulation_overview,
+):
+    overview_cache.clear()
+    overview = deepcopy(simulation_overview)
+    overview.physical_settings = None
+    discharge = [
+        a for a in overview.aggregation_settings if a.flow_variable == "discharge"
+    ]
+    overview.aggregation_settings = [
+        a for a in overview.aggregation_settings if a.flow_variable != "discharge"
+    ]
+    mock_overview.return_value = overview
+    mock_physical_create.return_value = simulation_overview.physical_settings
+    mock_time_step_update.return_value = simulation_overview.time_step_settings
+    mock_numerical_update.return_value = simulation_overview.numerical_settings
+    mock_aggregation_create.return_value = discharge[0]
+    result = SettingsSync.from_settings(
+        3, SourceTypes.ini_file, model_ini.as_dict(), aggregation_ini.as_dict()
+    ).run()
+    assert result.ok
+    # the missing resource does not hide the differences of the others
+    assert result.created == ["physical_settings", "aggregation_settings"]
+    assert result.updated == ["time_step_settings", "numerical_settings"]
+    assert result.unchanged == []
+    assert len(result.diff.missing_aggregations) == len(discharge)
+    assert mock_aggregation_create.call_count == len(discharge)
+    assert result.write_requests == 3 + len(discharge)
+
+
+@patch.object(SimulationsApi, "simulations_settings_aggregation_create")
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_settings_sync_retrieve_error(
+    mock_overview,
+    mock_physical_create,
+    mock_aggregation_create,
+    model_ini,
+    aggregation_ini,
+):
+    overview_cache.clear()
+    mock_overview.side_effect = ApiException(status=502)
+    sync = SettingsSync.from_settings(
+        3, SourceTypes.ini_file, model_ini.as_dict(), aggregation_ini.as_dict()
+    )
+    with pytest.raises(SyncError):
+        sync.run()
+    mock_physical_create.assert_not_called()
+    mock_aggregation_create.assert_not_called()
+
+
+@patch.object(SimulationsApi, "simulations_settings_overview")
+def test_settings_sync_ignores_cached_overview(mock_overview, simulation_overview):
+    overview_cache.clear()
+    stale = deepcopy(simulation_overview)
+    stale.physical_settings = None
+    mock_overview.return_value = stale
+    assert OpenAPISimulationSettings(3).retrieve() is stale
+    mock_overview.return_value = simulation_overview
+    diff = SettingsSync(3, {"physical_settings": {}}).diff()
+    assert mock_overview.call_count == 2
+    assert diff.settings == {"physical_settings": {}}
@@ -1,11 +1,16 @@
+import shutil
+import sqlite3
+import types
+
 import pytest
 
 from threedi_settings.threedimodel_config import ThreedimodelSqlite, RowDoesNotExistError
 from threedi_settings.threedimodel_config import AggregationIni
-from threedi_settings.mappings import settings_map
+from threedi_settings.mappings import settings_map, SettingsTables
+from threedi_settings.sqlite_files import DEFAULT_MAX_IN_MEMORY_SIZE
 
 from tests.fixtures import model_ini, AGGRE
-from tests.sqlite_fixture import model_sqlite
+from tests.sqlite_fixture import SQLITE, model_sqlite
 
 
 
@@ -46,6 +51,62 @@ def test_threedimodelsqlite_aggregations(model_sqlite):
     assert len(tms.aggregation_settings.keys()) == 10
 
 
+def test_threedimodelsqlite_iter_aggregation_settings(model_sqlite):
+    tms = ThreedimodelSqlite(model_sqlite, 1)
+    rows = tms.iter_aggregation_settings()
+    assert isinstance(rows, types.GeneratorType)
+    assert list(rows) == list(tms.aggregation_settings.values())
+    discharge = list(tms.iter_aggregation_settings(flow_variables=["discharge"]))
+    assert [r["aggregation_method"] for r in discharge] == [
+        "cum", "cum_negative", "cum_positive"
+    ]
+    rows = list(
+        tms.iter_aggregation_settings(flow_variables=["discharge"], methods=["cum"])
+    )
+    assert len(rows) == 1
+    assert len(list(tms.iter_aggregation_settings(methods=["cum"]))) == 6
+    assert list(tms.iter_aggregation_settings(methods=[])) == []
+
+
+@pytest.fixture
+def two_rows_sqlite(model_sqlite, tmp_path):
+    """a copy of the model with a second global settings row, that owns
+    the discharge aggregation settings"""
+    path = tmp_path / "two_rows.sqlite"
+    shutil.copy(model_sqlite, path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "CREATE TEMP TABLE second AS "
+            "SELECT * FROM v2_global_settings WHERE id = 1"
+        )
+        conn.execute("UPDATE second SET id = 2, name = 'second'")
+        conn.execute("INSERT INTO v2_global_settings SELECT * FROM second")
+        conn.execute(
+            "UPDATE v2_aggregation_settings SET global_settings_id = 2 "
+            "WHERE flow_variable = 'discharge'"
+        )
+    conn.close()
+    return path
+
+
+def test_threedimodelsqlite_aggregations_of_other_row(model_sqlite, two_rows_sqlite):
+    all_rows = ThreedimodelSqlite(model_sqlite, 1).aggregation_settings.values()
+    first = ThreedimodelSqlite(two_rows_sqlite, 1).aggregation_settings.values()
+    second = ThreedimodelSqlite(two_rows_sqlite, 2).aggregation_settings.values()
+    assert list(first) == [
+        row for row in all_rows if row["flow_variable"] != "discharge"
+    ]
+    assert list(second) == [
+        row for row in all_rows if row["flow_variable"] == "discharge"
+    ]
+    assert len(second) == 3
+
+    tms = ThreedimodelSqlite(two_rows_sqlite, 1)
+    assert list(tms.iter_aggregation_settings(global_settings_id=2)) == list(second)
+    assert list(tms.iter_aggregation_settings(flow_variables=["discharge"])) == []
+
+
 def test_threedimodelsqlite_wrong_row(model_sqlite):
     tms = ThreedimodelSqlite(model_sqlite, 100)
     with pytest.raises(RowDoesNotExistError):
@@ -56,3 +117,69 @@ def test_threedimodelsqlite_wrong_row(model_sqlite):
 
     with pytest.raises(RowDoesNotExistError):
         assert tms.as_dict()
+
+
+def test_threedimodelsqlite_iter_settings(model_sqlite):
+    tms = ThreedimodelSqlite(model_sqlite, 1)
+    rows = list(tms.iter_settings())
+    assert len(rows) == 1
+    row_id, settings = rows[0]
+    assert row_id == 1
+    assert settings == tms.as_dict()
+
+
+def test_threedimodelsqlite_iter_settings_rows(two_rows_sqlite):
+    conn = sqlite3.connect(two_rows_sqlite)
+    with conn:
+        conn.execute("UPDATE v2_global_settings SET sim_time_step = 7 WHERE id = 2")
+    conn.close()
+    tms = ThreedimodelSqlite(two_rows_sqlite)
+    rows = dict(tms.iter_settings())
+    assert list(rows) == [1, 2]
+    for row_id, settings in rows.items():
+        assert settings == ThreedimodelSqlite(two_rows_sqlite, row_id).as_dict()
+    assert rows[2]["sim_time_step"] == 7
+    assert rows[1]["sim_time_step"] != 7
+
+
+def test_threedimodelsqlite_iter_settings_without_numerical(two_rows_sqlite):
+    conn = sqlite3.connect(two_rows_sqlite)
+    with conn:
+        conn.execute(
+            "UPDATE v2_global_settings SET numerical_settings_id = 9999 "
+            "WHERE id = 2"
+        )
+    conn.close()
+    tms = ThreedimodelSqlite(two_rows_sqlite)
+    rows = dict(tms.iter_settings())
+    # the row is not dropped, its numerical fields are None
+    assert list(rows) == [1, 2]
+    numerical_fields = tms.table_schemas[SettingsTables.numerical_settings]
+    assert all(rows[2][name] is None for name in numerical_fields)
+    assert rows[2]["sim_time_step"] == rows[1]["sim_time_step"]
+    assert rows[1] == ThreedimodelSqlite(two_rows_sqlite, 1).as_dict()
+
+
+def test_threedimodelsqlite_without_row(model_sqlite):
+    with ThreedimodelSqlite(model_sqlite) as tms:
+        assert [row_id for row_id, _ in tms.iter_settings()] == [1]
+        assert list(tms.get_global_settings_ids()) == [1]
+        with pytest.raises(RowDoesNotExistError):
+            tms.as_dict()
+        with pytest.raises(ValueError):
+            next(tms.iter_aggregation_settings())
+        assert list(tms.iter_aggregation_settings(global_settings_id=1))
+    assert tms.connection is None
+
+
+@pytest.mark.parametrize("max_in_memory_size", [DEFAULT_MAX_IN_MEMORY_SIZE, 0])
+def test_threedimodelsqlite_zip_member(model_sqlite, max_in_memory_size):
+    member = SQLITE / "tests" / "v2_bergermeer_download.sqlite"
+    tms = ThreedimodelSqlite(member, 1, max_in_memory_size)
+    assert tms.as_dict() == ThreedimodelSqlite(model_sqlite, 1).as_dict()
+    assert tms.aggregation_settings
+
+
+def test_threedimodelsqlite_missing_zip_member():
+    with pytest.raises(AssertionError):
+        ThreedimodelSqlite(SQLITE / "missing.sqlite", 1)
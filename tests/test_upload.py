@@ -0,0 +1,126 @@
+import threading
+from unittest.mock import patch
+
+from openapi_client import ApiException, SimulationsApi
+import pytest
+
+from threedi_settings.http.api_clients import OpenAPIPhysicalSettings
+from threedi_settings.http.upload import (
+    PayloadUploader,
+    SentPayloads,
+    resource_id,
+    upload_record,
+)
+from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import convert_aggregations, convert_settings
+
+from tests.fixtures import model_ini, aggregation_ini
+from tests.client_fixtures import simulation_overview
+
+
+def test_from_payload(model_ini):
+    payload = convert_settings(model_ini.as_dict(), SourceTypes.ini_file)
+    client = OpenAPIPhysicalSettings.from_payload(
+        1, payload["physical_settings"]
+    )
+    converted = OpenAPIPhysicalSettings(1, model_ini.as_dict(), SourceTypes.ini_file)
+    assert client.instance == converted.instance
+
+
+def test_resource_id(simulation_overview):
+    assert resource_id(simulation_overview.aggregation_settings[0]) == "32"
+
+
+@patch.object(SimulationsApi, "simulations_settings_aggregation_create")
+@patch.object(SimulationsApi, "simulations_settings_numerical_create")
+@patch.object(SimulationsApi, "simulations_settings_time_step_create")
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+def test_payload_uploader(
+    mock_physical,
+    mock_time_step,
+    mock_numerical,
+    mock_aggregation,
+    model_ini,
+    aggregation_ini,
+    simulation_overview,
+):
+    mock_physical.return_value = simulation_overview.physical_settings
+    mock_time_step.return_value = simulation_overview.time_step_settings
+    mock_numerical.return_value = simulation_overview.numerical_settings
+    mock_aggregation.return_value = simulation_overview.aggregation_settings[0]
+    record = {
+        "simulation_id": 1,
+        "source": "model.ini",
+        **convert_settings(model_ini.as_dict(), SourceTypes.ini_file),
+        "aggregation_settings": convert_aggregations(aggregation_ini.as_dict()),
+    }
+    records = [record, {**record, "simulation_id": 2}, {"source": "broken"}]
+    results = list(PayloadUploader(iter(records), max_in_flight=2).iter_results())
+    assert len(results) == 3
+    assert sum(result.ok for result in results) == 2
+    ok_result = next(r for r in results if r.ok)
+    assert len(ok_result.created["aggregation_settings"]) == 10
+
+
+def test_upload_record_invalid():
+    result = upload_record({"simulation_id": "abc"})
+    assert not result.ok
+    assert "record" in result.errors
+
+
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+def test_upload_record_skips_sent_payloads(mock_physical, model_ini, simulation_overview):
+    mock_physical.return_value = simulation_overview.physical_settings
+    payloads = convert_settings(model_ini.as_dict(), SourceTypes.ini_file)
+    record = {"simulation_id": 1, "physical_settings": payloads["physical_settings"]}
+    sent = SentPayloads()
+    first = upload_record(record, sent=sent)
+    second = upload_record(record, sent=sent)
+    other_simulation = upload_record({**record, "simulation_id": 2}, sent=sent)
+    assert mock_physical.call_count == 2
+    assert "physical_settings" in first.fingerprints
+    assert second.skipped == first.fingerprints
+    assert other_simulation.created
+
+    resumed = SentPayloads.from_results([first.as_dict()])
+    assert upload_record(record, sent=resumed).skipped
+    assert mock_physical.call_count == 2
+
+
+@pytest.mark.parametrize("created", [True, False])
+def test_sent_payloads_claim_waits_for_identical_upload(created):
+    sent = SentPayloads()
+    assert sent.claim(1, "physical_settings", "abc")
+    claims = []
+    waiting = threading.Thread(
+        target=lambda: claims.append(sent.claim(1, "physical_settings", "abc"))
+    )
+    waiting.start()
+    waiting.join(0.1)
+    # the identical payload is still being sent
+    assert claims == []
+    if created:
+        sent.confirm(1, "physical_settings", "abc")
+    else:
+        sent.release(1, "physical_settings", "abc")
+    waiting.join(5)
+    # skipped if created, otherwise it has to be sent again
+    assert claims == [not created]
+
+
+@patch.object(SimulationsApi, "simulations_settings_physical_create")
+def test_upload_record_resends_failed_payloads(
+    mock_physical, model_ini, simulation_overview
+):
+    mock_physical.side_effect = [
+        ApiException(status=502), simulation_overview.physical_settings
+    ]
+    payloads = convert_settings(model_ini.as_dict(), SourceTypes.ini_file)
+    record = {"simulation_id": 1, "physical_settings": payloads["physical_settings"]}
+    sent = SentPayloads()
+    first = upload_record(record, sent=sent)
+    second = upload_record(record, sent=sent)
+    assert not first.ok
+    assert second.ok
+    assert second.created
+    assert not second.skipped
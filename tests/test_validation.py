@@ -0,0 +1,149 @@
+import pytest
+
+from threedi_settings.definitions import build_index
+from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import convert_aggregations, convert_settings
+from threedi_settings.validation import PayloadValidator
+
+from tests.fixtures import model_ini, aggregation_ini
+
+SWAGGER_DEFINITIONS = {
+    "PhysicalSettings": {
+        "properties": {
+            "use_advection_1d": {"type": "integer", "minimum": 0, "maximum": 3},
+        }
+    },
+    "AggregationSettings": {
+        "properties": {
+            "method": {"type": "string", "enum": [
+                "avg", "cum", "cum_positive", "cum_negative", "current"
+            ]},
+        }
+    },
+}
+
+
+def _record(model_ini, aggregation_ini):
+    return {
+        "simulation_id": 1,
+        **convert_settings(model_ini.as_dict(), SourceTypes.ini_file),
+        "aggregation_settings": convert_aggregations(aggregation_ini.as_dict()),
+    }
+
+
+def test_validate_valid_records(model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    report = validator.validate([_record(model_ini, aggregation_ini)] * 3)
+    assert report.errors == {}
+
+
+def test_validate_reports_field_errors(model_ini, aggregation_ini):
+    validator = PayloadValidator(build_index(SWAGGER_DEFINITIONS))
+    valid = _record(model_ini, aggregation_ini)
+    invalid = _record(model_ini, aggregation_ini)
+    invalid["physical_settings"] = {"use_advection_1d": 5, "use_advection_2d": None}
+    invalid["time_step_settings"] = {
+        **invalid["time_step_settings"], "time_step": "fast"
+    }
+    invalid["aggregation_settings"][0] = {
+        **invalid["aggregation_settings"][0], "method": "median"
+    }
+    report = validator.validate([valid, invalid])
+    assert list(report.errors.keys()) == [1]
+    assert report.field_counts == {
+        ("physical_settings", "use_advection_1d"): 1,
+        ("physical_settings", "use_advection_2d"): 1,
+        ("time_step_settings", "time_step"): 1,
+        ("aggregation_settings", "method"): 1,
+    }
+
+
+def test_validate_with_bundled_index(model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    record = _record(model_ini, aggregation_ini)
+    record["numerical_settings"] = {
+        **record["numerical_settings"],
+        # out of range
+        "pump_implicit_ratio": 2.0,
+        # nullable
+        "time_integration_method": None,
+    }
+    record["aggregation_settings"][0] = {
+        **record["aggregation_settings"][0], "method": "median"
+    }
+    report = validator.validate([record])
+    assert report.field_counts == {
+        ("numerical_settings", "pump_implicit_ratio"): 1,
+        ("aggregation_settings", "method"): 1,
+    }
+
+
+def test_iter_valid(model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    valid = _record(model_ini, aggregation_ini)
+    invalid = {**valid, "physical_settings": {"use_advection_1d": 1.5}}
+    rejected = []
+    records = list(
+        validator.iter_valid([valid, invalid, valid], rejected, batch_size=2)
+    )
+    assert records == [valid, valid]
+    assert len(rejected) == 1
+    assert rejected[0][1][0].field == "use_advection_1d"
+
+
+def test_iter_valid_validates_identical_records_once(model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    records = [
+        {**_record(model_ini, aggregation_ini), "simulation_id": i}
+        for i in range(5)
+    ]
+    validated = []
+    validate = validator.validate
+
+    def counting_validate(batch):
+        validated.extend(batch)
+        return validate(batch)
+
+    validator.validate = counting_validate
+    rejected = []
+    assert len(list(validator.iter_valid(records, rejected, batch_size=2))) == 5
+    assert len(validated) == 1
+
+
+def test_iter_valid_does_not_confuse_raw_values(model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    valid = _record(model_ini, aggregation_ini)
+    valid["numerical_settings"] = {
+        **valid["numerical_settings"], "use_nested_newton": True
+    }
+    invalid = {
+        **valid,
+        "numerical_settings": {
+            **valid["numerical_settings"], "use_nested_newton": "false"
+        },
+    }
+    rejected = []
+    records = list(validator.iter_valid([valid, invalid], rejected))
+    assert records == [valid]
+    assert rejected[0][1][0].field == "use_nested_newton"
+
+
+@pytest.mark.parametrize("values", [(1, 1.0), (1.0, 1)])
+def test_iter_valid_does_not_confuse_int_and_float(values, model_ini, aggregation_ini):
+    validator = PayloadValidator()
+    records = []
+    for value in values:
+        record = _record(model_ini, aggregation_ini)
+        record["numerical_settings"] = {
+            **record["numerical_settings"], "max_degree_gauss_seidel": value
+        }
+        records.append(record)
+    rejected = []
+    valid = list(validator.iter_valid(records, rejected))
+    assert [
+        r["numerical_settings"]["max_degree_gauss_seidel"] for r in valid
+    ] == [1]
+    assert type(valid[0]["numerical_settings"]["max_degree_gauss_seidel"]) is int
+    assert [
+        r["numerical_settings"]["max_degree_gauss_seidel"] for r, _ in rejected
+    ] == [1.0]
@@ -0,0 +1,204 @@
+import os
+import shutil
+import sqlite3
+import zipfile
+from unittest.mock import patch
+
+from threedi_settings.diff import SettingsDiff
+from threedi_settings.http.sync import SettingsSync, SyncError, SyncResult
+from threedi_settings.http.watch import SettingsWatcher
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.watch import FileWatcher
+
+from tests.fixtures import INI
+from tests.sqlite_fixture import SQLITE
+
+
+class FakeClock:
+    """advances on sleep and runs the scheduled file writes"""
+
+    def __init__(self, writes):
+        self.now = 0.0
+        # time -> callable
+        self.writes = writes
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        for at in sorted(self.writes):
+            if at <= self.now:
+                self.writes.pop(at)()
+
+
+def _write(path, content, mtime_ns):
+    def write():
+        path.write_text(content)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return write
+
+
+def test_poll(tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text("a")
+    watcher = FileWatcher([ini, tmp_path / "missing.ini"])
+    assert watcher.poll() == set()
+    _write(ini, "ab", 10)()
+    assert watcher.poll() == {ini}
+    assert watcher.poll() == set()
+    (tmp_path / "missing.ini").write_text("created")
+    assert watcher.poll() == {tmp_path / "missing.ini"}
+
+
+def test_poll_sqlite_journal(tmp_path):
+    sqlite = tmp_path / "model.sqlite"
+    sqlite.write_bytes(b"")
+    watcher = FileWatcher([sqlite])
+    (tmp_path / "model.sqlite-wal").write_bytes(b"pending")
+    assert watcher.poll() == {sqlite}
+
+
+def test_poll_zip_member(tmp_path):
+    archive = tmp_path / "model.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("model.sqlite", b"a")
+    member = archive / "model.sqlite"
+    watcher = FileWatcher([member])
+    assert watcher.poll() == set()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("model.sqlite", b"ab")
+    os.utime(archive, ns=(10 ** 9, 10 ** 9))
+    assert watcher.poll() == {member}
+
+
+def test_iter_changes_debounces_bursts(tmp_path):
+    ini = tmp_path / "model.ini"
+    aggregation = tmp_path / "aggregation.ini"
+    ini.write_text("")
+    aggregation.write_text("")
+    clock = FakeClock(
+        {
+            1.0: _write(ini, "a", 1),
+            2.0: _write(ini, "ab", 2),
+            3.0: _write(ini, "abc", 3),
+            4.0: _write(aggregation, "a", 4),
+        }
+    )
+    watcher = FileWatcher(
+        [ini, aggregation], interval=1.0, debounce=2.0,
+        sleep=clock.sleep, timer=clock.time,
+    )
+    changes = watcher.iter_changes()
+    # the burst of writes to the ini file is reported once, two seconds
+    # after its last write
+    assert next(changes) == {ini}
+    assert clock.now == 5.0
+    assert next(changes) == {aggregation}
+    assert clock.now == 6.0
+
+
+class ScriptedWatcher:
+    """yields the scripted changes instead of polling the files"""
+
+    def __init__(self, changes):
+        self.paths = []
+        self.changes = changes
+
+    def iter_changes(self):
+        yield from self.changes
+
+
+@patch.object(SettingsSync, "run")
+def test_settings_watcher(mock_run, tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text(INI.read_text())
+    entry = ManifestEntry(3, ini)
+    mock_run.return_value = SyncResult(SettingsDiff(), updated=[])
+
+    def touch():
+        yield {ini}
+        ini.write_text(INI.read_text().replace("advection_1d = 0", "advection_1d = 1"))
+        yield {ini}
+        yield {tmp_path / "other.ini"}
+
+    watcher = SettingsWatcher([entry], file_watcher=ScriptedWatcher(touch()))
+    events = list(watcher.iter_events())
+    # initial sync, unchanged file, changed file
+    assert len(events) == 3
+    assert all(event.ok for event in events)
+    assert events[0].sync is not None
+    assert events[1].unchanged
+    assert events[2].sync is not None
+    assert mock_run.call_count == 2
+
+
+@patch.object(SettingsSync, "run")
+def test_settings_watcher_read_error(mock_run, tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text(INI.read_text())
+
+    def break_file():
+        ini.write_text("not an ini file")
+        yield {ini}
+
+    watcher = SettingsWatcher(
+        [ManifestEntry(3, ini)],
+        initial_sync=False,
+        file_watcher=ScriptedWatcher(break_file()),
+    )
+    events = list(watcher.iter_events())
+    assert len(events) == 1
+    assert not events[0].ok
+    mock_run.assert_not_called()
+
+
+@patch.object(SettingsSync, "run")
+def test_settings_watcher_sync_error(mock_run, tmp_path):
+    ini = tmp_path / "model.ini"
+    ini.write_text(INI.read_text())
+    entry = ManifestEntry(3, ini)
+    mock_run.side_effect = SyncError("Could not retrieve the settings")
+
+    watcher = SettingsWatcher([entry], file_watcher=ScriptedWatcher([{ini}]))
+    events = list(watcher.iter_events())
+    # the failed push is retried on the next change
+    assert len(events) == 2
+    assert not any(event.ok for event in events)
+    assert entry not in watcher.fingerprints
+    assert mock_run.call_count == 2
+
+
+@patch.object(SettingsSync, "run")
+def test_settings_watcher_zip_member(mock_run, tmp_path):
+    mock_run.return_value = SyncResult(SettingsDiff(), updated=["physical_settings"])
+    member_name = "tests/v2_bergermeer_download.sqlite"
+    with zipfile.ZipFile(SQLITE) as zf:
+        zf.extract(member_name, tmp_path)
+    sqlite = tmp_path / member_name
+    archive = tmp_path / "model.zip"
+    shutil.copy(SQLITE, archive)
+    member = archive / member_name
+
+    polls = []
+
+    def rewrite_zip(seconds):
+        polls.append(seconds)
+        # fail instead of polling forever if the change is not detected
+        assert len(polls) < 3
+        conn = sqlite3.connect(sqlite)
+        with conn:
+            conn.execute("UPDATE v2_global_settings SET advection_2d = 0")
+        conn.close()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.write(sqlite, member_name)
+        os.utime(archive, ns=(10 ** 9, 10 ** 9))
+
+    file_watcher = FileWatcher([member], debounce=0, sleep=rewrite_zip)
+    watcher = SettingsWatcher(
+        [ManifestEntry(3, member)], initial_sync=False, file_watcher=file_watcher
+    )
+    event = next(watcher.iter_events())
+    assert event.ok
+    assert event.sync is not None
+    mock_run.assert_called_once()
@@ -4,25 +4,33 @@ import logging
 try:
     import typer
     from rich.console import Console
-    from rich.table import Table
 except ImportError:
     raise ImportError(
         "You need to install the extra 'cmd', e.g. pip install threedi-settings[cmd]"  # noqa
     )
-from openapi_client.models import SimulationSettingsOverview
 from threedi_settings.threedimodel_config import ThreedimodelIni
 from threedi_settings.threedimodel_config import AggregationIni
-from threedi_settings.http.api_clients import OpenAPINumericalSettings
-from threedi_settings.http.api_clients import OpenAPITimeStepSettings
-from threedi_settings.http.api_clients import OpenAPIPhysicalSettings
-from threedi_settings.http.api_clients import OpenAPIAggregationSettings
-from threedi_settings.http.api_clients import OpenAPISimulationSettings
+from threedi_settings.http import (
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_PULL_WRITERS,
+)
+from threedi_settings.manifest import (
+    read_manifest, read_simulation_ids, ManifestError
+)
 from threedi_settings.threedimodel_config import ThreedimodelSqlite, RowDoesNotExistError
-from threedi_settings.pretty.output.global_settings import OverViewTable
-from threedi_settings.pretty.output.http import ResponseTree
+from threedi_settings.sqlite_files import sqlite_file_exists
+from threedi_settings.watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
 
 from threedi_settings.models import SourceTypes
-from typing import Dict, Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+# The API client and the pretty output modules are imported by the
+# commands that use them, so parsing the arguments stays fast.
+if TYPE_CHECKING:
+    from openapi_client.models import SimulationSettingsOverview
+    from threedi_settings.http.api_clients import AggregationCreateResult
 
 logger = logging.getLogger(__name__)
 
@@ -30,20 +38,120 @@ settings_app = typer.Typer()
 console = Console()
 
 
+def _report_aggregation_errors(results: List["AggregationCreateResult"]):
+    for result in results:
+        if result.ok:
+            continue
+        console.print(
+            f"[bold red] Could not create aggregation settings entry "
+            f"{result.index} ({result.instance.flow_variable}, "
+            f"{result.instance.method}): {result.error}"
+        )
+
+
 def _create(
     simulation_id: int,
     source: SourceTypes,
     settings: Dict,
-    aggregations: Optional[Dict] = None
-) -> Optional[SimulationSettingsOverview]:
-    """create all API settings resources"""
-    OpenAPINumericalSettings(simulation_id, settings, source).create()
-    OpenAPITimeStepSettings(simulation_id, settings, source).create()
-    OpenAPIPhysicalSettings(simulation_id, settings, source).create()
+    aggregations: Optional[Dict] = None,
+    concurrent: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    aggregation_workers: int = 1,
+    verify: bool = False,
+) -> Optional["SimulationSettingsOverview"]:
+    """
+    create all API settings resources
+
+    The returned overview is built from the create responses. Only if
+    `verify` is set, the overview is fetched from the API instead.
+    """
+    from threedi_settings.http.api_clients import (
+        OpenAPINumericalSettings,
+        OpenAPITimeStepSettings,
+        OpenAPIPhysicalSettings,
+        OpenAPIAggregationSettings,
+        OpenAPISimulationSettings,
+        settings_overview_from_responses,
+    )
+    from threedi_settings.http.export import ConcurrentExporter
+
+    if concurrent:
+        exporter = ConcurrentExporter(
+            simulation_id,
+            source,
+            settings,
+            aggregations,
+            max_concurrency,
+            aggregation_workers,
+            verify,
+        )
+        resp = exporter.run()
+        _report_aggregation_errors(exporter.aggregation_results)
+        return resp
+    numerical = OpenAPINumericalSettings(simulation_id, settings, source).create()
+    time_step = OpenAPITimeStepSettings(simulation_id, settings, source).create()
+    physical = OpenAPIPhysicalSettings(simulation_id, settings, source).create()
+    aggregation_responses = []
     if aggregations:
-        OpenAPIAggregationSettings(simulation_id, aggregations).create()
-    sim_settings = OpenAPISimulationSettings(simulation_id)
-    return sim_settings.retrieve()
+        aggregation_client = OpenAPIAggregationSettings(
+            simulation_id, aggregations
+        )
+        if aggregation_workers > 1:
+            results = aggregation_client.bulk_create(aggregation_workers)
+            _report_aggregation_errors(results)
+            aggregation_responses = [r.response for r in results if r.ok]
+        else:
+            aggregation_responses = aggregation_client.create()
+    if verify:
+        sim_settings = OpenAPISimulationSettings(simulation_id)
+        return sim_settings.retrieve()
+    return settings_overview_from_responses(
+        physical, time_step, numerical, aggregation_responses
+    )
+
+
+def _sync(
+    simulation_id: int,
+    source: SourceTypes,
+    settings: Dict,
+    aggregations: Optional[Dict] = None,
+    aggregation_workers: int = 1,
+):
+    """
+    create or update only the API settings resources that differ from
+    the local settings and print what has been done
+    """
+    from rich.table import Table
+    from threedi_settings.http.sync import SettingsSync, SyncError
+
+    try:
+        result = SettingsSync.from_settings(
+            simulation_id, source, settings, aggregations, aggregation_workers
+        ).run()
+    except SyncError as err:
+        console.print(f"[bold red] {err}")
+        raise typer.Exit(1)
+    table = Table(title=f"Settings sync of simulation {simulation_id}")
+    table.add_column("Resource", style="cyan")
+    table.add_column("Action", style="green")
+    table.add_column("Changed fields")
+    for key in result.created:
+        table.add_row(key, "created", "")
+    for key in result.updated:
+        table.add_row(key, "updated", ", ".join(sorted(result.diff.settings[key])))
+    for key in result.unchanged:
+        table.add_row(key, "unchanged", "")
+    for key, error in result.errors.items():
+        table.add_row(key, "[red]failed", f"[red]{error}")
+    console.print(table)
+    console.print(f"[green] {result.write_requests} write request(s) sent")
+    if result.diff.extra_aggregations:
+        console.print(
+            f"[yellow] {result.diff.extra_aggregations} aggregation settings "
+            f"entries exist in the API only and have been left alone"
+        )
+    if not result.ok:
+        raise typer.Exit(1)
 
 
 @settings_app.command()
@@ -65,6 +173,31 @@ def export_from_ini(
         resolve_path=True,
         help="Legacy model aggregation settings file.",
     ),
+    concurrent: bool = typer.Option(
+        False,
+        help="Send the create requests of the settings resources concurrently."
+    ),
+    max_concurrency: int = typer.Option(
+        DEFAULT_MAX_CONCURRENCY,
+        min=1,
+        help="Maximum number of concurrent requests in '--concurrent' mode."
+    ),
+    aggregation_workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of workers that upload the aggregation settings. "
+        "Values larger than 1 enable the bulk upload."
+    ),
+    verify: bool = typer.Option(
+        False,
+        help="Fetch the settings overview from the API after the export "
+        "instead of building it from the create responses."
+    ),
+    sync: bool = typer.Option(
+        False,
+        help="Compare with the current API settings first and only create "
+        "or update the resources that differ."
+    ),
 ):
     """
     "Create API V3 settings resources from legacy model ini file"
@@ -75,12 +208,28 @@ def export_from_ini(
         aggr_ini = AggregationIni(aggregation_file)
         aggr = aggr_ini.as_dict()
 
+    if sync:
+        _sync(
+            simulation_id,
+            SourceTypes.ini_file,
+            model_ini.as_dict(),
+            aggr,
+            aggregation_workers,
+        )
+        return
     resp = _create(
         simulation_id,
         SourceTypes.ini_file,
         model_ini.as_dict(),
         aggr,
+        concurrent,
+        max_concurrency,
+        aggregation_workers,
+        verify,
     )
+    if not resp:
+        raise typer.Exit(1)
+    from threedi_settings.pretty.output.http import ResponseTree
     rt = ResponseTree(resp)
     rt.show()
 
@@ -90,11 +239,11 @@ def export_from_sqlite(
     simulation_id: int,
     sqlite_file: Path = typer.Argument(
         ...,
-        exists=True,
         dir_okay=False,
         writable=False,
         resolve_path=True,
-        help="SQLITE model file.",
+        help="SQLITE model file, or a sqlite file in a zip archive "
+        "(e.g. model.zip/model.sqlite).",
     ),
     settings_row: int = typer.Argument(
         1,
@@ -106,11 +255,38 @@ def export_from_sqlite(
         "If the '--no-aggregations' option is not explicitly set, the "
         "aggregation settings found in the sqlite file will be exported, too."
     ),
+    concurrent: bool = typer.Option(
+        False,
+        help="Send the create requests of the settings resources concurrently."
+    ),
+    max_concurrency: int = typer.Option(
+        DEFAULT_MAX_CONCURRENCY,
+        min=1,
+        help="Maximum number of concurrent requests in '--concurrent' mode."
+    ),
+    aggregation_workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of workers that upload the aggregation settings. "
+        "Values larger than 1 enable the bulk upload."
+    ),
+    verify: bool = typer.Option(
+        False,
+        help="Fetch the settings overview from the API after the export "
+        "instead of building it from the create responses."
+    ),
+    sync: bool = typer.Option(
+        False,
+        help="Compare with the current API settings first and only create "
+        "or update the resources that differ."
+    ),
 ):
     """
     "Create API V3 settings resources from legacy model sqlite file"
     """
-
+    if not sqlite_file_exists(sqlite_file):
+        console.print(f"[bold red] {sqlite_file} does not exist")
+        raise typer.Exit(1)
     tms = ThreedimodelSqlite(sqlite_file, settings_row)
     aggr = tms.aggregation_settings if aggregations else None
 
@@ -118,20 +294,35 @@ def export_from_sqlite(
         settings = tms.as_dict()
     except RowDoesNotExistError as err:
         console.print(f"[bold red] {err}")
+        from threedi_settings.pretty.output.global_settings import OverViewTable
         available_ids = tms.get_global_settings_ids()
         overview = OverViewTable(available_ids)
         console.print(f"[green] Please choose from one of the following:")
         console.print(overview.table)
         raise typer.Exit(1)
 
+    if sync:
+        _sync(
+            simulation_id,
+            SourceTypes.sqlite_file,
+            settings,
+            aggr,
+            aggregation_workers,
+        )
+        return
     resp = _create(
         simulation_id,
         SourceTypes.sqlite_file,
         settings,
-        aggr
+        aggr,
+        concurrent,
+        max_concurrency,
+        aggregation_workers,
+        verify,
     )
     if not resp:
         raise typer.Exit(1)
+    from threedi_settings.pretty.output.http import ResponseTree
     try:
         rt = ResponseTree(resp)
         rt.show()
@@ -139,5 +330,295 @@ def export_from_sqlite(
         console.print(f"[bold red]{err}")
 
 
+@settings_app.command()
+def export_batch(
+    manifest_file: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        writable=False,
+        resolve_path=True,
+        help="CSV or JSON manifest with the columns simulation_id, source, "
+        "settings_row (optional) and aggregation_file (optional).",
+    ),
+    workers: int = typer.Option(
+        DEFAULT_BATCH_WORKERS,
+        min=1,
+        help="Number of manifest entries that are exported in parallel."
+    ),
+    processes: bool = typer.Option(
+        False,
+        help="Use worker processes instead of worker threads."
+    ),
+    max_concurrency: int = typer.Option(
+        1,
+        min=1,
+        help="Maximum number of concurrent requests per manifest entry."
+    ),
+    aggregation_workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of workers that upload the aggregation settings "
+        "per manifest entry."
+    ),
+    state_file: Optional[Path] = typer.Option(
+        None,
+        "--state",
+        dir_okay=False,
+        resolve_path=True,
+        help="Sqlite file that records the successful exports. Entries whose "
+        "inputs did not change since their last export are skipped.",
+    ),
+    force: bool = typer.Option(
+        False,
+        help="Export all entries, even if their inputs did not change "
+        "since their last export (requires '--state')."
+    ),
+):
+    """
+    Create API V3 settings resources for all entries of a manifest
+    """
+    from rich.table import Table
+    from threedi_settings.http.batch import BatchExporter
+    from threedi_settings.state import ExportState
+
+    try:
+        entries = list(read_manifest(manifest_file))
+    except ManifestError as err:
+        console.print(f"[bold red] {err}")
+        raise typer.Exit(1)
+
+    state = ExportState(state_file) if state_file else None
+    batch_exporter = BatchExporter(
+        entries,
+        workers,
+        processes,
+        max_concurrency,
+        aggregation_workers,
+        state,
+        force,
+    )
+    try:
+        summary = batch_exporter.run()
+    finally:
+        if state:
+            state.close()
+    failures = summary.failures
+    skipped = summary.skipped
+    console.print(
+        f"[green] Exported {len(summary.results) - len(failures) - len(skipped)} "
+        f"of {len(summary.results)} entries in {summary.elapsed:.1f} s "
+        f"({summary.throughput:.2f} entries/s)"
+    )
+    if skipped:
+        console.print(
+            f"[green] Skipped {len(skipped)} entries whose inputs did not "
+            f"change since their last export"
+        )
+    if not failures:
+        return
+    table = Table(title="Failed exports")
+    table.add_column("Simulation", style="cyan")
+    table.add_column("Source", style="green")
+    table.add_column("Error", style="red")
+    for result in failures:
+        table.add_row(
+            str(result.entry.simulation_id),
+            str(result.entry.source),
+            result.error,
+        )
+    console.print(table)
+    raise typer.Exit(1)
+
+
+@settings_app.command()
+def pull(
+    output_dir: Path = typer.Argument(
+        ...,
+        file_okay=False,
+        resolve_path=True,
+        help="Directory the ini and aggregation files are written to.",
+    ),
+    simulation_ids: Optional[List[int]] = typer.Argument(
+        None,
+        help="Ids of the simulations whose settings are pulled.",
+    ),
+    ids_file: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Text file with one simulation id per line.",
+    ),
+    legacy_ini: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Legacy model settings ini file used as template, it provides "
+        "the fields that do not exist in the API.",
+    ),
+    max_in_flight: int = typer.Option(
+        DEFAULT_MAX_IN_FLIGHT,
+        min=1,
+        help="Maximum number of simulations that are fetched or written "
+        "at the same time."
+    ),
+    writers: int = typer.Option(
+        DEFAULT_PULL_WRITERS,
+        min=1,
+        help="Number of workers that write the ini files."
+    ),
+):
+    """
+    Write the API V3 settings of simulations to legacy ini and aggregation files
+    """
+    from rich.table import Table
+    from threedi_settings.http.pull import SettingsPuller
+
+    ids = list(simulation_ids or [])
+    if ids_file:
+        try:
+            ids.extend(read_simulation_ids(ids_file))
+        except ManifestError as err:
+            console.print(f"[bold red] {err}")
+            raise typer.Exit(1)
+    if not ids:
+        console.print("[bold red] No simulation ids given")
+        raise typer.Exit(1)
+
+    puller = SettingsPuller(ids, output_dir, max_in_flight, writers, legacy_ini)
+    failures = []
+    n_results = 0
+    for result in puller.iter_results():
+        n_results += 1
+        if not result.ok:
+            failures.append(result)
+    console.print(
+        f"[green] Pulled the settings of {n_results - len(failures)} of "
+        f"{n_results} simulations into {output_dir}"
+    )
+    if not failures:
+        return
+    table = Table(title="Failed pulls")
+    table.add_column("Simulation", style="cyan")
+    table.add_column("Error", style="red")
+    for result in sorted(failures, key=lambda r: r.simulation_id):
+        table.add_row(str(result.simulation_id), result.error)
+    console.print(table)
+    raise typer.Exit(1)
+
+
+@settings_app.command()
+def watch(
+    simulation_id: Optional[int] = typer.Argument(
+        None,
+        help="Id of the simulation the settings are pushed to.",
+    ),
+    source: Optional[Path] = typer.Argument(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Legacy model settings ini file or model sqlite file.",
+    ),
+    aggregation_file: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Legacy aggregation settings ini file.",
+    ),
+    settings_row: int = typer.Option(
+        1, min=1, help="Global settings row of a sqlite source."
+    ),
+    manifest_file: Optional[Path] = typer.Option(
+        None,
+        "--manifest",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="CSV or JSON manifest (see 'export-batch') of the sources to "
+        "watch, instead of a single simulation and source.",
+    ),
+    interval: float = typer.Option(
+        DEFAULT_POLL_INTERVAL,
+        min=0.1,
+        help="Seconds between two checks of the files.",
+    ),
+    debounce: float = typer.Option(
+        DEFAULT_DEBOUNCE,
+        min=0.0,
+        help="Seconds a file must be left alone before its change is pushed.",
+    ),
+    aggregation_workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of workers that upload the aggregation settings."
+    ),
+    initial_sync: bool = typer.Option(
+        True,
+        help="Sync all sources when starting, instead of only after their "
+        "first change.",
+    ),
+):
+    """
+    Push the changed settings of model files to their simulations, whenever the files change
+    """
+    from datetime import datetime
+    from threedi_settings.http.watch import SettingsWatcher
+    from threedi_settings.manifest import ManifestEntry
+
+    if manifest_file:
+        try:
+            entries = list(read_manifest(manifest_file))
+        except ManifestError as err:
+            console.print(f"[bold red] {err}")
+            raise typer.Exit(1)
+    elif simulation_id is not None and source is not None:
+        entries = [
+            ManifestEntry(simulation_id, source, settings_row, aggregation_file)
+        ]
+    else:
+        console.print(
+            "[bold red] Give a simulation id and a source file, or a manifest"
+        )
+        raise typer.Exit(1)
+
+    watcher = SettingsWatcher(
+        entries, interval, debounce, aggregation_workers, initial_sync
+    )
+    console.print(
+        f"[green] Watching {len(watcher.file_watcher.paths)} file(s), "
+        f"press Ctrl+C to stop"
+    )
+    try:
+        for event in watcher.iter_events():
+            prefix = (
+                f"{datetime.now():%H:%M:%S} simulation "
+                f"{event.entry.simulation_id} ({event.entry.source.name}):"
+            )
+            if event.error:
+                console.print(f"[bold red] {prefix} {event.error}")
+            elif event.unchanged:
+                console.print(f" {prefix} settings unchanged")
+            else:
+                result = event.sync
+                actions = [f"created {key}" for key in result.created] + [
+                    f"updated {key} ({', '.join(sorted(result.diff.settings[key]))})"
+                    for key in result.updated
+                ]
+                actions += [
+                    f"[red]failed {key}: {error}"
+                    for key, error in result.errors.items()
+                ]
+                console.print(
+                    f"[green] {prefix}[/green] "
+                    f"{'; '.join(actions) or 'already up to date'}"
+                )
+    except KeyboardInterrupt:
+        console.print("[green] Stopped watching")
+
+
 if __name__ == "__main__":
     settings_app()
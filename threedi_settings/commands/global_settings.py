@@ -1,12 +1,16 @@
 from pathlib import Path
+from typing import List, Optional
 
+from threedi_settings.manifest import SOURCE_SUFFIXES
+from threedi_settings.sqlite_files import (
+    iter_zip_members,
+    sqlite_file_exists,
+    ZIP_SUFFIX,
+)
 from threedi_settings.threedimodel_config import ThreedimodelSqlite
-from threedi_settings.pretty.output.global_settings import OverViewTable
 try:
     import typer
     from rich.console import Console
-    from rich.tree import Tree
-    from rich.panel import Panel
 except ImportError:
     raise ImportError(
         "You need to install the extra 'cmd', e.g. pip install threedi-settings[cmd]"  # noqa
@@ -21,22 +25,139 @@ console = Console()
 def ls(
     sqlite_file: Path = typer.Argument(
         ...,
-        exists=True,
         dir_okay=False,
         writable=False,
         resolve_path=True,
-        help="SQLITE model file.",
+        help="SQLITE model file, or a sqlite file in a zip archive "
+        "(e.g. model.zip/model.sqlite).",
     ),
 ):
     """Shows id and name of existing global settings entries"""
-    tms = ThreedimodelSqlite(sqlite_file, ...)
-    ht = OverViewTable(tms.get_global_settings_ids())
+    from threedi_settings.pretty.output.global_settings import OverViewTable
+
+    if not sqlite_file_exists(sqlite_file):
+        console.print(f"[bold red] {sqlite_file} does not exist")
+        raise typer.Exit(1)
+    with ThreedimodelSqlite(sqlite_file) as tms:
+        ht = OverViewTable(tms.get_global_settings_ids())
     console.print(
         f"[green] The sqlite file contains the following global settings rows:"
     )
     console.print(ht.table)
 
 
+def _collect_sources(sources: List[Path], sources_file: Optional[Path]) -> List[Path]:
+    """expands directories and zip archives to the sqlite files they contain"""
+    paths = list(sources or [])
+    if sources_file:
+        paths.extend(
+            Path(line.strip())
+            for line in sources_file.read_text().splitlines()
+            if line.strip()
+        )
+    collected = []
+    for path in paths:
+        if path.is_dir():
+            collected.extend(sorted(path.rglob("*.sqlite")))
+            for archive in sorted(path.rglob(f"*{ZIP_SUFFIX}")):
+                collected.extend(iter_zip_members(archive))
+        elif path.suffix.lower() == ZIP_SUFFIX and path.is_file():
+            collected.extend(iter_zip_members(path))
+        else:
+            collected.append(path)
+    return collected
+
+
+@global_settings_app.command()
+def compare(
+    sources: Optional[List[Path]] = typer.Argument(
+        None,
+        exists=True,
+        resolve_path=True,
+        help="Legacy model ini or sqlite files. Directories and zip "
+        "archives are searched for sqlite files.",
+    ),
+    sources_file: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Text file with one source path per line.",
+    ),
+    reference: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Ini or sqlite file with the standard settings (its first global "
+        "settings row). Defaults to the API defaults.",
+    ),
+    workers: int = typer.Option(
+        4,
+        min=1,
+        help="Number of worker processes that read the sources."
+    ),
+    max_outliers: int = typer.Option(
+        5,
+        min=0,
+        help="Number of deviating files listed per field."
+    ),
+):
+    """
+    Compare the settings of many model files with standard settings
+    """
+    from rich.table import Table
+    from threedi_settings.compare import compare_sources, read_reference
+
+    paths = _collect_sources(sources, sources_file)
+    unknown = [p for p in paths if p.suffix.lower() not in SOURCE_SUFFIXES]
+    if unknown:
+        console.print(f"[bold red] Unknown source type: {unknown[0]}")
+        raise typer.Exit(1)
+    if not paths:
+        console.print("[bold red] No sources given")
+        raise typer.Exit(1)
+    reference_settings = None
+    if reference:
+        try:
+            reference_settings = read_reference(reference)
+        except ValueError as err:
+            console.print(f"[bold red] {err}")
+            raise typer.Exit(1)
+
+    report = compare_sources(
+        paths, reference_settings, workers, max_outliers=max_outliers
+    )
+    console.print(
+        f"[green] {report.deviating_sources} of {len(report.labels)} settings "
+        f"entries deviate from the reference"
+    )
+    if report.deviations:
+        table = Table(title="Deviations per field")
+        table.add_column("Field", style="cyan")
+        table.add_column("Reference", style="green")
+        table.add_column("Count", justify="right")
+        table.add_column("Outliers")
+        for deviation in report.deviations:
+            table.add_row(
+                deviation.field,
+                str(deviation.reference),
+                str(deviation.count),
+                "\n".join(
+                    f"{label}: {value}" for label, value in deviation.outliers
+                ),
+            )
+        console.print(table)
+    if report.errors:
+        table = Table(title="Unreadable sources")
+        table.add_column("Source", style="cyan")
+        table.add_column("Error", style="red")
+        for path, error in report.errors.items():
+            table.add_row(path, error)
+        console.print(table)
+        raise typer.Exit(1)
+
+
 @global_settings_app.callback()
 def main():
     pass
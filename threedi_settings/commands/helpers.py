@@ -1,15 +1,9 @@
-from typing import Dict
+from typing import Dict, TYPE_CHECKING
 
 from threedi_settings.mappings import swagger_definitions_map, swagger_url_map
-from threedi_settings.http.helpers import (
-    get_threedi_openapi_specification, SwaggerSpecificationCode
-)
 try:
-    import yaml
     import typer
     from rich.console import Console
-    from rich.tree import Tree
-    from rich.panel import Panel
 except ImportError:
     raise ImportError(
         "You need to install the extra 'cmd', e.g. pip install threedi-settings[cmd]"  # noqa
@@ -21,13 +15,17 @@ SETTINGS_FIELD_STYLES = {
     'description': "[bold cyan]",
     'type': "[italic gold1]",
     'maximum': "[italic orange3]",
-    'minimum': "[italic dark_goldenrod]"
+    'minimum': "[italic dark_goldenrod]",
+    'default': "[italic green]",
 }
 
 console = Console()
 
+if TYPE_CHECKING:
+    from rich.tree import Tree
+
 
-def set_attrs(field_def: Dict, tree: Tree) -> None:
+def set_attrs(field_def: Dict, tree: "Tree") -> None:
     """
     adds the field definitions that match the keys in
     SETTINGS_FIELD_STYLES to the given tree instance
@@ -43,21 +41,55 @@ def set_attrs(field_def: Dict, tree: Tree) -> None:
 
 
 @helper_app.command()
-def settings_description():
+def settings_description(
+    refresh: bool = typer.Option(
+        False,
+        help="Revalidate the cached API specification, even if it has "
+        "not expired yet."
+    ),
+    offline: bool = typer.Option(
+        False,
+        help="Use the settings definitions index shipped with the package "
+        "instead of the API specification."
+    ),
+    field: str = typer.Option(
+        None,
+        help="Only show the fields whose name contains NAME or matches "
+        "the glob pattern NAME.",
+        metavar="NAME",
+    ),
+):
     """
     Shows all API V3 simulation settings fields, help texts on how to use them,
     suitable defaults, types etc.
     """
-    tree = Tree("Settings Description")
+    from rich.tree import Tree
+    from rich.panel import Panel
+    from threedi_settings.definitions import (
+        bundled_index, build_index, SettingsDefinitionsIndex
+    )
+
+    if offline:
+        index = bundled_index()
+    else:
+        from threedi_settings.http.spec_cache import SpecificationCache
+        from threedi_settings.http.helpers import SwaggerSpecificationCode
 
-    code, resp = get_threedi_openapi_specification()
-    if code != SwaggerSpecificationCode.ok:
-        console.print(f"[red] Error: {resp}")
-        raise typer.Exit(code)
-    content = yaml.load_all(resp, Loader=yaml.FullLoader)
+        code, swagger_defs = SpecificationCache().definitions(refresh)
+        if code != SwaggerSpecificationCode.ok:
+            console.print(f"[red] Error: {swagger_defs}")
+            raise typer.Exit(code)
+        index = SettingsDefinitionsIndex(build_index(swagger_defs))
 
-    swagger_defs = next(content)["definitions"]
-    for swagger_key, map in swagger_definitions_map.items():
+    definitions = index.search(field) if field else index.index
+    if not definitions:
+        console.print(f"[red] No settings field matches '{field}'")
+        raise typer.Exit(1)
+
+    tree = Tree("Settings Description")
+    for swagger_key in swagger_definitions_map:
+        if swagger_key not in definitions:
+            continue
         url = swagger_url_map[swagger_key]
         p = Panel(
             f":wrench: {swagger_key}",
@@ -66,14 +98,9 @@ def settings_description():
             title=url
         )
         sub_tree = tree.add(p)
-        for field_name, info in map.items():
-            try:
-                field_def = swagger_defs[swagger_key]["properties"][field_name]
-                field_tree = sub_tree.add(f"[green]{field_name}")
-                set_attrs(field_def, field_tree)
-            except KeyError as err:
-                print(f"{err} {field_name}")
-                pass
+        for field_name, field_def in definitions[swagger_key].items():
+            field_tree = sub_tree.add(f"[green]{field_name}")
+            set_attrs(field_def, field_tree)
     console.print(tree)
 
 
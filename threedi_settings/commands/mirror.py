@@ -0,0 +1,140 @@
+from pathlib import Path
+from typing import List, Optional
+
+from threedi_settings.http import DEFAULT_MAX_IN_FLIGHT
+from threedi_settings.manifest import read_simulation_ids, ManifestError
+from threedi_settings.mirror import DEFAULT_MAX_AGE, MirrorError, SettingsMirror
+try:
+    import typer
+    from rich.console import Console
+    from rich.table import Table
+except ImportError:
+    raise ImportError(
+        "You need to install the extra 'cmd', e.g. pip install threedi-settings[cmd]"  # noqa
+    )
+
+mirror_app = typer.Typer()
+
+console = Console()
+
+
+@mirror_app.command()
+def refresh(
+    mirror_file: Path = typer.Argument(
+        ...,
+        dir_okay=False,
+        resolve_path=True,
+        help="Sqlite file of the settings mirror, created if it does not exist.",
+    ),
+    simulation_ids: Optional[List[int]] = typer.Argument(
+        None,
+        help="Ids of the simulations to mirror. Defaults to the simulations "
+        "already in the mirror.",
+    ),
+    ids_file: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Text file with one simulation id per line.",
+    ),
+    max_age: float = typer.Option(
+        DEFAULT_MAX_AGE,
+        min=0,
+        help="Refetch simulations synced more than this many seconds ago.",
+    ),
+    force: bool = typer.Option(
+        False,
+        help="Refetch all simulations, regardless of their last sync."
+    ),
+    dirty: Optional[List[int]] = typer.Option(
+        None,
+        "--dirty",
+        metavar="SIMULATION_ID",
+        help="Id of a simulation whose settings have been changed, it is "
+        "refetched regardless of its last sync. Can be repeated.",
+    ),
+    max_in_flight: int = typer.Option(
+        DEFAULT_MAX_IN_FLIGHT,
+        min=1,
+        help="Maximum number of concurrent requests."
+    ),
+):
+    """
+    Fetch the API V3 settings of new and stale simulations into the mirror
+    """
+    from threedi_settings.http.mirror import refresh_mirror
+
+    ids = list(simulation_ids or [])
+    if ids_file:
+        try:
+            ids.extend(read_simulation_ids(ids_file))
+        except ManifestError as err:
+            console.print(f"[bold red] {err}")
+            raise typer.Exit(1)
+    with SettingsMirror(mirror_file) as mirror:
+        summary = refresh_mirror(
+            mirror,
+            ids or mirror.simulation_ids,
+            max_age,
+            max_in_flight,
+            force,
+            dirty or [],
+        )
+    console.print(
+        f"[green] Fetched {len(summary.fetched)} simulations "
+        f"({len(summary.changed)} changed), skipped {len(summary.skipped)} "
+        f"up to date simulations"
+    )
+    if not summary.failures:
+        return
+    table = Table(title="Failed refreshes")
+    table.add_column("Simulation", style="cyan")
+    table.add_column("Error", style="red")
+    for simulation_id, error in sorted(summary.failures.items()):
+        table.add_row(str(simulation_id), error)
+    console.print(table)
+    raise typer.Exit(1)
+
+
+@mirror_app.command()
+def query(
+    mirror_file: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Sqlite file of the settings mirror.",
+    ),
+    criteria: List[str] = typer.Argument(
+        ...,
+        help="Conditions as FIELD=VALUE, e.g. time_integration_method=1",
+    ),
+):
+    """
+    List the mirrored simulations whose settings match all criteria
+    """
+    filters = {}
+    for criterion in criteria:
+        field_name, sep, value = criterion.partition("=")
+        if not sep:
+            console.print(f"[bold red] Expected FIELD=VALUE, got '{criterion}'")
+            raise typer.Exit(1)
+        filters[field_name.strip()] = value.strip()
+    with SettingsMirror(mirror_file) as mirror:
+        try:
+            simulation_ids = mirror.find(**filters)
+        except MirrorError as err:
+            console.print(f"[bold red] {err}")
+            raise typer.Exit(1)
+    for simulation_id in simulation_ids:
+        console.print(simulation_id)
+
+
+@mirror_app.callback()
+def main():
+    pass
+
+
+if __name__ == "__main__":
+    mirror_app()
@@ -0,0 +1,220 @@
+from collections import Counter
+import itertools
+from pathlib import Path
+
+from threedi_settings.http import DEFAULT_MAX_IN_FLIGHT
+from threedi_settings.manifest import read_manifest, ManifestError
+from threedi_settings.payloads import iter_payloads, read_ndjson, write_ndjson
+try:
+    import typer
+    from rich.console import Console
+    from rich.table import Table
+except ImportError:
+    raise ImportError(
+        "You need to install the extra 'cmd', e.g. pip install threedi-settings[cmd]"  # noqa
+    )
+
+payloads_app = typer.Typer()
+
+console = Console()
+
+
+@payloads_app.command()
+def convert(
+    manifest_file: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        writable=False,
+        resolve_path=True,
+        help="CSV or JSON manifest with the columns simulation_id, source, "
+        "settings_row (optional) and aggregation_file (optional).",
+    ),
+    output_file: Path = typer.Argument(
+        ...,
+        dir_okay=False,
+        resolve_path=True,
+        help="NDJSON file the payloads are written to.",
+    ),
+    gzip: bool = typer.Option(
+        False,
+        help="Compress the output file with gzip. Output files ending "
+        "on '.gz' are always compressed."
+    ),
+):
+    """
+    Convert legacy settings to API V3 payloads, without contacting the API
+    """
+    if gzip and output_file.suffix != ".gz":
+        output_file = output_file.with_name(f"{output_file.name}.gz")
+    errors = []
+    try:
+        count = write_ndjson(
+            iter_payloads(read_manifest(manifest_file), errors), output_file
+        )
+    except ManifestError as err:
+        console.print(f"[bold red] {err}")
+        raise typer.Exit(1)
+    console.print(f"[green] Wrote {count} payload records to {output_file}")
+    if not errors:
+        return
+    table = Table(title="Failed conversions")
+    table.add_column("Simulation", style="cyan")
+    table.add_column("Source", style="green")
+    table.add_column("Error", style="red")
+    for entry, error in errors:
+        table.add_row(str(entry.simulation_id), str(entry.source), error)
+    console.print(table)
+    raise typer.Exit(1)
+
+
+@payloads_app.command()
+def upload(
+    payload_file: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        writable=False,
+        resolve_path=True,
+        help="NDJSON payload file (optionally gzip compressed) as written "
+        "by the convert command.",
+    ),
+    results_file: Path = typer.Argument(
+        ...,
+        dir_okay=False,
+        resolve_path=True,
+        help="NDJSON file the created resource ids and failures are "
+        "written to.",
+    ),
+    max_in_flight: int = typer.Option(
+        DEFAULT_MAX_IN_FLIGHT,
+        min=1,
+        help="Maximum number of payload records uploaded concurrently."
+    ),
+    aggregation_workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of workers that upload the aggregation settings "
+        "per payload record."
+    ),
+    validate: bool = typer.Option(
+        True,
+        help="Reject payload records that violate the type, range or choice "
+        "constraints of the settings fields before uploading them."
+    ),
+    api_spec: bool = typer.Option(
+        False,
+        help="Validate against the (cached) API specification instead of "
+        "the settings definitions index shipped with the package."
+    ),
+    resume_from: Path = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        help="Results file of an earlier upload. Payloads it reports as "
+        "created are not sent again for the same simulation.",
+    ),
+):
+    """
+    Create API V3 settings resources from a payload file
+    """
+    # the API client is only needed (and installed) for uploads
+    from threedi_settings.http.upload import PayloadUploader, SentPayloads
+
+    if resume_from == results_file:
+        console.print("[bold red] The results file would overwrite --resume-from")
+        raise typer.Exit(1)
+    sent = SentPayloads.from_results(read_ndjson(resume_from)) if resume_from else None
+    records = read_ndjson(payload_file)
+    rejected = []
+    if validate:
+        records = _validator(api_spec).iter_valid(records, rejected)
+    uploader = PayloadUploader(records, max_in_flight, aggregation_workers, sent)
+    failed = 0
+    total = 0
+    skipped = 0
+
+    def results():
+        nonlocal failed, total, skipped
+        for result in uploader.iter_results():
+            total += 1
+            if not result.ok:
+                failed += 1
+            skipped += len(result.skipped)
+            yield result.as_dict()
+
+    def rejections():
+        for record, errors in rejected:
+            yield {
+                "simulation_id": record.get("simulation_id"),
+                "source": record.get("source"),
+                "errors": {
+                    "validation": [
+                        {
+                            "payload": error.payload,
+                            "field": error.field,
+                            "value": error.value,
+                            "message": error.message,
+                        }
+                        for error in errors
+                    ]
+                },
+            }
+
+    write_ndjson(itertools.chain(results(), rejections()), results_file)
+    console.print(
+        f"[green] Uploaded {total - failed} of {total} payload records, "
+        f"results written to {results_file}"
+    )
+    if skipped:
+        console.print(
+            f"[green] Skipped {skipped} payloads that had been sent before"
+        )
+    if rejected:
+        _print_rejections(rejected)
+    if failed:
+        console.print(f"[bold red] {failed} payload records failed")
+    if failed or rejected:
+        raise typer.Exit(1)
+
+
+def _validator(api_spec: bool):
+    from threedi_settings.validation import PayloadValidator
+
+    if not api_spec:
+        return PayloadValidator()
+    from threedi_settings.definitions import build_index
+    from threedi_settings.http.helpers import SwaggerSpecificationCode
+    from threedi_settings.http.spec_cache import SpecificationCache
+
+    code, definitions = SpecificationCache().definitions()
+    if code != SwaggerSpecificationCode.ok:
+        console.print(f"[red] Error: {definitions}")
+        raise typer.Exit(code)
+    return PayloadValidator(build_index(definitions))
+
+
+def _print_rejections(rejected):
+    counts = Counter(
+        (error.payload, error.field, error.message)
+        for _, errors in rejected
+        for error in errors
+    )
+    table = Table(title=f"{len(rejected)} payload records failed validation")
+    table.add_column("Payload", style="cyan")
+    table.add_column("Field", style="green")
+    table.add_column("Error", style="red")
+    table.add_column("Count", justify="right")
+    for (payload, field, message), count in counts.most_common():
+        table.add_row(payload, field, message, str(count))
+    console.print(table)
+
+
+@payloads_app.callback()
+def main():
+    pass
+
+
+if __name__ == "__main__":
+    payloads_app()
@@ -0,0 +1,210 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    msg = "You need to install the extra 'analysis' (e.g. 'pip install threedi-settings[analysis]') to be able to use the threedi-settings compare module"  # noqa
+    raise ImportError(msg)
+
+from threedi_settings.manifest import SOURCE_SUFFIXES
+from threedi_settings.mappings import numerical_settings_map, SettingsTables
+from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import SETTINGS_PAYLOADS, convert_settings
+from threedi_settings.threedimodel_config import (
+    ThreedimodelIni,
+    ThreedimodelSqlite,
+)
+
+logger = logging.getLogger(__name__)
+
+# API field name -> (payload key, API type)
+COMPARED_FIELDS = {
+    name: (key, api_info.type)
+    for key, (_, mapping) in SETTINGS_PAYLOADS.items()
+    for name, (_, api_info, _) in mapping.items()
+}
+
+
+@dataclass
+class FieldDeviation:
+    field: str
+    payload: str
+    reference: Any
+    count: int
+    # (<source label>, <value>) of the deviating sources
+    outliers: List[Tuple[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ComparisonReport:
+    labels: List[str]
+    deviations: List[FieldDeviation]
+    errors: Dict[str, str] = field(default_factory=dict)
+    deviating_sources: int = 0
+
+
+def default_reference() -> Dict[str, Any]:
+    """:returns the API defaults of the mapping module as reference"""
+    return {
+        name: api_info.default
+        for _, mapping in SETTINGS_PAYLOADS.values()
+        for name, (_, api_info, _) in mapping.items()
+    }
+
+
+def _flatten(settings: Dict, source_type: SourceTypes) -> Dict[str, Any]:
+    payloads = convert_settings(settings, source_type)
+    return {
+        name: value
+        for payload in payloads.values()
+        for name, value in payload.items()
+    }
+
+
+def _numerical_fields(numerical_columns: Iterable[str]) -> List[str]:
+    """:returns the API fields read from the v2_numerical_settings table"""
+    numerical_columns = set(numerical_columns)
+    return [
+        name
+        for name, (_, _, sqlite_info) in numerical_settings_map.items()
+        if sqlite_info.name in numerical_columns
+    ]
+
+
+def read_source(path: Path) -> Tuple[List[Tuple[str, Dict]], Optional[str]]:
+    """
+    Reads a legacy settings source and converts it to API field names. Every
+    global settings row of a sqlite file is a separate entry labelled
+    '<path>#<row id>'. The numerical fields of a row without numerical
+    settings are None, so they deviate from the reference.
+
+    :returns ([(<label>, {<API field name>: <value>}), ...], <error or None>)
+    """
+    try:
+        source_type = SOURCE_SUFFIXES[path.suffix.lower()]
+    except KeyError:
+        return [], f"Unknown source type {path.suffix}"
+    try:
+        if source_type == SourceTypes.ini_file:
+            settings = ThreedimodelIni(path).as_dict()
+            return [(str(path), _flatten(settings, source_type))], None
+        entries = []
+        with ThreedimodelSqlite(path) as tms:
+            numerical_columns = tms.table_schemas[SettingsTables.numerical_settings]
+            for row_id, settings in tms.iter_settings():
+                flat = _flatten(settings, source_type)
+                if all(settings[column] is None for column in numerical_columns):
+                    # the row has no numerical settings, which would be
+                    # converted to the API defaults
+                    flat.update(
+                        (name, None) for name in _numerical_fields(numerical_columns)
+                    )
+                entries.append((f"{path}#{row_id}", flat))
+        return entries, None
+    except Exception as err:
+        logger.debug("Could not read %s", path, exc_info=True)
+        return [], str(err)
+
+
+def compute_deviations(
+    labels: List[str],
+    values: np.ndarray,
+    reference: Dict[str, Any],
+    max_outliers: Optional[int] = None,
+) -> Tuple[List[FieldDeviation], int]:
+    """
+    Compares a matrix of settings values (one row per source, one column
+    per entry of `COMPARED_FIELDS`, missing values as NaN) with `reference`.
+
+    :returns (<the deviating fields, most deviations first>,
+        <the number of sources with at least one deviation>)
+    """
+    names = list(COMPARED_FIELDS)
+    expected = np.array(
+        [np.nan if reference.get(name) is None else reference[name] for name in names],
+        dtype=np.float64,
+    )
+    deviating = ~np.isclose(
+        values, expected, rtol=1e-9, atol=0.0, equal_nan=True
+    )
+    counts = deviating.sum(axis=0)
+    deviations = []
+    for column in np.flatnonzero(counts):
+        name = names[column]
+        payload, api_type = COMPARED_FIELDS[name]
+        rows = np.flatnonzero(deviating[:, column])[:max_outliers]
+        deviations.append(
+            FieldDeviation(
+                name,
+                payload,
+                reference.get(name),
+                int(counts[column]),
+                [(labels[row], _to_python(values[row, column], api_type)) for row in rows],
+            )
+        )
+    deviations.sort(key=lambda d: d.count, reverse=True)
+    return deviations, int(deviating.any(axis=1).sum())
+
+
+def _to_python(value: float, api_type: type) -> Any:
+    if np.isnan(value):
+        return None
+    return api_type(value)
+
+
+def compare_sources(
+    paths: Iterable[Path],
+    reference: Optional[Dict[str, Any]] = None,
+    workers: int = 4,
+    use_processes: bool = True,
+    max_outliers: Optional[int] = None,
+) -> ComparisonReport:
+    """
+    Reads the sources in parallel and compares their settings field by
+    field with `reference` (defaults to the API defaults).
+    """
+    reference = reference if reference is not None else default_reference()
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    paths = list(paths)
+    labels = []
+    rows = []
+    errors = {}
+    names = list(COMPARED_FIELDS)
+    with executor_class(max_workers=workers) as executor:
+        chunksize = max(1, len(paths) // (workers * 4)) if use_processes else 1
+        for path, (entries, error) in zip(
+            paths, executor.map(read_source, paths, chunksize=chunksize)
+        ):
+            if error:
+                errors[str(path)] = error
+            for label, settings in entries:
+                labels.append(label)
+                rows.append(
+                    [
+                        np.nan if settings.get(name) is None else settings[name]
+                        for name in names
+                    ]
+                )
+    values = np.array(rows, dtype=np.float64).reshape(len(rows), len(names))
+    deviations, deviating_sources = compute_deviations(
+        labels, values, reference, max_outliers
+    )
+    return ComparisonReport(labels, deviations, errors, deviating_sources)
+
+
+def read_reference(path: Path) -> Dict[str, Any]:
+    """
+    :returns the settings of the first entry of a source file, to be used
+        as reference
+    :raises ValueError if the file could not be read
+    """
+    entries, error = read_source(path)
+    if error or not entries:
+        raise ValueError(f"Could not read the reference {path}: {error}")
+    return entries[0][1]
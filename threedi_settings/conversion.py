@@ -0,0 +1,132 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+import logging
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from threedi_settings.models import SourceTypes
+
+logger = logging.getLogger(__name__)
+
+
+# API fields that are never populated from the legacy settings
+EXCLUDED_FIELDS = {"url", "id"}
+
+
+@dataclass(frozen=True)
+class ConversionStep:
+    """
+    Converts a single legacy settings value to its API counterpart.
+
+    A `source_key` of `None` marks the `simulation_id` field, which is not
+    part of the legacy settings.
+    """
+    api_name: str
+    source_key: Optional[str]
+    source_coercer: Optional[Callable]
+    api_coercer: Optional[Callable]
+    default: Any
+
+
+ConversionPlan = Tuple[ConversionStep, ...]
+
+# (key, id(mapping), source type, field names) -> (mapping, plan), the
+# mapping is kept to prevent its id from being reused
+_plans: Dict[Tuple, Tuple[Dict, ConversionPlan]] = {}
+
+
+def compile_plan(
+    mapping: Dict,
+    source_type: SourceTypes,
+    field_names: Optional[Iterable[str]] = None,
+) -> ConversionPlan:
+    """
+    Compiles the definitions in `mapping` for the given `source_type`
+    into a flat tuple of `ConversionStep`s.
+
+    :param field_names: the API fields to include, defaults to all
+        fields defined in `mapping`
+    :raises TypeError if the source type is neither ini nor sqlite
+    """
+    if source_type == SourceTypes.ini_file:
+        source_index = 0
+    elif source_type == SourceTypes.sqlite_file:
+        source_index = 2
+    else:
+        raise TypeError("input_type must be either ini or sqlite")
+
+    if field_names is None:
+        field_names = mapping.keys()
+    steps = []
+    for name in field_names:
+        if name.lower() in EXCLUDED_FIELDS:
+            continue
+        if name == "simulation_id":
+            steps.append(ConversionStep(name, None, None, None, None))
+            continue
+        field_info = mapping[name][source_index]
+        api_field_info = mapping[name][1]
+        api_coercer = None
+        if api_field_info.type != field_info.type:
+            api_coercer = api_field_info.type
+        steps.append(
+            ConversionStep(
+                name,
+                field_info.name,
+                field_info.type,
+                api_coercer,
+                api_field_info.default,
+            )
+        )
+    return tuple(steps)
+
+
+def get_conversion_plan(
+    key: Hashable,
+    mapping: Dict,
+    source_type: SourceTypes,
+    field_names: Optional[Iterable[str]] = None,
+) -> ConversionPlan:
+    """
+    Returns the conversion plan for (`key`, `mapping`, `source_type`,
+    `field_names`), the plan is compiled on first use only.
+
+    :param key: identifies the target of the plan, e.g. the OpenAPI model
+    """
+    if field_names is not None:
+        field_names = tuple(field_names)
+    cache_key = (key, id(mapping), source_type, field_names)
+    try:
+        return _plans[cache_key][1]
+    except KeyError:
+        plan = compile_plan(mapping, source_type, field_names)
+        _plans[cache_key] = (mapping, plan)
+        return plan
+
+
+def convert(
+    plan: ConversionPlan,
+    config_dict: Dict,
+    simulation_id: Optional[int] = None,
+) -> Dict:
+    """
+    Converts the settings stored in `config_dict` according to `plan`.
+    Values that cannot be converted are replaced by the API default.
+    """
+    data = {}
+    for step in plan:
+        if step.source_key is None:
+            data[step.api_name] = simulation_id
+            continue
+        value = config_dict[step.source_key]
+        try:
+            value = step.source_coercer(value)
+            if step.api_coercer is not None:
+                value = step.api_coercer(value)
+        except (ValueError, TypeError):
+            logger.info(
+                "Using default value %s for %s", step.default, step.api_name
+            )
+            value = step.default
+        data[step.api_name] = value
+    return data
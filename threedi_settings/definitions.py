@@ -0,0 +1,223 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import ast
+from fnmatch import fnmatchcase
+import functools
+import inspect
+import json
+from pathlib import Path
+import re
+from typing import Dict, List, Optional, Tuple
+
+from threedi_settings.mappings import swagger_definitions_map
+
+INDEX_FILE = Path(__file__).resolve().parent / "data" / "settings_definitions.json"
+
+# the field definition attributes kept in the index
+INDEX_ATTRIBUTES = (
+    "description", "type", "minimum", "maximum", "default", "enum", "nullable"
+)
+
+# swagger 2 marks nullable fields with a vendor extension
+SWAGGER_NULLABLE = "x-nullable"
+
+SWAGGER_TYPES = {
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    str: "string",
+}
+
+# openapi_types of the generated client models -> swagger type
+CLIENT_TYPES = {
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "str": "string",
+}
+
+# index attribute -> validation message of the generated client models
+CLIENT_CONSTRAINTS = {
+    "minimum": r"must be a value greater than or equal to `([^`]+)`",
+    "maximum": r"must be a value less than or equal to `([^`]+)`",
+}
+
+
+def build_index(swagger_definitions: Optional[Dict] = None) -> Dict:
+    """
+    Extracts the definitions of the settings fields from the `definitions`
+    section of the swagger specification. Fields (or attributes) missing
+    from the specification are completed with the type and default of the
+    API field info in the mapping module.
+
+    :returns {<swagger definition name>: {<field name>: <field definition>}}
+    """
+    swagger_definitions = swagger_definitions or {}
+    index = {}
+    for swagger_key, mapping in swagger_definitions_map.items():
+        properties = swagger_definitions.get(swagger_key, {}).get(
+            "properties", {}
+        )
+        fields = {}
+        for field_name, (_, api_field_info, _) in mapping.items():
+            field_def = {
+                "type": SWAGGER_TYPES.get(api_field_info.type),
+                "default": api_field_info.default,
+            }
+            field_def.update(properties.get(field_name, {}))
+            if SWAGGER_NULLABLE in field_def:
+                field_def["nullable"] = field_def.pop(SWAGGER_NULLABLE)
+            fields[field_name] = {
+                attr: field_def[attr]
+                for attr in INDEX_ATTRIBUTES
+                if field_def.get(attr) is not None
+            }
+        index[swagger_key] = fields
+    return index
+
+
+def _description(docstring: str) -> Optional[str]:
+    # the description is the paragraph between the summary and the
+    # :return: line of the generated getter docstring
+    lines = [
+        line.replace("# noqa: E501", "").strip()
+        for line in inspect.cleandoc(docstring).splitlines()[1:]
+    ]
+    description = []
+    for line in lines:
+        if line.startswith(":"):
+            break
+        if line:
+            description.append(line)
+    return " ".join(description) or None
+
+
+def _number(value: str):
+    return json.loads(value)
+
+
+def client_definitions() -> Dict:
+    """
+    Rebuilds the `definitions` section of the swagger specification from
+    the models of the installed threedi-api-client, which are generated
+    from it: the descriptions, types, minimums, maximums, enums and
+    nullability of the settings fields. Defaults are not part of the
+    generated models.
+    """
+    import openapi_client.models
+
+    definitions = {}
+    for swagger_key, mapping in swagger_definitions_map.items():
+        model = getattr(openapi_client.models, swagger_key)
+        properties = {}
+        for field_name, python_type in model.openapi_types.items():
+            prop = getattr(model, field_name)
+            setter = inspect.getsource(prop.fset)
+            field_def = {
+                "type": CLIENT_TYPES.get(python_type),
+                "description": _description(prop.fget.__doc__ or ""),
+                SWAGGER_NULLABLE: "must not be `None`" not in setter,
+            }
+            for attr, pattern in CLIENT_CONSTRAINTS.items():
+                match = re.search(pattern, setter)
+                if match:
+                    field_def[attr] = _number(match.group(1))
+            match = re.search(r"allowed_values = (\[.*?\])", setter)
+            if match:
+                field_def["enum"] = ast.literal_eval(match.group(1))
+            properties[field_name] = field_def
+        definitions[swagger_key] = {"properties": properties}
+    return definitions
+
+
+def write_index(index: Dict, path: Path = INDEX_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+class SettingsDefinitionsIndex:
+    """
+    Field name based access to the settings definitions index.
+    """
+
+    def __init__(self, index: Dict):
+        self.index = index
+        self._fields: Dict[str, List[Tuple[str, Dict]]] = {}
+        for swagger_key, fields in index.items():
+            for field_name, field_def in fields.items():
+                self._fields.setdefault(field_name, []).append(
+                    (swagger_key, field_def)
+                )
+
+    @classmethod
+    def from_file(cls, path: Path = INDEX_FILE) -> "SettingsDefinitionsIndex":
+        with path.open("r") as f:
+            return cls(json.load(f))
+
+    @property
+    def field_names(self) -> List[str]:
+        return sorted(self._fields)
+
+    def lookup(self, field_name: str) -> List[Tuple[str, Dict]]:
+        """
+        :returns [(<swagger definition name>, <field definition>), ...]
+            of the fields with the exact name `field_name`
+        """
+        return self._fields.get(field_name, [])
+
+    def search(self, pattern: str) -> Dict[str, Dict[str, Dict]]:
+        """
+        Finds the fields whose name matches the glob `pattern` or, if
+        the pattern contains no wildcards, contains it.
+
+        :returns the matching part of the index
+        """
+        if not any(char in pattern for char in "*?["):
+            pattern = f"*{pattern}*"
+        result = {}
+        for field_name, entries in self._fields.items():
+            if not fnmatchcase(field_name, pattern):
+                continue
+            for swagger_key, field_def in entries:
+                result.setdefault(swagger_key, {})[field_name] = field_def
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def bundled_index() -> SettingsDefinitionsIndex:
+    """:returns the index shipped with the package"""
+    return SettingsDefinitionsIndex.from_file(INDEX_FILE)
+
+
+def main():
+    """
+    Refreshes the bundled index from the API specification. Use
+    `--from-client` to read the specification from the models of the
+    installed threedi-api-client instead, or `--offline` to build the
+    index from the mapping module only.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--offline", action="store_true")
+    parser.add_argument("--from-client", action="store_true")
+    parser.add_argument("--output", type=Path, default=INDEX_FILE)
+    args = parser.parse_args()
+
+    definitions = None
+    if args.from_client:
+        definitions = client_definitions()
+    elif not args.offline:
+        from threedi_settings.http.helpers import SwaggerSpecificationCode
+        from threedi_settings.http.spec_cache import SpecificationCache
+
+        code, definitions = SpecificationCache().definitions(refresh=True)
+        if code != SwaggerSpecificationCode.ok:
+            raise SystemExit(f"Could not fetch the API specification: {definitions}")
+    write_index(build_index(definitions), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from collections import Counter
+from dataclasses import dataclass, field
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from threedi_settings.mappings import aggregation_settings_map
+from threedi_settings.payloads import AGGREGATION_PAYLOAD, SETTINGS_PAYLOADS
+
+
+def values_differ(remote: Any, local: Any) -> bool:
+    if isinstance(remote, float) or isinstance(local, float):
+        try:
+            return not math.isclose(remote, local, rel_tol=1e-9, abs_tol=0.0)
+        except TypeError:
+            pass
+    return remote != local
+
+
+def diff_payload(mapping: Dict, remote, payload: Dict) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Compares a payload field by field with the corresponding settings
+    dataclass instance (e.g. a `NumericalConfig`).
+
+    :returns {<field name>: (<remote value>, <local value>)} of all fields
+        that differ
+    """
+    differences = {}
+    for name in mapping:
+        if name not in payload:
+            continue
+        remote_value = getattr(remote, name, None)
+        if values_differ(remote_value, payload[name]):
+            differences[name] = (remote_value, payload[name])
+    return differences
+
+
+def _aggregation_key(d) -> Tuple:
+    values = []
+    for name, (_, api_field_info, _) in aggregation_settings_map.items():
+        value = d[name] if isinstance(d, dict) else getattr(d, name)
+        try:
+            value = api_field_info.type(value)
+        except (ValueError, TypeError):
+            pass
+        values.append(value)
+    return tuple(values)
+
+
+@dataclass
+class SettingsDiff:
+    """differences between the API settings and local payloads"""
+
+    # payload key -> None if the resource does not exist, else the
+    # differing fields
+    settings: Dict[str, Optional[Dict[str, Tuple[Any, Any]]]] = field(
+        default_factory=dict
+    )
+    # aggregation payloads that do not exist in the API
+    missing_aggregations: List[Dict] = field(default_factory=list)
+    # number of aggregation settings in the API not present locally
+    extra_aggregations: int = 0
+
+    @property
+    def changed(self) -> List[str]:
+        """:returns the payload keys of the resources that need a write"""
+        keys = [key for key, diff in self.settings.items() if diff != {}]
+        if self.missing_aggregations:
+            keys.append(AGGREGATION_PAYLOAD)
+        return keys
+
+
+def diff_overview(overview: Any, payloads: Dict) -> SettingsDiff:
+    """
+    Diffs the settings overview of a simulation, as returned by
+    `OpenAPISimulationSettings.retrieve`, with local payloads as created by
+    `threedi_settings.payloads.convert_settings`, optionally with an
+    `aggregation_settings` list.
+
+    Every resource is diffed on its own: a resource that does not exist
+    in the API is reported missing, the others are compared field by field.
+    Aggregation settings are compared as a multiset of
+    (flow_variable, method, interval).
+    """
+    result = SettingsDiff()
+    for key, (_, mapping) in SETTINGS_PAYLOADS.items():
+        if key not in payloads:
+            continue
+        remote = getattr(overview, key, None)
+        if remote is None:
+            result.settings[key] = None
+            continue
+        result.settings[key] = diff_payload(mapping, remote, payloads[key])
+
+    local_aggregations = payloads.get(AGGREGATION_PAYLOAD) or []
+    remote_aggregations = getattr(overview, AGGREGATION_PAYLOAD, None) or []
+    remaining = Counter(_aggregation_key(a) for a in remote_aggregations)
+    for payload in local_aggregations:
+        key = _aggregation_key(payload)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            continue
+        result.missing_aggregations.append(payload)
+    result.extra_aggregations = sum(remaining.values())
+    return result
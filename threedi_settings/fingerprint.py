@@ -0,0 +1,41 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from enum import Enum
+import hashlib
+import json
+from pathlib import PurePath
+from typing import Any
+
+
+def _normalize(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {str(key): _normalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(value) for value in obj]
+    if isinstance(obj, Enum):
+        return _normalize(obj.value)
+    if isinstance(obj, PurePath):
+        return obj.as_posix()
+    if isinstance(obj, float) and obj == 0.0:
+        # -0.0 == 0.0, but their representations differ
+        return 0.0
+    return obj
+
+
+def canonical_json(obj: Any) -> str:
+    """
+    :returns a JSON representation of `obj` that does not depend on the
+        order of dictionary keys
+    """
+    return json.dumps(
+        _normalize(obj),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def fingerprint(obj: Any) -> str:
+    """:returns a stable hash over the canonical JSON representation of `obj`"""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
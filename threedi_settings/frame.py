@@ -0,0 +1,260 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    msg = "You need to install the extra 'analysis' (e.g. 'pip install threedi-settings[analysis]') to be able to use the threedi-settings frame module"  # noqa
+    raise ImportError(msg)
+
+from threedi_settings.mirror import MIRROR_TABLES, SettingsMirror
+from threedi_settings.models import SimulationConfig, field_types
+
+NUMPY_TYPES = {
+    int: np.int32,
+    float: np.float64,
+    bool: np.bool_,
+}
+
+# column name -> (SimulationConfig attribute, numpy dtype)
+FRAME_COLUMNS = {
+    name: (attr_name, NUMPY_TYPES[field_type])
+    for attr_name, (_, model) in MIRROR_TABLES.items()
+    for name, field_type in field_types(model).items()
+}
+
+
+def _column(values: Sequence, dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """:returns (<values>, <validity mask>) of a column that may contain
+    None, missing values are stored as 0 (False)"""
+    valid = np.array([value is not None for value in values], dtype=bool)
+    array = np.array(
+        [0 if value is None else value for value in values], dtype=dtype
+    )
+    return array, valid
+
+
+class SettingsFrame:
+    """
+    Columnar container of the physical, time step and numerical settings
+    of many simulations. Every settings field is held as a typed numpy
+    array, rows are simulations.
+
+    Aggregation settings are not part of the frame, `to_config` returns
+    configs without them.
+
+    Fields can be None (e.g. `time_integration_method`). Every column has
+    a validity mask in `valid`, missing values are stored as 0 (False) in
+    the column itself and are None again in `to_config`.
+    """
+
+    def __init__(
+        self,
+        simulation_ids: np.ndarray,
+        uids: np.ndarray,
+        columns: Dict[str, Sequence],
+        valid: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        :param columns: the values of the settings fields, None for missing
+            values unless their validity mask is given in `valid`
+        """
+        missing = set(FRAME_COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+        valid = valid or {}
+        self.simulation_ids = np.asarray(simulation_ids, dtype=np.int64)
+        self.uids = np.asarray(uids, dtype=str)
+        self.columns = {}
+        self.valid = {}
+        for name, (_, dtype) in FRAME_COLUMNS.items():
+            if name in valid:
+                self.columns[name] = np.asarray(columns[name], dtype=dtype)
+                self.valid[name] = np.asarray(valid[name], dtype=bool)
+            else:
+                self.columns[name], self.valid[name] = _column(
+                    columns[name], dtype
+                )
+            if not (
+                len(self.columns[name])
+                == len(self.valid[name])
+                == len(self.simulation_ids)
+            ):
+                raise ValueError(f"Column {name} has a different length")
+
+    @classmethod
+    def from_configs(
+        cls,
+        configs: Iterable[SimulationConfig],
+        simulation_ids: Optional[Iterable[int]] = None,
+    ) -> "SettingsFrame":
+        """
+        Builds the frame from `SimulationConfig` instances.
+
+        :param simulation_ids: the simulation ids of the configs, read from
+            their `sim_uid` if not given
+        :raises ValueError if the `sim_uid` of a config is not a simulation
+            id, e.g. empty
+        """
+        configs = list(configs)
+        if simulation_ids is None:
+            simulation_ids = []
+            for config in configs:
+                try:
+                    simulation_ids.append(int(config.sim_uid))
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        f"Config {config.uid} has no simulation id "
+                        f"(sim_uid {config.sim_uid!r}), pass simulation_ids"
+                    )
+        uids = []
+        values = {name: [] for name in FRAME_COLUMNS}
+        for config in configs:
+            uids.append(config.uid)
+            for name, (attr_name, _) in FRAME_COLUMNS.items():
+                values[name].append(getattr(getattr(config, attr_name), name))
+        return cls(list(simulation_ids), uids, values)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Sequence], names: Sequence[str]
+    ) -> "SettingsFrame":
+        """
+        Builds the frame from database rows. `names` are the column names
+        of the rows and must contain 'simulation_id', 'uid' and all
+        settings fields.
+        """
+        unknown = set(names) - {"simulation_id", "uid", *FRAME_COLUMNS}
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        values = [list(column) for column in zip(*rows)] or [[] for _ in names]
+        records = dict(zip(names, values))
+        columns = {name: records[name] for name in FRAME_COLUMNS if name in names}
+        return cls(records["simulation_id"], records["uid"], columns)
+
+    @classmethod
+    def from_mirror(cls, mirror: SettingsMirror) -> "SettingsFrame":
+        """builds the frame from all simulations in a `SettingsMirror`"""
+        selects = ["s.simulation_id", "s.uid"]
+        joins = []
+        for i, (attr_name, (table, _)) in enumerate(MIRROR_TABLES.items()):
+            selects.extend(
+                f"t{i}.{name}"
+                for name, (column_attr, _) in FRAME_COLUMNS.items()
+                if column_attr == attr_name
+            )
+            joins.append(f"JOIN {table} t{i} USING (simulation_id)")
+        cursor = mirror.connection.execute(
+            f"SELECT {', '.join(selects)} FROM simulations s "
+            f"{' '.join(joins)} ORDER BY s.simulation_id"
+        )
+        names = [description[0] for description in cursor.description]
+        return cls.from_rows(cursor, names)
+
+    def __len__(self) -> int:
+        return len(self.simulation_ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.simulation_ids.nbytes
+            + self.uids.nbytes
+            + sum(values.nbytes for values in self.columns.values())
+            + sum(valid.nbytes for valid in self.valid.values())
+        )
+
+    def mask(self, **criteria) -> np.ndarray:
+        """:returns the boolean mask of the rows where all fields equal
+        the given values, e.g. ``mask(time_integration_method=1)``. None
+        selects the rows where the field is missing."""
+        result = np.ones(len(self), dtype=bool)
+        for name, value in criteria.items():
+            if value is None:
+                result &= ~self.valid[name]
+                continue
+            result &= (self.columns[name] == value) & self.valid[name]
+        return result
+
+    def filter(self, mask: np.ndarray) -> "SettingsFrame":
+        """:returns a new frame of the rows selected by `mask`, a boolean
+        mask or an array of row indices"""
+        return SettingsFrame(
+            self.simulation_ids[mask],
+            self.uids[mask],
+            {name: values[mask] for name, values in self.columns.items()},
+            {name: valid[mask] for name, valid in self.valid.items()},
+        )
+
+    def where(self, **criteria) -> "SettingsFrame":
+        return self.filter(self.mask(**criteria))
+
+    def groupby(self, *names: str) -> Dict[Any, np.ndarray]:
+        """
+        Groups the rows by the values of the fields `names`.
+
+        :returns {<value (tuple of values for multiple fields)>:
+            <row indices>}, missing values are grouped under None
+        """
+        if not names:
+            raise ValueError("Specify at least one field to group by")
+        arrays = []
+        for name in names:
+            arrays.extend([self.valid[name], self.columns[name]])
+        keys = np.rec.fromarrays(arrays)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse, minlength=len(unique)))[:-1]
+        groups = {}
+        for key, indices in zip(unique.tolist(), np.split(order, splits)):
+            key = tuple(
+                value if valid else None
+                for valid, value in zip(key[::2], key[1::2])
+            )
+            groups[key[0] if len(names) == 1 else key] = indices
+        return groups
+
+    def value_counts(self, name: str) -> Dict[Any, int]:
+        """:returns {<value>: <number of rows>}, None for missing values"""
+        valid = self.valid[name]
+        values, counts = np.unique(self.columns[name][valid], return_counts=True)
+        result = dict(zip(values.tolist(), counts.tolist()))
+        missing = len(valid) - int(np.count_nonzero(valid))
+        if missing:
+            result[None] = missing
+        return result
+
+    def to_config(self, row: int) -> SimulationConfig:
+        """converts a row back to a `SimulationConfig` (without aggregation
+        settings)"""
+        uid = str(self.uids[row])
+        sim_uid = str(self.simulation_ids[row])
+        configs = {}
+        for attr_name, (_, model) in MIRROR_TABLES.items():
+            configs[attr_name] = model(
+                uid=uid,
+                sim_uid=sim_uid,
+                **{
+                    name: self.columns[name][row].item()
+                    if self.valid[name][row]
+                    else None
+                    for name in field_types(model)
+                },
+            )
+        return SimulationConfig(uid=uid, sim_uid=sim_uid, **configs)
+
+    def iter_configs(self, rows: Optional[Iterable[int]] = None) -> Iterator[SimulationConfig]:
+        rows = range(len(self)) if rows is None else rows
+        for row in rows:
+            yield self.to_config(row)
+
+    def row_of(self, simulation_id: int) -> int:
+        """:raises KeyError if the simulation is not in the frame"""
+        rows: List[int] = np.flatnonzero(self.simulation_ids == simulation_id).tolist()
+        if not rows:
+            raise KeyError(simulation_id)
+        return rows[0]
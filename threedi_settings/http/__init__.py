@@ -7,4 +7,16 @@ api_config = {
     "API_PASSWORD": os.environ.get("API_PASSWORD"),
 }
 
+# Defaults of the concurrent and bulk operations. They are defined here,
+# so the command line interface can use them without importing the
+# threedi-api-client.
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_AGGREGATION_WORKERS = 8
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_PULL_WRITERS = 2
 
+# Settings overviews are cached per (host, simulation id), see
+# `threedi_settings.http.cache`.
+DEFAULT_OVERVIEW_CACHE_SIZE = 1024
+DEFAULT_OVERVIEW_CACHE_TTL = 30.0
@@ -2,8 +2,12 @@
 # -*- coding: utf-8 -*-
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import hashlib
 import logging
-from typing import Dict, List, Optional, Union
+import threading
+from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import unquote, urlparse
 from pathlib import PurePosixPath
 
@@ -27,6 +31,7 @@ from threedi_settings.mappings import (
     numerical_settings_map,
     aggregation_settings_map,
 )
+from threedi_settings.conversion import convert, get_conversion_plan
 from threedi_settings.models import (
     NumericalConfig,
     TimeStepConfig,
@@ -35,7 +40,8 @@ from threedi_settings.models import (
     SimulationConfig,
     SourceTypes,
 )
-from . import api_config
+from . import api_config, DEFAULT_AGGREGATION_WORKERS
+from .cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -47,14 +53,67 @@ OpenApiSettingsModel = Union[
 ]
 
 
+_api_clients: Dict[Tuple[str, str, str], ThreediApiClient] = {}
+_api_clients_lock = threading.Lock()
+
+
+def _api_client_key(config: Dict) -> Tuple[str, str, str]:
+    password = config.get("API_PASSWORD") or ""
+    return (
+        config.get("API_HOST"),
+        config.get("API_USERNAME"),
+        hashlib.sha256(password.encode()).hexdigest(),
+    )
+
+
+def get_api_client(config: Optional[Dict] = None) -> ThreediApiClient:
+    """
+    Returns the process wide API client for the host and credentials
+    in `config` (defaults to `api_config`), creating it on first use.
+
+    Sharing the client means sharing its connection pool and its access
+    token. The token is refreshed by the client only once it has expired.
+    """
+    config = config or api_config
+    key = _api_client_key(config)
+    with _api_clients_lock:
+        try:
+            return _api_clients[key]
+        except KeyError:
+            client = ThreediApiClient(config=config)
+            _api_clients[key] = client
+            return client
+
+
+def clear_api_clients():
+    """closes and forgets all shared API clients"""
+    with _api_clients_lock:
+        for client in _api_clients.values():
+            client.close()
+        _api_clients.clear()
+
+
+# Shared cache of the settings overviews, keyed by (host, simulation id).
+# Adjust `maxsize` and `ttl` to tune it, `stats()` returns the hit and
+# miss counters.
+overview_cache = TTLCache()
+
+
 class OpenApiSimulationClient:
     """
     Interface to the threedi-api-client.
     """
     def __init__(self, simulation_id: int):
         self.simulation_id = simulation_id
-        _api_client = ThreediApiClient(config=api_config)
-        self.api_client = SimulationsApi(_api_client)
+        self.api_client = SimulationsApi(get_api_client())
+
+    @property
+    def overview_key(self) -> Tuple[str, int]:
+        return api_config.get("API_HOST"), self.simulation_id
+
+    def invalidate_overview(self):
+        """drops the cached settings overview of the simulation"""
+        overview_cache.invalidate(self.overview_key)
 
 
 class BaseOpenAPI(ABC, OpenApiSimulationClient):
@@ -73,47 +132,39 @@ class BaseOpenAPI(ABC, OpenApiSimulationClient):
         self.mapping = mapping
         self._instance: OpenApiSettingsModel = None
         self.source_type = source_type
+        self.create_error: Optional[str] = None
+        self.update_error: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, simulation_id: int, payload: Dict) -> "BaseOpenAPI":
+        """
+        Returns a client for an already converted payload, e.g. one read
+        from a payload file.
+        """
+        client = cls(simulation_id, {}, SourceTypes.ini_file)
+        client._instance = client.model(simulation_id=simulation_id, **payload)
+        return client
 
     @property
     def instance(self) -> OpenApiSettingsModel:
         """
         Converts the settings stored in `config_dict` conform the definitions
         in `mapping` and returns a populated `OpenApiSettingsModel` instance.
+
+        The conversion plan is compiled once per (model, source type) pair,
+        the converted instance is memoized.
         """
-        data = {}
-        exclude = {
-            "url",
-            "id",
-        }
-        for name in self.model.openapi_types.keys():
-            if name.lower() in exclude:
-                continue
-            if name == "simulation_id":
-                data[name] = self.simulation_id
-                continue
-            ini_field_info, api_field_info, sqlite_field_info = self.mapping[name]
-            if self.source_type == SourceTypes.ini_file:
-                field_info = ini_field_info
-            elif self.source_type == SourceTypes.sqlite_file:
-                field_info = sqlite_field_info
-            else:
-                raise TypeError("input_type must be either ini or sqlite")
-            value = self.config_dict[field_info.name]
-            try:
-                value = field_info.type(value)
-                if api_field_info.type != field_info.type:
-                    try:
-                        value = api_field_info.type(value)
-                    except Exception:
-                        raise
-            except (ValueError, TypeError) as err:
-                logger.info(
-                    "Using default value %s for %s",
-                    api_field_info.default, name
-                )
-                value = api_field_info.default
-            data[name] = value
-        return self.model(**data)
+        if self._instance is not None:
+            return self._instance
+        plan = get_conversion_plan(
+            self.model,
+            self.mapping,
+            self.source_type,
+            self.model.openapi_types.keys(),
+        )
+        data = convert(plan, self.config_dict, self.simulation_id)
+        self._instance = self.model(**data)
+        return self._instance
 
     @property
     @abstractmethod
@@ -134,7 +185,12 @@ class BaseOpenAPI(ABC, OpenApiSimulationClient):
             )
 
     def create(self) -> Optional[OpenApiSettingsModel]:
+        """
+        :returns `None` if the resource could not be created, the server
+        response is stored in `create_error` in that case
+        """
         create = self._create_method()
+        self.create_error = None
         try:
             resp = create(self.simulation_id, self.instance)
         except ApiException as err:
@@ -143,7 +199,10 @@ class BaseOpenAPI(ABC, OpenApiSimulationClient):
                 self.model.__name__,
                 err,
             )
+            self.create_error = str(err)
             return
+        finally:
+            self.invalidate_overview()
         logger.info(
             "Successfully created resource %s. Server response: %s ",
             self.model.__name__,
@@ -151,6 +210,52 @@ class BaseOpenAPI(ABC, OpenApiSimulationClient):
         )
         return resp
 
+    @property
+    @abstractmethod
+    def update_method_name(self) -> str:
+        """name of the openapi client method to update a resource"""
+        ...
+
+    def _update_method(self):
+        """
+        :returns update method
+        :raises AttributeError if the update_method_name is not known
+        """
+        try:
+            return getattr(self.api_client, self.update_method_name)
+        except AttributeError:
+            raise AttributeError(
+                f"Update method '{self.update_method_name}' unknown"
+            )
+
+    def update(self) -> Optional[OpenApiSettingsModel]:
+        """
+        Updates the existing resource with the settings of `instance`.
+
+        :returns `None` if the resource could not be updated, the server
+        response is stored in `update_error` in that case
+        """
+        update = self._update_method()
+        self.update_error = None
+        try:
+            resp = update(self.simulation_id, self.instance)
+        except ApiException as err:
+            logger.error(
+                "Could not update resource %s. Server response: %s",
+                self.model.__name__,
+                err,
+            )
+            self.update_error = str(err)
+            return
+        finally:
+            self.invalidate_overview()
+        logger.info(
+            "Successfully updated resource %s. Server response: %s ",
+            self.model.__name__,
+            resp,
+        )
+        return resp
+
 
 class OpenAPIPhysicalSettings(BaseOpenAPI):
     def __init__(self, simulation_id: int, config: Dict, settings_source: SourceTypes):
@@ -162,6 +267,10 @@ class OpenAPIPhysicalSettings(BaseOpenAPI):
     def create_method_name(self):
         return "simulations_settings_physical_create"
 
+    @property
+    def update_method_name(self) -> str:
+        return "simulations_settings_physical_partial_update"
+
 
 class OpenAPITimeStepSettings(BaseOpenAPI):
     def __init__(self, simulation_id: int, config: Dict, settings_source: SourceTypes):
@@ -173,6 +282,10 @@ class OpenAPITimeStepSettings(BaseOpenAPI):
     def create_method_name(self) -> str:
         return "simulations_settings_time_step_create"
 
+    @property
+    def update_method_name(self) -> str:
+        return "simulations_settings_time_step_partial_update"
+
 
 class OpenAPINumericalSettings(BaseOpenAPI):
     def __init__(self, simulation_id: int, config: Dict, settings_source: SourceTypes):
@@ -184,6 +297,24 @@ class OpenAPINumericalSettings(BaseOpenAPI):
     def create_method_name(self) -> str:
         return "simulations_settings_numerical_create"
 
+    @property
+    def update_method_name(self) -> str:
+        return "simulations_settings_numerical_partial_update"
+
+
+@dataclass
+class AggregationCreateResult:
+    """outcome of creating a single aggregation settings resource"""
+
+    index: int
+    instance: AggregationSettings
+    response: Optional[AggregationSettings] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class OpenAPIAggregationSettings(OpenApiSimulationClient):
     def __init__(self, simulation_id: int, config: Dict):
@@ -193,6 +324,20 @@ class OpenAPIAggregationSettings(OpenApiSimulationClient):
         self.mapping = aggregation_settings_map
         self._instances = []
 
+    @classmethod
+    def from_payloads(
+        cls, simulation_id: int, payloads: List[Dict]
+    ) -> "OpenAPIAggregationSettings":
+        """
+        Returns a client for already converted payloads, e.g. read
+        from a payload file.
+        """
+        client = cls(simulation_id, {})
+        client._instances = [
+            client.model(**payload) for payload in payloads
+        ]
+        return client
+
     @property
     def create_method_name(self) -> str:
         return "simulations_settings_aggregation_create"
@@ -219,46 +364,111 @@ class OpenAPIAggregationSettings(OpenApiSimulationClient):
             self._instances.append(self.model(**data))
         return self._instances
 
-    def create(self) -> List[AggregationSettings]:
+    def _create_method(self):
+        """
+        :returns create method
+        :raises AttributeError if the create_method_name is not known
+        """
         try:
-            create = getattr(self.api_client, self.create_method_name)
+            return getattr(self.api_client, self.create_method_name)
         except AttributeError:
             raise AttributeError(
                 f"Create method '{self.create_method_name}' unknown"
             )
-        responses = []
-        for instance in self.instances:
-            try:
-                resp = create(self.simulation_id, instance)
-            except ApiException as err:
-                logger.error(
-                    "Could not create resource %s. Server response: %s",
-                    self.model.__name__,
-                    err,
-                )
-                continue
-            logger.info(
-                "Successfully created resource %s. Server response: %s ",
+
+    def _create_instance(
+        self, create, index: int, instance: AggregationSettings
+    ) -> AggregationCreateResult:
+        try:
+            resp = create(self.simulation_id, instance)
+        except ApiException as err:
+            logger.error(
+                "Could not create resource %s. Server response: %s",
                 self.model.__name__,
-                resp,
+                err,
             )
-            responses.append(resp)
+            return AggregationCreateResult(index, instance, error=str(err))
+        finally:
+            self.invalidate_overview()
+        logger.info(
+            "Successfully created resource %s. Server response: %s ",
+            self.model.__name__,
+            resp,
+        )
+        return AggregationCreateResult(index, instance, response=resp)
+
+    def create(self) -> List[AggregationSettings]:
+        create = self._create_method()
+        responses = []
+        for index, instance in enumerate(self.instances):
+            result = self._create_instance(create, index, instance)
+            if result.ok:
+                responses.append(result.response)
         return responses
 
+    def bulk_create(
+        self, max_workers: int = DEFAULT_AGGREGATION_WORKERS
+    ) -> List[AggregationCreateResult]:
+        """
+        Creates the aggregation settings resources through a pool of
+        `max_workers` threads.
+
+        :returns a result for every entry of `instances`, in the same order
+        """
+        create = self._create_method()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._create_instance, create, index, instance)
+                for index, instance in enumerate(self.instances)
+            ]
+            return [future.result() for future in futures]
+
+
+def settings_overview_from_responses(
+    physical_settings: Optional[PhysicalSettings],
+    time_step_settings: Optional[TimeStepSettings],
+    numerical_settings: Optional[NumericalSettings],
+    aggregation_settings: List[AggregationSettings],
+) -> Optional[SimulationSettingsOverview]:
+    """
+    Builds the settings overview from the create responses, saving
+    the request to the overview endpoint.
+
+    :returns `None` if any of the settings resources has not been created
+    """
+    if not all((physical_settings, time_step_settings, numerical_settings)):
+        return
+    return SimulationSettingsOverview(
+        physical_settings=physical_settings,
+        time_step_settings=time_step_settings,
+        numerical_settings=numerical_settings,
+        aggregation_settings=aggregation_settings,
+    )
+
 
 class OpenAPISimulationSettings(OpenApiSimulationClient):
     def __init__(self, simulation_id):
         super().__init__(simulation_id)
         self._simulation_config = None
+        self.retrieve_error: Optional[str] = None
 
-    def retrieve(self) -> Optional[SimulationSettingsOverview]:
+    def retrieve(self, use_cache: bool = True) -> Optional[SimulationSettingsOverview]:
         """
         get the simulation settings from the 3Di API V3
 
-        :returns `None` if any ApiException has been raised
+        Overviews are served from the shared `overview_cache` if possible.
+        The cached overview is shared between callers, do not modify it.
+
+        :returns `None` if any ApiException has been raised, the server
+        response is stored in `retrieve_error` in that case
         """
+        self.retrieve_error = None
+        if use_cache:
+            resp = overview_cache.get(self.overview_key)
+            if resp is not None:
+                return resp
         try:
-            return self.api_client.simulations_settings_overview(
+            resp = self.api_client.simulations_settings_overview(
                 self.simulation_id
             )
         except ApiException as err:
@@ -268,7 +478,10 @@ class OpenAPISimulationSettings(OpenApiSimulationClient):
                 self.simulation_id,
                 err,
             )
+            self.retrieve_error = str(err)
             return
+        overview_cache.set(self.overview_key, resp)
+        return resp
 
     @property
     def simulation_config(self) -> Optional[SimulationConfig]:
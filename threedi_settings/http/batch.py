@@ -0,0 +1,187 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from concurrent.futures import (
+    as_completed,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Iterable, Iterator, List, Optional
+
+from threedi_settings.http import DEFAULT_BATCH_WORKERS
+from threedi_settings.http.export import ConcurrentExporter
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.payloads import ConversionMemo, settings_fingerprint
+from threedi_settings.state import ExportState, input_stamp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """outcome of exporting a single manifest entry"""
+
+    entry: ManifestEntry
+    error: Optional[str] = None
+    duration: float = 0.0
+    # the entry has not been exported, its inputs did not change
+    skipped: bool = False
+    fingerprint: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    results: List[BatchResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def failures(self) -> List[BatchResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def skipped(self) -> List[BatchResult]:
+        return [result for result in self.results if result.skipped]
+
+    @property
+    def throughput(self) -> float:
+        """exported entries per second"""
+        if not self.elapsed:
+            return 0.0
+        return len(self.results) / self.elapsed
+
+
+def export_entry(
+    entry: ManifestEntry,
+    max_concurrency: int = 1,
+    aggregation_workers: int = 1,
+    known_fingerprint: Optional[str] = None,
+) -> BatchResult:
+    """
+    Exports the settings of a single manifest entry. Errors are
+    not raised but reported through the result.
+
+    :param known_fingerprint: settings fingerprint of the last export, the
+        entry is skipped if its settings still have this fingerprint
+    """
+    start = time.monotonic()
+    try:
+        settings, aggregations = entry.load()
+        fingerprint = settings_fingerprint(
+            ConversionMemo().convert(settings, aggregations, entry.source_type)
+        )
+        if fingerprint == known_fingerprint:
+            return BatchResult(
+                entry,
+                duration=time.monotonic() - start,
+                skipped=True,
+                fingerprint=fingerprint,
+            )
+        exporter = ConcurrentExporter(
+            entry.simulation_id,
+            entry.source_type,
+            settings,
+            aggregations,
+            max_concurrency,
+            aggregation_workers,
+        )
+        overview = exporter.run()
+    except Exception as err:
+        logger.exception("Failed to export %s", entry.source)
+        return BatchResult(entry, str(err), time.monotonic() - start)
+    error = None
+    if overview is None:
+        error = "Not all settings resources could be created"
+    else:
+        failed = [r for r in exporter.aggregation_results if not r.ok]
+        if failed:
+            error = f"{len(failed)} aggregation settings could not be created"
+    return BatchResult(
+        entry, error, time.monotonic() - start, fingerprint=fingerprint
+    )
+
+
+class BatchExporter:
+    """
+    Exports the settings of many manifest entries through a pool of
+    workers. Thread workers share the process wide API client, every
+    process worker creates its own one on first use.
+
+    With a `state`, entries whose inputs did not change since their last
+    successful export are skipped (unless `force` is set) and successful
+    exports are recorded. The state is only accessed from the thread
+    iterating over the results.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[ManifestEntry],
+        workers: int = DEFAULT_BATCH_WORKERS,
+        use_processes: bool = False,
+        max_concurrency: int = 1,
+        aggregation_workers: int = 1,
+        state: Optional[ExportState] = None,
+        force: bool = False,
+    ):
+        self.entries = list(entries)
+        self.workers = workers
+        self.use_processes = use_processes
+        self.max_concurrency = max_concurrency
+        self.aggregation_workers = aggregation_workers
+        self.state = state
+        self.force = force
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def iter_results(self) -> Iterator[BatchResult]:
+        """yields the results in order of completion"""
+        with self._executor() as executor:
+            stamps = {}
+            for entry in self.entries:
+                known_fingerprint = None
+                stamp = None
+                if self.state is not None:
+                    try:
+                        stamp = input_stamp(entry)
+                    except OSError:
+                        # the export reports the missing file
+                        pass
+                    last_export = self.state.last_export(entry)
+                    if last_export is not None and not self.force:
+                        last_stamp, known_fingerprint = last_export
+                        if stamp == last_stamp:
+                            yield BatchResult(entry, skipped=True)
+                            continue
+                future = executor.submit(
+                    export_entry,
+                    entry,
+                    self.max_concurrency,
+                    self.aggregation_workers,
+                    known_fingerprint,
+                )
+                stamps[future] = stamp
+            for future in as_completed(stamps):
+                result = future.result()
+                stamp = stamps[future]
+                if result.ok and stamp is not None and result.fingerprint:
+                    self.state.record_export(
+                        result.entry, stamp, result.fingerprint
+                    )
+                yield result
+
+    def run(self) -> BatchSummary:
+        start = time.monotonic()
+        summary = BatchSummary()
+        for result in self.iter_results():
+            summary.results.append(result)
+        summary.elapsed = time.monotonic() - start
+        return summary
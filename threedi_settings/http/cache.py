@@ -0,0 +1,94 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from threedi_settings.http import (
+    DEFAULT_OVERVIEW_CACHE_SIZE,
+    DEFAULT_OVERVIEW_CACHE_TTL,
+)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache whose entries expire `ttl` seconds after they
+    have been stored. Once `maxsize` entries are stored, the least recently
+    used entry is evicted. A `ttl` or `maxsize` of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_OVERVIEW_CACHE_SIZE,
+        ttl: float = DEFAULT_OVERVIEW_CACHE_TTL,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """:returns the cached value or `None` if missing or expired"""
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return
+            if expires <= self._timer():
+                del self._entries[key]
+                self.misses += 1
+                return
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """drops all entries and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self.hits, self.misses, self.evictions, len(self._entries)
+            )
@@ -0,0 +1,132 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from typing import Callable, Dict, List, Optional
+
+from threedi_settings.http.api_clients import (
+    OpenAPINumericalSettings,
+    OpenAPITimeStepSettings,
+    OpenAPIPhysicalSettings,
+    OpenAPIAggregationSettings,
+    OpenAPISimulationSettings,
+    AggregationCreateResult,
+    settings_overview_from_responses,
+)
+from openapi_client.models import SimulationSettingsOverview
+from threedi_settings.http import DEFAULT_MAX_CONCURRENCY
+from threedi_settings.models import SourceTypes
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentExporter:
+    """
+    Creates the API settings resources of a simulation concurrently.
+
+    The settings resources do not depend on each other, so their create
+    requests are sent at the same time. `max_concurrency` caps the number
+    of requests in flight. If `aggregation_workers` is larger than 1 the
+    aggregation settings are uploaded in bulk, the per-item results are
+    kept in `aggregation_results`.
+
+    The returned overview is built from the create responses, unless
+    `verify` is set; then it is fetched from the API after all creates.
+    """
+
+    def __init__(
+        self,
+        simulation_id: int,
+        source: SourceTypes,
+        settings: Dict,
+        aggregations: Optional[Dict] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        aggregation_workers: int = 1,
+        verify: bool = False,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.simulation_id = simulation_id
+        self.source = source
+        self.settings = settings
+        self.aggregations = aggregations
+        self.max_concurrency = max_concurrency
+        self.aggregation_workers = aggregation_workers
+        self.verify = verify
+        self.aggregation_results: List[AggregationCreateResult] = []
+
+    async def _run(
+        self,
+        func: Callable,
+        semaphore: asyncio.Semaphore,
+        executor: ThreadPoolExecutor,
+    ):
+        # the openapi client is blocking, run it in the executor
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func)
+
+    def _bulk_create_aggregations(
+        self, client: OpenAPIAggregationSettings
+    ) -> Callable:
+        def bulk_create():
+            self.aggregation_results = client.bulk_create(
+                self.aggregation_workers
+            )
+            return [
+                result.response
+                for result in self.aggregation_results
+                if result.ok
+            ]
+        return bulk_create
+
+    async def export(self) -> Optional[SimulationSettingsOverview]:
+        """create all API settings resources"""
+        clients = [
+            OpenAPINumericalSettings(
+                self.simulation_id, self.settings, self.source
+            ),
+            OpenAPITimeStepSettings(
+                self.simulation_id, self.settings, self.source
+            ),
+            OpenAPIPhysicalSettings(
+                self.simulation_id, self.settings, self.source
+            ),
+        ]
+        creates = [client.create for client in clients]
+        if self.aggregations:
+            aggregation_client = OpenAPIAggregationSettings(
+                self.simulation_id, self.aggregations
+            )
+            if self.aggregation_workers > 1:
+                creates.append(self._bulk_create_aggregations(aggregation_client))
+            else:
+                creates.append(aggregation_client.create)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            responses = await asyncio.gather(
+                *[
+                    self._run(create, semaphore, executor)
+                    for create in creates
+                ]
+            )
+            if self.verify:
+                sim_settings = OpenAPISimulationSettings(self.simulation_id)
+                return await self._run(
+                    sim_settings.retrieve, semaphore, executor
+                )
+        numerical, time_step, physical, *aggregations = responses
+        return settings_overview_from_responses(
+            physical,
+            time_step,
+            numerical,
+            aggregations[0] if aggregations else [],
+        )
+
+    def run(self) -> Optional[SimulationSettingsOverview]:
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.export())
+        finally:
+            loop.close()
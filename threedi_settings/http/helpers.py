@@ -1,4 +1,5 @@
 from urllib3.exceptions import MaxRetryError
+from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 from urllib.parse import urljoin
 
@@ -7,7 +8,7 @@ from threedi_settings.http import api_config
 from openapi_client.exceptions import ApiException
 
 from enum import Enum
-from typing import Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 from http.client import HTTPResponse
 
 
@@ -16,11 +17,16 @@ class SwaggerSpecificationCode(int, Enum):
     retrieve_auth_token_error = 1
     resp_status_error = 2
     connection_error = 3
+    not_modified = 4
 
 
-def get_threedi_openapi_specification() -> Tuple[SwaggerSpecificationCode, Union[str, HTTPResponse]]:
+def get_threedi_openapi_specification(
+    headers: Optional[Dict] = None
+) -> Tuple[SwaggerSpecificationCode, Union[str, HTTPResponse]]:
     """
-
+    :param headers: additional request headers, e.g. for a conditional GET
+    :returns `SwaggerSpecificationCode.not_modified` if the server answers a
+        conditional GET with 304
     """
     url = urljoin(api_config["API_HOST"], "v3.0/swagger.yaml")
     try:
@@ -35,9 +41,15 @@ def get_threedi_openapi_specification() -> Tuple[SwaggerSpecificationCode, Union
     except ApiException as err:
         return SwaggerSpecificationCode.retrieve_auth_token_error, str(err)
 
-    req = Request(url, None, {"Authorization": f"Bearer {token.access}"})
+    req = Request(
+        url, None, {**(headers or {}), "Authorization": f"Bearer {token.access}"}
+    )
     try:
         resp = urlopen(req)
+    except HTTPError as err:
+        if err.code == 304:
+            return SwaggerSpecificationCode.not_modified, str(err)
+        return SwaggerSpecificationCode.connection_error, str(err)
     except Exception as err:
         return SwaggerSpecificationCode.connection_error, str(err)
     if resp.status != 200:
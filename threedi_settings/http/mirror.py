@@ -0,0 +1,72 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import logging
+from typing import Dict, Iterable, List
+
+from threedi_settings.http import DEFAULT_MAX_IN_FLIGHT
+from threedi_settings.http.pull import fetch_settings
+from threedi_settings.mirror import DEFAULT_MAX_AGE, SettingsMirror
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshSummary:
+    # simulations whose settings have been fetched
+    fetched: List[int] = field(default_factory=list)
+    # fetched simulations whose settings changed since the last sync
+    changed: List[int] = field(default_factory=list)
+    # simulations that were fresh enough to skip
+    skipped: List[int] = field(default_factory=list)
+    failures: Dict[int, str] = field(default_factory=dict)
+
+
+def refresh_mirror(
+    mirror: SettingsMirror,
+    simulation_ids: Iterable[int],
+    max_age: float = DEFAULT_MAX_AGE,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    force: bool = False,
+    dirty: Iterable[int] = (),
+) -> RefreshSummary:
+    """
+    Fetches the settings of the stale simulations (see
+    `SettingsMirror.stale_ids`), or of all with `force`, and stores them
+    in the mirror. The requests are sent from a thread pool; the mirror
+    is written from the calling thread only.
+
+    :param dirty: ids of simulations whose settings have been changed,
+        they are marked dirty and fetched regardless of their age
+    """
+    dirty = list(dirty)
+    mirror.mark_dirty(dirty)
+    simulation_ids = list(dict.fromkeys([*simulation_ids, *dirty]))
+    stale = simulation_ids if force else mirror.stale_ids(simulation_ids, max_age)
+    stale_set = set(stale)
+    summary = RefreshSummary(
+        skipped=[i for i in simulation_ids if i not in stale_set]
+    )
+    stale = iter(stale)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while True:
+            while len(pending) < max_in_flight:
+                simulation_id = next(stale, None)
+                if simulation_id is None:
+                    break
+                pending[executor.submit(fetch_settings, simulation_id)] = simulation_id
+            if not pending:
+                return summary
+            done, _ = wait(set(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                simulation_id = pending.pop(future)
+                try:
+                    simulation_config = future.result()
+                except Exception as err:
+                    summary.failures[simulation_id] = str(err)
+                    continue
+                summary.fetched.append(simulation_id)
+                if mirror.store(simulation_id, simulation_config):
+                    summary.changed.append(simulation_id)
@@ -83,7 +83,7 @@ class OpenAPISimulationSettingsWriter(OpenAPISimulationSettings):
     def _add(self, settings_map: Dict, sub_setting):
         for attr_name, mapping in settings_map.items():
             value = getattr(sub_setting, attr_name)
-            legacy_field_info, _ = mapping
+            legacy_field_info, _, _ = mapping
             if legacy_field_info.ini_section not in self.config:
                 self.config[legacy_field_info.ini_section] = {}
             self.config[legacy_field_info.ini_section][
@@ -94,7 +94,7 @@ class OpenAPISimulationSettingsWriter(OpenAPISimulationSettings):
         for i, entry in enumerate(self.settings.aggregation_settings, start=1):
             for attr_name, mapping in aggregation_settings_map.items():
                 value = getattr(entry, attr_name)
-                legacy_field_info, _ = mapping
+                legacy_field_info, _, _ = mapping
                 if str(i) not in self.aggr_config:
                     self.aggr_config[str(i)] = {}
                 self.aggr_config[str(i)][legacy_field_info.name] = f"{value}"
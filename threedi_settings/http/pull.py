@@ -0,0 +1,151 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from threedi_settings.http.api_clients import OpenAPISimulationSettings
+from threedi_settings.http import DEFAULT_MAX_IN_FLIGHT, DEFAULT_PULL_WRITERS
+from threedi_settings.models import SimulationConfig
+from threedi_settings.plain.output import SimulationConfigWriter
+
+logger = logging.getLogger(__name__)
+
+
+class PullError(Exception):
+    pass
+
+
+@dataclass
+class PullResult:
+    """outcome of pulling the settings of a single simulation"""
+
+    simulation_id: int
+    ini_file: Optional[Path] = None
+    aggregation_file: Optional[Path] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def fetch_settings(simulation_id: int) -> SimulationConfig:
+    """
+    :raises PullError if the settings could not be retrieved or are
+        incomplete
+    """
+    client = OpenAPISimulationSettings(simulation_id)
+    simulation_config = client.simulation_config
+    if simulation_config is not None:
+        return simulation_config
+    if client.retrieve_error:
+        raise PullError(client.retrieve_error)
+    raise PullError("The simulation has no (complete) settings")
+
+
+def write_settings(
+    simulation_id: int,
+    simulation_config: SimulationConfig,
+    output_dir: Path,
+    legacy_ini_file: Optional[Path] = None,
+) -> PullResult:
+    ini_file = output_dir / f"{simulation_id}.ini"
+    aggregation_file = output_dir / f"{simulation_id}_aggregation.ini"
+    # a stale aggregation file of an earlier pull would be referenced
+    # by the new ini file
+    if aggregation_file.exists():
+        aggregation_file.unlink()
+    writer = SimulationConfigWriter(
+        simulation_config, ini_file, aggregation_file, legacy_ini_file
+    )
+    writer.to_ini()
+    return PullResult(
+        simulation_id,
+        ini_file=ini_file,
+        aggregation_file=aggregation_file if aggregation_file.exists() else None,
+    )
+
+
+class SettingsPuller:
+    """
+    Writes the API settings of many simulations to legacy ini and
+    aggregation files in `output_dir`.
+
+    The settings overviews are fetched by a pool of threads that share the
+    process wide API client, at most `max_in_flight` at a time. Fetched
+    settings are handed to a separate pool of `writers` that produce the
+    files, so slow disks do not hold up the requests and vice versa.
+    """
+
+    def __init__(
+        self,
+        simulation_ids: Iterable[int],
+        output_dir: Path,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        writers: int = DEFAULT_PULL_WRITERS,
+        legacy_ini_file: Optional[Path] = None,
+    ):
+        if max_in_flight < 1 or writers < 1:
+            raise ValueError("max_in_flight and writers must be at least 1")
+        self.simulation_ids = simulation_ids
+        self.output_dir = output_dir
+        self.max_in_flight = max_in_flight
+        self.writers = writers
+        self.legacy_ini_file = legacy_ini_file
+
+    def iter_results(self) -> Iterator[PullResult]:
+        """yields the results in order of completion"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        simulation_ids = iter(self.simulation_ids)
+        fetching = {}
+        writing = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_in_flight
+        ) as fetch_executor, ThreadPoolExecutor(
+            max_workers=self.writers
+        ) as write_executor:
+            while True:
+                # the write backlog counts against the window, so fetched
+                # settings do not pile up in memory
+                while len(fetching) + len(writing) < self.max_in_flight:
+                    simulation_id = next(simulation_ids, None)
+                    if simulation_id is None:
+                        break
+                    future = fetch_executor.submit(fetch_settings, simulation_id)
+                    fetching[future] = simulation_id
+                if not fetching and not writing:
+                    return
+                done, _ = wait(
+                    set(fetching) | set(writing), return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future in writing:
+                        yield self._write_result(writing.pop(future), future)
+                        continue
+                    simulation_id = fetching.pop(future)
+                    try:
+                        simulation_config = future.result()
+                    except Exception as err:
+                        yield PullResult(simulation_id, error=str(err))
+                        continue
+                    write_future = write_executor.submit(
+                        write_settings,
+                        simulation_id,
+                        simulation_config,
+                        self.output_dir,
+                        self.legacy_ini_file,
+                    )
+                    writing[write_future] = simulation_id
+
+    @staticmethod
+    def _write_result(simulation_id: int, future) -> PullResult:
+        try:
+            return future.result()
+        except Exception as err:
+            logger.exception(
+                "Could not write the settings of simulation %s", simulation_id
+            )
+            return PullResult(simulation_id, error=f"Could not write: {err}")
@@ -0,0 +1,126 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import yaml
+
+from threedi_settings.http import api_config
+from threedi_settings.http.helpers import (
+    get_threedi_openapi_specification, SwaggerSpecificationCode
+)
+
+logger = logging.getLogger(__name__)
+
+# cached definitions younger than this are used without revalidation
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+def user_cache_dir() -> Path:
+    """:returns the threedi-settings directory in the user cache dir"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if base:
+        return Path(base) / "threedi-settings"
+    return Path.home() / ".cache" / "threedi-settings"
+
+
+class SpecificationCache:
+    """
+    On-disk cache of the 3Di API swagger specification.
+
+    Stores the raw specification, its ETag/Last-Modified headers and
+    a JSON copy of the `definitions` section, that is much faster to
+    load than the YAML specification. Expired entries are revalidated
+    with a conditional GET.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        api_host: Optional[str] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.cache_dir = cache_dir or user_cache_dir()
+        api_host = api_host or api_config["API_HOST"] or ""
+        key = hashlib.sha1(api_host.encode()).hexdigest()[:12]
+        self.spec_file = self.cache_dir / f"swagger-{key}.yaml"
+        self.meta_file = self.cache_dir / f"swagger-{key}.meta.json"
+        self.definitions_file = self.cache_dir / f"definitions-{key}.json"
+        self.max_age = max_age
+
+    def _read_meta(self) -> Dict:
+        try:
+            with self.meta_file.open("r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: Dict):
+        with self.meta_file.open("w") as f:
+            json.dump(meta, f)
+
+    def _read_definitions(self) -> Optional[Dict]:
+        try:
+            with self.definitions_file.open("r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return
+
+    def _store(self, spec: str, headers) -> Dict:
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        definitions = yaml.load(spec, Loader=loader)["definitions"]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.spec_file.write_text(spec, encoding="utf-8")
+        with self.definitions_file.open("w") as f:
+            json.dump(definitions, f)
+        self._write_meta(
+            {
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "validated_at": time.time(),
+            }
+        )
+        return definitions
+
+    def definitions(
+        self, refresh: bool = False
+    ) -> Tuple[SwaggerSpecificationCode, Union[Dict, str]]:
+        """
+        Returns the `definitions` section of the swagger specification.
+
+        :param refresh: revalidate the cached specification, even if it
+            has not expired yet
+        :returns (code, <definitions dict or error message>). A stale
+            cache entry is returned if the revalidation fails.
+        """
+        meta = self._read_meta()
+        definitions = self._read_definitions()
+        age = time.time() - meta.get("validated_at", 0)
+        if definitions is not None and not refresh and age < self.max_age:
+            return SwaggerSpecificationCode.ok, definitions
+
+        headers = {}
+        if definitions is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        code, resp = get_threedi_openapi_specification(headers)
+        if code == SwaggerSpecificationCode.not_modified:
+            meta["validated_at"] = time.time()
+            self._write_meta(meta)
+            return SwaggerSpecificationCode.ok, definitions
+        if code != SwaggerSpecificationCode.ok:
+            if definitions is not None:
+                logger.warning(
+                    "Using cached specification, revalidation failed: %s", resp
+                )
+                return SwaggerSpecificationCode.ok, definitions
+            return code, resp
+        spec = resp.read().decode("utf-8")
+        return SwaggerSpecificationCode.ok, self._store(spec, resp.headers)
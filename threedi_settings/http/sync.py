@@ -0,0 +1,141 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass, field
+import logging
+from typing import Dict, List, Optional
+
+from threedi_settings.diff import SettingsDiff, diff_overview
+from threedi_settings.http.api_clients import (
+    OpenAPIAggregationSettings,
+    OpenAPISimulationSettings,
+)
+from threedi_settings.http.upload import SETTINGS_CLIENTS
+from threedi_settings.models import SourceTypes
+from threedi_settings.payloads import (
+    AGGREGATION_PAYLOAD,
+    convert_aggregations,
+    convert_settings,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SyncError(Exception):
+    pass
+
+
+@dataclass
+class SyncResult:
+    """the write requests issued by a sync, per payload key"""
+
+    diff: SettingsDiff
+    created: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def write_requests(self) -> int:
+        n_aggregations = len(self.diff.missing_aggregations)
+        return sum(
+            n_aggregations if key == AGGREGATION_PAYLOAD else 1
+            for key in self.created + self.updated
+        )
+
+
+class SettingsSync:
+    """
+    Brings the API settings of a simulation in line with local legacy
+    settings. The current state is fetched once and diffed against the
+    converted settings; only resources that are missing are created and
+    only resources that differ are updated.
+
+    Aggregation settings can only be added: entries missing in the API are
+    created, entries that exist in the API only are left alone.
+    """
+
+    def __init__(
+        self, simulation_id: int, payloads: Dict, aggregation_workers: int = 1
+    ):
+        """
+        :param payloads: converted settings, as returned by
+            `threedi_settings.payloads.ConversionMemo.convert`
+        """
+        self.simulation_id = simulation_id
+        self.payloads = dict(payloads)
+        self.aggregation_workers = aggregation_workers
+
+    @classmethod
+    def from_settings(
+        cls,
+        simulation_id: int,
+        source: SourceTypes,
+        settings: Dict,
+        aggregations: Optional[Dict] = None,
+        aggregation_workers: int = 1,
+    ) -> "SettingsSync":
+        """:returns a sync for legacy settings (and aggregation settings)"""
+        payloads = convert_settings(settings, source)
+        if aggregations:
+            payloads[AGGREGATION_PAYLOAD] = convert_aggregations(aggregations)
+        return cls(simulation_id, payloads, aggregation_workers)
+
+    def diff(self) -> SettingsDiff:
+        """
+        :raises SyncError if the current settings could not be retrieved,
+            nothing has been written in that case
+        """
+        simulation_settings = OpenAPISimulationSettings(self.simulation_id)
+        # a cached overview may predate recent writes
+        overview = simulation_settings.retrieve(use_cache=False)
+        if overview is None:
+            raise SyncError(
+                f"Could not retrieve the settings of simulation "
+                f"{self.simulation_id}: {simulation_settings.retrieve_error}"
+            )
+        return diff_overview(overview, self.payloads)
+
+    def run(self) -> SyncResult:
+        result = SyncResult(self.diff())
+        for key, client_class in SETTINGS_CLIENTS.items():
+            if key not in result.diff.settings:
+                continue
+            differences = result.diff.settings[key]
+            if differences == {}:
+                result.unchanged.append(key)
+                continue
+            client = client_class.from_payload(
+                self.simulation_id, self.payloads[key]
+            )
+            if differences is None:
+                if client.create() is None:
+                    result.errors[key] = client.create_error
+                    continue
+                result.created.append(key)
+                continue
+            if client.update() is None:
+                result.errors[key] = client.update_error
+                continue
+            result.updated.append(key)
+
+        missing = result.diff.missing_aggregations
+        if not missing:
+            if self.payloads.get(AGGREGATION_PAYLOAD):
+                result.unchanged.append(AGGREGATION_PAYLOAD)
+            return result
+        client = OpenAPIAggregationSettings.from_payloads(
+            self.simulation_id, missing
+        )
+        errors = [r for r in client.bulk_create(self.aggregation_workers) if not r.ok]
+        if errors:
+            result.errors[AGGREGATION_PAYLOAD] = "; ".join(
+                f"{r.instance.flow_variable} ({r.instance.method}): {r.error}"
+                for r in errors
+            )
+        else:
+            result.created.append(AGGREGATION_PAYLOAD)
+        return result
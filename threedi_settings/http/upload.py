@@ -0,0 +1,264 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import logging
+from pathlib import PurePosixPath
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+from threedi_settings.http.api_clients import (
+    OpenAPINumericalSettings,
+    OpenAPITimeStepSettings,
+    OpenAPIPhysicalSettings,
+    OpenAPIAggregationSettings,
+)
+from threedi_settings.http import DEFAULT_MAX_IN_FLIGHT
+from threedi_settings.payloads import AGGREGATION_PAYLOAD, payload_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# payload key -> client class
+SETTINGS_CLIENTS = {
+    "physical_settings": OpenAPIPhysicalSettings,
+    "time_step_settings": OpenAPITimeStepSettings,
+    "numerical_settings": OpenAPINumericalSettings,
+}
+
+
+def resource_id(resp) -> Optional[Union[int, str]]:
+    """
+    :returns the id of a created resource, read from its url
+    if the resource has no id attribute
+    """
+    res_id = getattr(resp, "id", None)
+    if res_id is not None:
+        return res_id
+    url = getattr(resp, "url", None)
+    if not url:
+        return
+    return PurePosixPath(unquote(urlparse(url).path)).name
+
+
+class SentPayloads:
+    """
+    Thread safe registry of the payloads that have been sent, by
+    (simulation id, payload key), so identical payloads are not sent
+    twice for the same simulation.
+
+    A payload is claimed before it is sent and confirmed once it has been
+    created. Claiming a payload whose identical twin is still being sent
+    waits for the outcome of that upload: the payload is skipped if it
+    has been created, and claimed otherwise.
+    """
+
+    def __init__(self):
+        self._sent: Dict[Tuple[int, str], str] = {}
+        # (simulation id, payload key, fingerprint) -> set once the
+        # upload of the claimed payload has finished
+        self._pending: Dict[Tuple[int, str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> "SentPayloads":
+        """
+        Registers the payloads that were created successfully according
+        to the records of a results file written by the upload command.
+        """
+        sent = cls()
+        for result in results:
+            simulation_id = result.get("simulation_id")
+            # only the payloads created successfully have a fingerprint
+            for key, value in (result.get("fingerprints") or {}).items():
+                sent._sent[(simulation_id, key)] = value
+        return sent
+
+    def __len__(self) -> int:
+        return len(self._sent)
+
+    def claim(self, simulation_id: int, key: str, fingerprint: str) -> bool:
+        """
+        Blocks while an identical payload is being sent.
+
+        :returns False if the payload has already been sent, otherwise
+            claims it; call `confirm` or `release` when it has been sent
+        """
+        while True:
+            with self._lock:
+                if self._sent.get((simulation_id, key)) == fingerprint:
+                    return False
+                pending = self._pending.get((simulation_id, key, fingerprint))
+                if pending is None:
+                    self._pending[(simulation_id, key, fingerprint)] = (
+                        threading.Event()
+                    )
+                    return True
+            pending.wait()
+
+    def _finish(self, simulation_id: int, key: str, fingerprint: str):
+        pending = self._pending.pop((simulation_id, key, fingerprint), None)
+        if pending is not None:
+            pending.set()
+
+    def confirm(self, simulation_id: int, key: str, fingerprint: str):
+        """registers a claimed payload that has been created"""
+        with self._lock:
+            self._sent[(simulation_id, key)] = fingerprint
+            self._finish(simulation_id, key, fingerprint)
+
+    def release(self, simulation_id: int, key: str, fingerprint: str):
+        """unregisters a claimed payload whose upload failed"""
+        with self._lock:
+            self._finish(simulation_id, key, fingerprint)
+
+
+@dataclass
+class UploadResult:
+    """outcome of uploading a single payload record"""
+
+    simulation_id: int
+    source: Optional[str] = None
+    created: Dict = field(default_factory=dict)
+    errors: Dict = field(default_factory=dict)
+    # payload key -> fingerprint of the payloads that have been sent
+    fingerprints: Dict = field(default_factory=dict)
+    # payload key -> fingerprint of the identical payloads sent before
+    skipped: Dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> Dict:
+        d = {"simulation_id": self.simulation_id, "source": self.source}
+        if self.created:
+            d["created"] = self.created
+        if self.errors:
+            d["errors"] = self.errors
+        if self.fingerprints:
+            d["fingerprints"] = self.fingerprints
+        if self.skipped:
+            d["skipped"] = self.skipped
+        return d
+
+
+def upload_record(
+    record: Dict,
+    aggregation_workers: int = 1,
+    sent: Optional[SentPayloads] = None,
+) -> UploadResult:
+    """
+    Creates the API resources of a single payload record, as written by
+    `threedi_settings.payloads.write_ndjson`. Errors are not raised but
+    reported through the result. Payloads registered in `sent` for the
+    simulation are skipped.
+    """
+    try:
+        simulation_id = int(record["simulation_id"])
+    except (KeyError, ValueError, TypeError) as err:
+        result = UploadResult(record.get("simulation_id"), record.get("source"))
+        result.errors["record"] = f"Invalid simulation_id: {err}"
+        return result
+
+    sent = sent if sent is not None else SentPayloads()
+    result = UploadResult(simulation_id, record.get("source"))
+    for key, client_class in SETTINGS_CLIENTS.items():
+        payload = record.get(key)
+        if payload is None:
+            continue
+        fingerprint = payload_fingerprint(key, payload)
+        if not sent.claim(simulation_id, key, fingerprint):
+            result.skipped[key] = fingerprint
+            continue
+        try:
+            client = client_class.from_payload(simulation_id, payload)
+            resp = client.create()
+        except Exception as err:
+            logger.exception("Could not upload %s", key)
+            result.errors[key] = str(err)
+            sent.release(simulation_id, key, fingerprint)
+            continue
+        if resp is None:
+            result.errors[key] = client.create_error
+            sent.release(simulation_id, key, fingerprint)
+            continue
+        sent.confirm(simulation_id, key, fingerprint)
+        result.created[key] = resource_id(resp)
+        result.fingerprints[key] = fingerprint
+
+    payloads = record.get(AGGREGATION_PAYLOAD)
+    if not payloads:
+        return result
+    fingerprint = payload_fingerprint(AGGREGATION_PAYLOAD, payloads)
+    if not sent.claim(simulation_id, AGGREGATION_PAYLOAD, fingerprint):
+        result.skipped[AGGREGATION_PAYLOAD] = fingerprint
+        return result
+    try:
+        client = OpenAPIAggregationSettings.from_payloads(
+            simulation_id, payloads
+        )
+        aggregation_results = client.bulk_create(aggregation_workers)
+    except Exception as err:
+        logger.exception("Could not upload %s", AGGREGATION_PAYLOAD)
+        result.errors[AGGREGATION_PAYLOAD] = str(err)
+        sent.release(simulation_id, AGGREGATION_PAYLOAD, fingerprint)
+        return result
+    result.created[AGGREGATION_PAYLOAD] = [
+        resource_id(r.response) for r in aggregation_results if r.ok
+    ]
+    errors = {str(r.index): r.error for r in aggregation_results if not r.ok}
+    if errors:
+        result.errors[AGGREGATION_PAYLOAD] = errors
+        sent.release(simulation_id, AGGREGATION_PAYLOAD, fingerprint)
+    else:
+        sent.confirm(simulation_id, AGGREGATION_PAYLOAD, fingerprint)
+        result.fingerprints[AGGREGATION_PAYLOAD] = fingerprint
+    return result
+
+
+class PayloadUploader:
+    """
+    Uploads payload records through a thread pool that shares the
+    process wide API client. Records are pulled from `records` only when
+    a slot in the in-flight window is free, so a lazily read payload file
+    is never loaded into memory in full. Payloads identical to ones sent
+    before for the same simulation are skipped, see `SentPayloads`.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[Dict],
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        aggregation_workers: int = 1,
+        sent: Optional[SentPayloads] = None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.records = records
+        self.max_in_flight = max_in_flight
+        self.aggregation_workers = aggregation_workers
+        self.sent = sent if sent is not None else SentPayloads()
+
+    def iter_results(self) -> Iterator[UploadResult]:
+        """yields the results in order of completion"""
+        records = iter(self.records)
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while True:
+                for record in records:
+                    pending.add(
+                        executor.submit(
+                            upload_record,
+                            record,
+                            self.aggregation_workers,
+                            self.sent,
+                        )
+                    )
+                    if len(pending) >= self.max_in_flight:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
@@ -0,0 +1,126 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from threedi_settings.http.api_clients import OpenApiSimulationClient
+from threedi_settings.http.sync import SettingsSync, SyncResult
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.payloads import ConversionMemo, settings_fingerprint
+from threedi_settings.watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_POLL_INTERVAL,
+    FileWatcher,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WatchEvent:
+    """outcome of handling a change of the inputs of a manifest entry"""
+
+    entry: ManifestEntry
+    sync: Optional[SyncResult] = None
+    error: Optional[str] = None
+    # the files changed, but the converted settings did not
+    unchanged: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.sync is None or self.sync.ok)
+
+
+def entry_paths(entry: ManifestEntry) -> List[Path]:
+    """:returns the input files of a manifest entry"""
+    if entry.aggregation_file:
+        return [entry.source, entry.aggregation_file]
+    return [entry.source]
+
+
+class SettingsWatcher:
+    """
+    Watches the input files of manifest entries and brings the settings of
+    the bound simulations in line with them whenever they change.
+
+    Only the entries whose files changed are re-read. If the converted
+    settings are equal to those of the last successful push nothing is
+    sent, otherwise a `SettingsSync` writes just the resources that differ
+    from the API state. The API client is created once and reused for all
+    changes.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[ManifestEntry],
+        interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        aggregation_workers: int = 1,
+        initial_sync: bool = True,
+        file_watcher: Optional[FileWatcher] = None,
+    ):
+        self.entries = list(entries)
+        self.aggregation_workers = aggregation_workers
+        self.initial_sync = initial_sync
+        self.file_watcher = file_watcher or FileWatcher(
+            [path for entry in self.entries for path in entry_paths(entry)],
+            interval,
+            debounce,
+        )
+        # entry -> settings fingerprint of the last successful push
+        self.fingerprints: Dict[ManifestEntry, str] = {}
+
+    @staticmethod
+    def _convert(entry: ManifestEntry) -> Dict:
+        settings, aggregations = entry.load()
+        return ConversionMemo().convert(settings, aggregations, entry.source_type)
+
+    def push(self, entry: ManifestEntry) -> WatchEvent:
+        """
+        Re-reads the entry and syncs its settings if they changed since
+        the last successful push. Errors are reported through the event.
+        """
+        try:
+            payloads = self._convert(entry)
+        except Exception as err:
+            logger.debug("Could not read %s", entry.source, exc_info=True)
+            return WatchEvent(entry, error=str(err))
+        fingerprint = settings_fingerprint(payloads)
+        if self.fingerprints.get(entry) == fingerprint:
+            return WatchEvent(entry, unchanged=True)
+        # the simulation may have been changed by others in the meantime
+        OpenApiSimulationClient(entry.simulation_id).invalidate_overview()
+        try:
+            result = SettingsSync(
+                entry.simulation_id, payloads, self.aggregation_workers
+            ).run()
+        except Exception as err:
+            logger.exception("Failed to sync simulation %s", entry.simulation_id)
+            return WatchEvent(entry, error=str(err))
+        if result.ok:
+            self.fingerprints[entry] = fingerprint
+        return WatchEvent(entry, result)
+
+    def iter_events(self) -> Iterator[WatchEvent]:
+        """
+        Yields an event for every handled change, forever. With
+        `initial_sync` all entries are synced first, otherwise the
+        current files are taken as already pushed.
+        """
+        for entry in self.entries:
+            if self.initial_sync:
+                yield self.push(entry)
+                continue
+            try:
+                self.fingerprints[entry] = settings_fingerprint(
+                    self._convert(entry)
+                )
+            except Exception as err:
+                yield WatchEvent(entry, error=str(err))
+
+        for changed in self.file_watcher.iter_changes():
+            for entry in self.entries:
+                if changed.intersection(entry_paths(entry)):
+                    yield self.push(entry)
@@ -0,0 +1,125 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import csv
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from threedi_settings.models import SourceTypes
+from threedi_settings.threedimodel_config import (
+    AggregationIni,
+    ThreedimodelIni,
+    ThreedimodelSqlite,
+)
+
+SOURCE_SUFFIXES = {
+    ".ini": SourceTypes.ini_file,
+    ".sqlite": SourceTypes.sqlite_file,
+}
+
+
+class ManifestError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """
+    Binds a legacy settings source (ini or sqlite file) to a simulation.
+    """
+
+    simulation_id: int
+    source: Path
+    settings_row: int = 1
+    aggregation_file: Optional[Path] = None
+
+    @property
+    def source_type(self) -> SourceTypes:
+        """
+        :raises ManifestError if the source type can not be derived from
+        the file suffix
+        """
+        try:
+            return SOURCE_SUFFIXES[self.source.suffix.lower()]
+        except KeyError:
+            raise ManifestError(
+                f"Unknown source type for {self.source}, expected one of "
+                f"{', '.join(SOURCE_SUFFIXES)}"
+            )
+
+    def load(self) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Reads the legacy settings and aggregation settings of the source.
+        The aggregation settings of a sqlite source are read from the
+        database, unless an aggregation file is given.
+
+        :returns (<settings dict>, <aggregation settings dict or None>)
+        :raises RowDoesNotExistError if the settings row does not exist
+        """
+        aggregations = None
+        if self.aggregation_file:
+            aggregations = AggregationIni(self.aggregation_file).as_dict()
+        if self.source_type == SourceTypes.ini_file:
+            return ThreedimodelIni(self.source).as_dict(), aggregations
+        tms = ThreedimodelSqlite(self.source, self.settings_row)
+        if aggregations is None:
+            aggregations = tms.aggregation_settings or None
+        return tms.as_dict(), aggregations
+
+
+def _entry_from_dict(d: Dict, base_dir: Path) -> ManifestEntry:
+    try:
+        simulation_id = int(d["simulation_id"])
+        source = base_dir / str(d["source"]).strip()
+    except (KeyError, ValueError, TypeError) as err:
+        raise ManifestError(f"Invalid manifest entry {d}: {err}")
+    settings_row = d.get("settings_row") or 1
+    aggregation_file = d.get("aggregation_file") or None
+    if aggregation_file:
+        aggregation_file = base_dir / str(aggregation_file).strip()
+    try:
+        settings_row = int(settings_row)
+    except ValueError:
+        raise ManifestError(f"Invalid settings_row in manifest entry {d}")
+    return ManifestEntry(simulation_id, source, settings_row, aggregation_file)
+
+
+def read_manifest(manifest_file: Path) -> Iterator[ManifestEntry]:
+    """
+    Reads the entries of a CSV or JSON manifest. CSV manifests need a
+    header row, JSON manifests contain a list of objects. The fields are
+
+        simulation_id, source, settings_row (optional, defaults to 1),
+        aggregation_file (optional)
+
+    Relative paths are resolved relative to the manifest file.
+
+    :raises ManifestError for invalid entries
+    """
+    base_dir = manifest_file.resolve().parent
+    if manifest_file.suffix.lower() == ".json":
+        with manifest_file.open("r") as f:
+            rows = json.load(f)
+        if not isinstance(rows, list):
+            raise ManifestError("A JSON manifest must contain a list")
+        for row in rows:
+            yield _entry_from_dict(row, base_dir)
+        return
+
+    with manifest_file.open("r", newline="") as f:
+        for row in csv.DictReader(f):
+            yield _entry_from_dict(row, base_dir)
+
+
+def read_simulation_ids(path: Path) -> List[int]:
+    """
+    Reads a text file with simulation ids, separated by whitespace
+    (usually one per line).
+
+    :raises ManifestError if the file contains anything but integers
+    """
+    try:
+        return [int(token) for token in path.read_text().split()]
+    except ValueError as err:
+        raise ManifestError(f"Invalid simulation id in {path}: {err}")
@@ -0,0 +1,313 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from dataclasses import asdict
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from threedi_settings.fingerprint import fingerprint
+from threedi_settings.models import (
+    AggregationConfig,
+    NumericalConfig,
+    PhysicalSimulationConfig,
+    SimulationConfig,
+    TimeStepConfig,
+    field_types,
+)
+
+logger = logging.getLogger(__name__)
+
+# simulations synced longer ago (in seconds) are refreshed
+DEFAULT_MAX_AGE = 86400
+
+# SimulationConfig attribute -> (table name, model)
+MIRROR_TABLES = {
+    "physical_config": ("physical_settings", PhysicalSimulationConfig),
+    "time_step_config": ("time_step_settings", TimeStepConfig),
+    "numerical_config": ("numerical_settings", NumericalConfig),
+}
+AGGREGATION_TABLE = "aggregation_settings"
+
+SQLITE_TYPES = {
+    int: "INTEGER",
+    float: "REAL",
+    bool: "INTEGER",
+    str: "TEXT",
+}
+
+
+class MirrorError(Exception):
+    pass
+
+
+def config_fingerprint(simulation_config: SimulationConfig) -> str:
+    return fingerprint(asdict(simulation_config))
+
+
+class SettingsMirror:
+    """
+    Local sqlite mirror of the `SimulationConfig` data of many simulations.
+
+    Every settings model gets its own table with one typed column per field,
+    so simulations can be found by field value with a local query. Indices
+    are created on first use of a field in `find`.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        # field name -> (table name, python type)
+        self.columns: Dict[str, Tuple[str, type]] = {}
+        tables = [
+            (table, model) for table, model in MIRROR_TABLES.values()
+        ] + [(AGGREGATION_TABLE, AggregationConfig)]
+        for table, model in tables:
+            for name, field_type in field_types(model).items():
+                if name in self.columns:
+                    raise MirrorError(f"Field {name} is not unique")
+                self.columns[name] = (table, field_type)
+        self._create_tables()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "SettingsMirror":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _create_tables(self):
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS simulations ("
+                "simulation_id INTEGER PRIMARY KEY, uid TEXT, sim_uid TEXT, "
+                "fingerprint TEXT, synced_at REAL, dirty INTEGER DEFAULT 0)"
+            )
+            for table, model in MIRROR_TABLES.values():
+                columns = ", ".join(
+                    f"{name} {SQLITE_TYPES[field_type]}"
+                    for name, field_type in field_types(model).items()
+                )
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"simulation_id INTEGER PRIMARY KEY, uid TEXT, {columns})"
+                )
+            columns = ", ".join(
+                f"{name} {SQLITE_TYPES[field_type]}"
+                for name, field_type in field_types(AggregationConfig).items()
+            )
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {AGGREGATION_TABLE} ("
+                f"simulation_id INTEGER, uid TEXT, {columns})"
+            )
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{AGGREGATION_TABLE}_simulation_id "
+                f"ON {AGGREGATION_TABLE} (simulation_id)"
+            )
+
+    @property
+    def simulation_ids(self) -> List[int]:
+        rows = self.connection.execute(
+            "SELECT simulation_id FROM simulations ORDER BY simulation_id"
+        )
+        return [row[0] for row in rows]
+
+    def store(self, simulation_id: int, simulation_config: SimulationConfig) -> bool:
+        """
+        Stores (or replaces) the settings of a simulation.
+
+        :returns False if the settings did not change since the last sync
+        """
+        new_fingerprint = config_fingerprint(simulation_config)
+        now = time.time()
+        row = self.connection.execute(
+            "SELECT fingerprint FROM simulations WHERE simulation_id=?",
+            (simulation_id,),
+        ).fetchone()
+        with self.connection:
+            if row is not None and row[0] == new_fingerprint:
+                self.connection.execute(
+                    "UPDATE simulations SET synced_at=?, dirty=0 "
+                    "WHERE simulation_id=?",
+                    (now, simulation_id),
+                )
+                return False
+            self._delete(simulation_id)
+            self.connection.execute(
+                "INSERT INTO simulations (simulation_id, uid, sim_uid, "
+                "fingerprint, synced_at, dirty) VALUES (?, ?, ?, ?, ?, 0)",
+                (
+                    simulation_id,
+                    simulation_config.uid,
+                    simulation_config.sim_uid,
+                    new_fingerprint,
+                    now,
+                ),
+            )
+            for attr_name, (table, _) in MIRROR_TABLES.items():
+                self._insert(
+                    table, simulation_id, getattr(simulation_config, attr_name)
+                )
+            for aggregation in simulation_config.aggregation_config or []:
+                self._insert(AGGREGATION_TABLE, simulation_id, aggregation)
+        return True
+
+    def _insert(self, table: str, simulation_id: int, config):
+        values = {
+            name: getattr(config, name)
+            for name in field_types(type(config))
+        }
+        names = ", ".join(["simulation_id", "uid", *values])
+        placeholders = ", ".join("?" * (len(values) + 2))
+        self.connection.execute(
+            f"INSERT INTO {table} ({names}) VALUES ({placeholders})",
+            (simulation_id, config.uid, *values.values()),
+        )
+
+    def _delete(self, simulation_id: int):
+        tables = ["simulations", AGGREGATION_TABLE] + [
+            table for table, _ in MIRROR_TABLES.values()
+        ]
+        for table in tables:
+            self.connection.execute(
+                f"DELETE FROM {table} WHERE simulation_id=?", (simulation_id,)
+            )
+
+    def remove(self, simulation_id: int):
+        with self.connection:
+            self._delete(simulation_id)
+
+    def mark_dirty(self, simulation_ids: Iterable[int]):
+        """flags simulations whose settings are known to have changed"""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE simulations SET dirty=1 WHERE simulation_id=?",
+                [(simulation_id,) for simulation_id in simulation_ids],
+            )
+
+    def stale_ids(
+        self,
+        simulation_ids: Iterable[int],
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> List[int]:
+        """
+        :returns the ids that need to be (re)fetched: those not mirrored
+            yet, marked dirty or synced more than `max_age` seconds ago
+        """
+        synced = {
+            simulation_id: (synced_at, dirty)
+            for simulation_id, synced_at, dirty in self.connection.execute(
+                "SELECT simulation_id, synced_at, dirty FROM simulations"
+            )
+        }
+        threshold = time.time() - max_age
+        stale = []
+        for simulation_id in simulation_ids:
+            try:
+                synced_at, dirty = synced[simulation_id]
+            except KeyError:
+                stale.append(simulation_id)
+                continue
+            if dirty or synced_at < threshold:
+                stale.append(simulation_id)
+        return stale
+
+    def load(self, simulation_id: int) -> Optional[SimulationConfig]:
+        """:returns the mirrored settings or `None` if not mirrored"""
+        row = self.connection.execute(
+            "SELECT uid, sim_uid FROM simulations WHERE simulation_id=?",
+            (simulation_id,),
+        ).fetchone()
+        if row is None:
+            return
+        uid, sim_uid = row
+        configs = {}
+        for attr_name, (table, model) in MIRROR_TABLES.items():
+            configs[attr_name] = self._load_rows(
+                table, model, simulation_id, sim_uid
+            )[0]
+        aggregations = self._load_rows(
+            AGGREGATION_TABLE, AggregationConfig, simulation_id, sim_uid
+        )
+        return SimulationConfig(
+            uid=uid,
+            sim_uid=sim_uid,
+            aggregation_config=aggregations,
+            **configs,
+        )
+
+    def _load_rows(self, table: str, model, simulation_id: int, sim_uid: str) -> List:
+        types = field_types(model)
+        cursor = self.connection.execute(
+            f"SELECT uid, {', '.join(types)} FROM {table} "
+            f"WHERE simulation_id=? ORDER BY rowid",
+            (simulation_id,),
+        )
+        configs = []
+        for uid, *values in cursor:
+            data = {
+                name: field_type(value) if value is not None else None
+                for (name, field_type), value in zip(types.items(), values)
+            }
+            configs.append(model(uid=uid, sim_uid=sim_uid, **data))
+        return configs
+
+    def coerce(self, field_name: str, value: Any) -> Any:
+        """
+        converts `value` (e.g. a command line string) to the type of
+        the field `field_name`
+
+        :raises MirrorError if the field is unknown or the value invalid
+        """
+        try:
+            _, field_type = self.columns[field_name]
+        except KeyError:
+            raise MirrorError(f"Unknown settings field {field_name}")
+        if not isinstance(value, str) or field_type is str:
+            return value
+        if field_type is bool:
+            if value.lower() in {"1", "true", "yes"}:
+                return True
+            if value.lower() in {"0", "false", "no"}:
+                return False
+            raise MirrorError(f"Invalid boolean value {value} for {field_name}")
+        try:
+            return field_type(value)
+        except ValueError:
+            raise MirrorError(f"Invalid value {value} for {field_name}")
+
+    def _ensure_index(self, field_name: str):
+        table, _ = self.columns[field_name]
+        with self.connection:
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{field_name} "
+                f"ON {table} ({field_name})"
+            )
+
+    def find(self, **criteria) -> List[int]:
+        """
+        Finds the simulations whose settings match all `criteria`, e.g.
+        ``find(time_integration_method=1)``. Aggregation fields match if
+        any aggregation setting of the simulation has the value.
+
+        :returns the matching simulation ids
+        """
+        query = "SELECT simulation_id FROM simulations"
+        params = []
+        conditions = []
+        for field_name, value in criteria.items():
+            value = self.coerce(field_name, value)
+            table, _ = self.columns[field_name]
+            self._ensure_index(field_name)
+            conditions.append(
+                f"simulation_id IN (SELECT simulation_id FROM {table} "
+                f"WHERE {field_name} = ?)"
+            )
+            params.append(value)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY simulation_id"
+        return [row[0] for row in self.connection.execute(query, params)]
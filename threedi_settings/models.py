@@ -1,6 +1,7 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import List, Optional
+import typing
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -73,3 +74,23 @@ class SimulationConfig(BaseConfig):
 class SourceTypes(int, Enum):
     ini_file = 1
     sqlite_file = 2
+
+
+def field_types(model) -> Dict[str, type]:
+    """
+    :returns {<field name>: <python type>} of the settings fields of a
+        config dataclass, without the `BaseConfig` fields
+    """
+    hints = typing.get_type_hints(model)
+    base_fields = {f.name for f in fields(BaseConfig)}
+    types = {}
+    for f in fields(model):
+        if f.name in base_fields:
+            continue
+        field_type = hints[f.name]
+        # Optional[X] -> X
+        args = [
+            a for a in getattr(field_type, "__args__", ()) if a is not type(None)
+        ]
+        types[f.name] = args[0] if args else field_type
+    return types
@@ -0,0 +1,252 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import logging
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from threedi_settings.conversion import convert, get_conversion_plan
+from threedi_settings.fingerprint import canonical_json, fingerprint
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.mappings import (
+    physical_settings_map,
+    time_step_settings_map,
+    numerical_settings_map,
+    aggregation_settings_map,
+)
+from threedi_settings.models import SourceTypes
+
+logger = logging.getLogger(__name__)
+
+# Note: the payloads are plain dictionaries, converting them must not
+# require the threedi-api-client.
+
+# payload key -> (swagger definition name, mapping)
+SETTINGS_PAYLOADS = {
+    "physical_settings": ("PhysicalSettings", physical_settings_map),
+    "time_step_settings": ("TimeStepSettings", time_step_settings_map),
+    "numerical_settings": ("NumericalSettings", numerical_settings_map),
+}
+AGGREGATION_PAYLOAD = "aggregation_settings"
+
+
+def convert_settings(settings: Dict, source_type: SourceTypes) -> Dict:
+    """
+    Converts legacy settings to the physical, time step and numerical
+    settings API payloads.
+
+    :returns {<payload key>: <payload>}
+    """
+    payloads = {}
+    for key, (definition_name, mapping) in SETTINGS_PAYLOADS.items():
+        plan = get_conversion_plan(definition_name, mapping, source_type)
+        payloads[key] = convert(plan, settings)
+    return payloads
+
+
+def _coerce(api_info, value):
+    try:
+        return api_info.type(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def convert_aggregations(aggregations: Dict) -> List[Dict]:
+    """
+    Converts legacy aggregation settings (as returned by
+    `AggregationIni.as_dict()` or `ThreedimodelSqlite.aggregation_settings`)
+    to a list of aggregation settings API payloads.
+    """
+    payloads = []
+    for entry in aggregations.values():
+        payload = {}
+        for name, (legacy_info, api_info, _) in aggregation_settings_map.items():
+            payload[name] = _coerce(api_info, entry[legacy_info.name])
+        payloads.append(payload)
+    return payloads
+
+
+def _canonical_number(api_info, value):
+    # 1 and 1.0 are the same number, any other value (e.g. "1", True or
+    # 1.5 for an int field) is kept as is, so that different raw values
+    # never get the same fingerprint
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if api_info.type is float:
+        return float(value)
+    if api_info.type is int and float(value).is_integer():
+        return int(value)
+    return value
+
+
+def normalize_payload(mapping: Dict, payload: Dict) -> Dict:
+    """
+    :returns a copy of `payload` in which the numbers of the numeric fields
+        in `mapping` are written the same way, e.g. 1 -> 1.0 for a float
+        field. Other values are not coerced.
+    """
+    normalized = dict(payload)
+    for name, value in payload.items():
+        if name in mapping:
+            _, api_info, _ = mapping[name]
+            normalized[name] = _canonical_number(api_info, value)
+    return normalized
+
+
+def payload_fingerprint(key: str, payload) -> str:
+    """
+    Canonical fingerprint of a settings payload, or of an aggregation
+    settings list, `key` being its payload key. The order of the aggregation
+    settings entries does not matter.
+    """
+    if key == AGGREGATION_PAYLOAD:
+        entries = sorted(
+            canonical_json(normalize_payload(aggregation_settings_map, entry))
+            for entry in payload
+        )
+        return fingerprint([key, entries])
+    _, mapping = SETTINGS_PAYLOADS[key]
+    return fingerprint([key, normalize_payload(mapping, payload)])
+
+
+def record_fingerprints(record: Dict) -> Dict[str, str]:
+    """:returns {<payload key>: <fingerprint>} of the payloads in a record"""
+    return {
+        key: payload_fingerprint(key, record[key])
+        for key in [*SETTINGS_PAYLOADS, AGGREGATION_PAYLOAD]
+        if record.get(key) is not None
+    }
+
+
+def settings_fingerprint(record: Dict) -> str:
+    """
+    Fingerprint of all payloads of a record. Records of different
+    simulations with identical settings have the same fingerprint.
+    """
+    return fingerprint(record_fingerprints(record))
+
+
+class ConversionMemo:
+    """
+    Converts the settings of identical inputs only once, e.g. for all
+    manifest entries of a batch. Inputs are identical if they are read from
+    the same source (file, settings row and aggregation file) or if their
+    contents are equal.
+
+    The converted payloads are shared, do not modify them.
+    """
+
+    def __init__(self):
+        self._by_source: Dict[Tuple, Dict] = {}
+        self._by_content: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def convert(
+        self,
+        settings: Dict,
+        aggregations: Optional[Dict],
+        source_type: SourceTypes,
+    ) -> Dict:
+        """
+        :returns {<payload key>: <payload>} including the aggregation
+            settings payloads
+        """
+        key = fingerprint([source_type, settings, aggregations or {}])
+        try:
+            payloads = self._by_content[key]
+        except KeyError:
+            self.misses += 1
+            payloads = convert_settings(settings, source_type)
+            payloads[AGGREGATION_PAYLOAD] = convert_aggregations(
+                aggregations or {}
+            )
+            self._by_content[key] = payloads
+            return payloads
+        self.hits += 1
+        return payloads
+
+    def entry_payloads(self, entry: ManifestEntry) -> Dict:
+        """like `convert`, reading the settings of a manifest entry"""
+        key = (entry.source, entry.settings_row, entry.aggregation_file)
+        try:
+            payloads = self._by_source[key]
+        except KeyError:
+            settings, aggregations = entry.load()
+            payloads = self.convert(settings, aggregations, entry.source_type)
+            self._by_source[key] = payloads
+            return payloads
+        self.hits += 1
+        return payloads
+
+
+def entry_payload(entry: ManifestEntry, memo: Optional[ConversionMemo] = None) -> Dict:
+    """
+    Reads and converts the settings of a manifest entry into a single
+    payload record.
+    """
+    memo = memo if memo is not None else ConversionMemo()
+    record = {
+        "simulation_id": entry.simulation_id,
+        "source": str(entry.source),
+        "settings_row": entry.settings_row,
+    }
+    record.update(memo.entry_payloads(entry))
+    return record
+
+
+def iter_payloads(
+    entries: Iterable[ManifestEntry],
+    errors: Optional[List[Tuple[ManifestEntry, str]]] = None,
+    memo: Optional[ConversionMemo] = None,
+) -> Iterator[Dict]:
+    """
+    Lazily converts the manifest entries to payload records. Entries that
+    cannot be converted are logged, skipped and, if given, added to
+    `errors`. Identical inputs are converted only once, see `ConversionMemo`.
+    """
+    memo = memo if memo is not None else ConversionMemo()
+    for entry in entries:
+        try:
+            yield entry_payload(entry, memo)
+        except Exception as err:
+            logger.error("Could not convert %s: %s", entry.source, err)
+            if errors is not None:
+                errors.append((entry, str(err)))
+
+
+def _is_gzip(path: Path) -> bool:
+    return path.suffix.lower() == ".gz"
+
+
+def open_ndjson(path: Path, mode: str = "r") -> IO[str]:
+    """opens a NDJSON file in text mode, gzip compressed if it ends on .gz"""
+    if _is_gzip(path):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def write_ndjson(records: Iterable[Dict], path: Path) -> int:
+    """
+    Streams the records into a NDJSON file, one record per line.
+
+    :returns the number of records written
+    """
+    count = 0
+    with open_ndjson(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_ndjson(path: Path) -> Iterator[Dict]:
+    """streams the records of a NDJSON file, skipping blank lines"""
+    with open_ndjson(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line)
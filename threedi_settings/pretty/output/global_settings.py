@@ -2,8 +2,6 @@ from typing import Dict
 try:
     from rich.console import Console
     from rich.table import Table
-    from rich.tree import Tree
-    from rich.panel import Panel
     from rich import box
 except ImportError:
     raise ImportError(
@@ -0,0 +1,287 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+from pathlib import Path, PurePosixPath
+import shutil
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Zip members up to this size are loaded in memory, larger ones are
+# extracted to a temporary file.
+DEFAULT_MAX_IN_MEMORY_SIZE = 256 * 1024 ** 2
+
+# number of connections kept open by `SqliteConnections`
+DEFAULT_CONNECTION_CACHE_SIZE = 16
+
+ZIP_SUFFIX = ".zip"
+
+
+def split_zip_path(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Splits a path to a member of a zip archive, like
+    ``models/bergermeer.zip/tests/v2_bergermeer.sqlite``, into the archive
+    path and the member name.
+
+    :returns (<archive path>, <member name>) or `None` if `path` does not
+        point into an existing zip archive
+    """
+    for archive in reversed(path.parents):
+        if archive.suffix.lower() == ZIP_SUFFIX and archive.is_file():
+            return archive, path.relative_to(archive).as_posix()
+    return
+
+
+def iter_zip_members(archive: Path, suffix: str = ".sqlite") -> Iterator[Path]:
+    """:yields the paths (see `split_zip_path`) of the archive members with
+    the given suffix"""
+    with zipfile.ZipFile(archive) as zf:
+        for name in zf.namelist():
+            if PurePosixPath(name).suffix.lower() == suffix:
+                yield archive.joinpath(*PurePosixPath(name).parts)
+
+
+def sqlite_file_exists(path: Path) -> bool:
+    """:returns whether `path` is a file or a member of a zip archive"""
+    zip_path = split_zip_path(path)
+    if zip_path is None:
+        return path.is_file()
+    archive, member = zip_path
+    with zipfile.ZipFile(archive) as zf:
+        try:
+            zf.getinfo(member)
+        except KeyError:
+            return False
+    return True
+
+
+class TemporaryCopyConnection(sqlite3.Connection):
+    """connection to a temporary copy of a database that is removed when
+    the connection is closed"""
+
+    temp_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def close(self):
+        super().close()
+        if self.temp_dir is not None:
+            self.temp_dir.cleanup()
+            self.temp_dir = None
+
+
+def _read_only_uri(path: Path, immutable: bool = False) -> str:
+    # immutable: the file is not locked and not checked for changes by
+    # others, which is only safe for files nobody else writes to, e.g.
+    # temporary copies. A plain read-only connection also sees changes that
+    # are still in the write-ahead log (-wal file) of the database.
+    uri = f"{path.resolve().as_uri()}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return uri
+
+
+def _can_deserialize() -> bool:
+    # sqlite3.Connection.deserialize has been added in Python 3.11
+    return hasattr(sqlite3.Connection, "deserialize")
+
+
+def connect_zip_member(
+    archive: Path,
+    member: str,
+    max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE,
+) -> sqlite3.Connection:
+    """
+    Opens a sqlite database stored in a zip archive read-only, without
+    extracting it next to the archive. Members up to `max_in_memory_size`
+    bytes are loaded into an in-memory database, larger members (or all of
+    them before Python 3.11) are extracted to a temporary file.
+
+    :raises KeyError if the archive has no such member
+    """
+    with zipfile.ZipFile(archive) as zf:
+        info = zf.getinfo(member)
+        if info.file_size <= max_in_memory_size and _can_deserialize():
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.deserialize(zf.read(info))
+            conn.execute("PRAGMA query_only = ON")
+            return conn
+        logger.debug(
+            "Extracting %s (%d bytes) from %s to a temporary file",
+            member,
+            info.file_size,
+            archive,
+        )
+        temp_dir = tempfile.TemporaryDirectory(prefix="threedi-settings-")
+        temp_file = Path(temp_dir.name) / PurePosixPath(member).name
+        with zf.open(info) as src, temp_file.open("wb") as dst:
+            shutil.copyfileobj(src, dst)
+    conn = sqlite3.connect(
+        _read_only_uri(temp_file, immutable=True),
+        uri=True,
+        check_same_thread=False,
+        factory=TemporaryCopyConnection,
+    )
+    conn.temp_dir = temp_dir
+    return conn
+
+
+def connect(
+    path: Path, max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE
+) -> sqlite3.Connection:
+    """
+    Opens a sqlite file or a sqlite member of a zip archive read-only. The
+    connection may be used from other threads if the sqlite library is
+    thread safe (see `SqliteConnections`).
+    """
+    zip_path = split_zip_path(path)
+    if zip_path is None:
+        return sqlite3.connect(
+            _read_only_uri(path), uri=True, check_same_thread=False
+        )
+    return connect_zip_member(*zip_path, max_in_memory_size)
+
+
+def file_stamp(path: Path) -> Tuple[str, int, int]:
+    """
+    :returns (<resolved path>, <modification time>, <size>) of a sqlite
+        file, taken from the archive for a sqlite member of a zip archive
+    :raises OSError if the file does not exist
+    """
+    zip_path = split_zip_path(path)
+    stat = (zip_path[0] if zip_path else path).stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+class SqliteConnections:
+    """
+    Thread safe LRU cache of read-only sqlite connections (see `connect`),
+    keyed by the path, modification time and size of the file. All readers
+    of an unchanged file share one connection; a file that changed gets a
+    new connection and the one to its previous version is closed once it
+    is no longer used.
+
+    Connections are reference counted: every `acquire` must be followed by
+    a `release` (or use `connection`). Only unused connections are closed,
+    the least recently used ones first once more than `maxsize` are open.
+    A `maxsize` of 0 closes connections as soon as they are released.
+    In-memory copies of zip members (up to `max_in_memory_size` bytes each)
+    are never kept unused, they are closed when their last user releases
+    them.
+
+    Connections are shared between threads only if the sqlite library is
+    serialized (`sqlite3.threadsafety == 3`), otherwise every thread gets
+    its own connections.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CONNECTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        # key -> [<connection>, <number of users>, <keep when unused>]
+        self._entries: "OrderedDict[Hashable, List]" = OrderedDict()
+        # id(connection) -> key
+        self._keys: Dict[int, Hashable] = {}
+        # keys of connections to previous versions of a file
+        self._stale: Set[Hashable] = set()
+        # reentrant, because `release` may be called by the garbage
+        # collector while the lock is held
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(path: Path) -> Tuple:
+        key = file_stamp(path)
+        if sqlite3.threadsafety != 3:
+            key += (threading.get_ident(),)
+        return key
+
+    def acquire(
+        self, path: Path, max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE
+    ) -> sqlite3.Connection:
+        """
+        :returns a shared connection to `path`, its rows are `sqlite3.Row`
+        :raises OSError if the file does not exist
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                conn = connect(path, max_in_memory_size)
+                conn.row_factory = sqlite3.Row
+                in_memory = split_zip_path(path) is not None and not isinstance(
+                    conn, TemporaryCopyConnection
+                )
+                entry = self._entries[key] = [conn, 0, not in_memory]
+                self._keys[id(conn)] = key
+                self._stale.update(
+                    other for other in self._entries
+                    if other[0] == key[0] and other[1:3] != key[1:3]
+                )
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            entry[1] += 1
+            self._evict()
+            return entry[0]
+
+    def release(self, conn: sqlite3.Connection):
+        """releases a connection returned by `acquire`"""
+        with self._lock:
+            key = self._keys.get(id(conn))
+            if key is None:
+                # already closed by `close`
+                return
+            self._entries[key][1] -= 1
+            self._evict()
+
+    @contextmanager
+    def connection(
+        self, path: Path, max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE
+    ) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire(path, max_in_memory_size)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _close(self, key: Hashable):
+        conn = self._entries.pop(key)[0]
+        del self._keys[id(conn)]
+        self._stale.discard(key)
+        conn.close()
+
+    def _evict(self):
+        idle = [
+            (key, keep)
+            for key, (_, users, keep) in self._entries.items()
+            if users == 0
+        ]
+        for key, keep in idle:
+            if not keep or key in self._stale or len(self._entries) > self.maxsize:
+                self._close(key)
+                self.evictions += 1
+
+    def close(self):
+        """closes all connections, also those still in use"""
+        with self._lock:
+            for key in list(self._entries):
+                self._close(key)
+
+    def __enter__(self) -> "SqliteConnections":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Connections shared by all `ThreedimodelSqlite` instances of the process
+sqlite_connections = SqliteConnections()
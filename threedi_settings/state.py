@@ -0,0 +1,125 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import Optional, Tuple, Union
+
+from threedi_settings.manifest import ManifestEntry
+from threedi_settings.sqlite_files import split_zip_path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InputStamp:
+    """modification time and size of the input files of a manifest entry"""
+
+    source_mtime_ns: int
+    source_size: int
+    aggregation_file: Optional[str] = None
+    aggregation_mtime_ns: Optional[int] = None
+    aggregation_size: Optional[int] = None
+
+
+def input_stamp(entry: ManifestEntry) -> InputStamp:
+    """
+    The stamp of a sqlite file in a zip archive is taken from the archive.
+
+    :raises OSError if an input file does not exist
+    """
+    zip_path = split_zip_path(entry.source)
+    source_stat = (zip_path[0] if zip_path else entry.source).stat()
+    if not entry.aggregation_file:
+        return InputStamp(source_stat.st_mtime_ns, source_stat.st_size)
+    aggregation_stat = entry.aggregation_file.stat()
+    return InputStamp(
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+        str(entry.aggregation_file),
+        aggregation_stat.st_mtime_ns,
+        aggregation_stat.st_size,
+    )
+
+
+class ExportState:
+    """
+    Local sqlite store of the successful exports of manifest entries. For
+    every (source, settings row, simulation) the input stamp and the
+    settings fingerprint (see `threedi_settings.payloads.settings_fingerprint`)
+    of the last successful export are kept.
+
+    An entry is unchanged if its input stamp is equal to the recorded one.
+    If only the stamp differs, e.g. because the file has been touched, the
+    fingerprint tells whether the settings changed.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS exports ("
+                "source TEXT, settings_row INTEGER, simulation_id INTEGER, "
+                "source_mtime_ns INTEGER, source_size INTEGER, "
+                "aggregation_file TEXT, aggregation_mtime_ns INTEGER, "
+                "aggregation_size INTEGER, fingerprint TEXT, exported_at REAL, "
+                "PRIMARY KEY (source, settings_row, simulation_id))"
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "ExportState":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _key(entry: ManifestEntry) -> Tuple[str, int, int]:
+        return str(entry.source), entry.settings_row, entry.simulation_id
+
+    def last_export(self, entry: ManifestEntry) -> Optional[Tuple[InputStamp, str]]:
+        """:returns (<input stamp>, <settings fingerprint>) of the last
+        successful export of `entry` or `None`"""
+        row = self.connection.execute(
+            "SELECT source_mtime_ns, source_size, aggregation_file, "
+            "aggregation_mtime_ns, aggregation_size, fingerprint FROM exports "
+            "WHERE source=? AND settings_row=? AND simulation_id=?",
+            self._key(entry),
+        ).fetchone()
+        if row is None:
+            return
+        return InputStamp(*row[:5]), row[5]
+
+    def record_export(
+        self, entry: ManifestEntry, stamp: InputStamp, fingerprint: str
+    ):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO exports (source, settings_row, "
+                "simulation_id, source_mtime_ns, source_size, aggregation_file, "
+                "aggregation_mtime_ns, aggregation_size, fingerprint, "
+                "exported_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *self._key(entry),
+                    stamp.source_mtime_ns,
+                    stamp.source_size,
+                    stamp.aggregation_file,
+                    stamp.aggregation_mtime_ns,
+                    stamp.aggregation_size,
+                    fingerprint,
+                    time.time(),
+                ),
+            )
+
+    def forget(self, entry: ManifestEntry):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM exports "
+                "WHERE source=? AND settings_row=? AND simulation_id=?",
+                self._key(entry),
+            )
@@ -3,10 +3,15 @@
 from pathlib import Path
 import logging
 from configparser import ConfigParser
-from typing import Dict, List
-import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from threedi_settings.mappings import get_sqlite_table_schemas, SettingsTables
+from threedi_settings.sqlite_files import (
+    DEFAULT_MAX_IN_MEMORY_SIZE,
+    sqlite_connections,
+    sqlite_file_exists,
+    SqliteConnections,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -83,15 +88,54 @@ class AggregationIni:
 
 
 class ThreedimodelSqliteBase:
-    def __init__(self, sqlite_file: Path):
+    """
+    `sqlite_file` is either a sqlite file or a sqlite member of a zip
+    archive, e.g. ``model.zip/model/v2_bergermeer.sqlite``. Members of up
+    to `max_in_memory_size` bytes are loaded in memory, larger ones are
+    extracted to a temporary file.
+
+    The database is opened read-only through `connections` (defaults to
+    the process wide `sqlite_connections`), so all instances reading the
+    same file share one connection. It is released by `close()`, when
+    leaving the `with` block or when the instance is garbage collected.
+    """
+
+    def __init__(
+        self,
+        sqlite_file: Path,
+        max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE,
+        connections: Optional[SqliteConnections] = None,
+    ):
         self.sqlite_file = sqlite_file
-        assert sqlite_file.exists() and sqlite_file.is_file(), f"file {sqlite_file} does not exist"
+        self.max_in_memory_size = max_in_memory_size
+        self.connections = (
+            connections if connections is not None else sqlite_connections
+        )
+        self.connection = None
+        assert sqlite_file_exists(sqlite_file), f"file {sqlite_file} does not exist"
         self.setup_db()
 
     def setup_db(self):
-        conn = sqlite3.connect(self.sqlite_file)
-        conn.row_factory = sqlite3.Row
-        self.cursor = conn.cursor()
+        self.connection = self.connections.acquire(
+            self.sqlite_file, self.max_in_memory_size
+        )
+        self.cursor = self.connection.cursor()
+
+    def close(self):
+        """releases the connection, the instance can not be used afterwards"""
+        connection = getattr(self, "connection", None)
+        if connection is not None:
+            self.connection = None
+            self.connections.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
 
 
 class RowDoesNotExistError(Exception):
@@ -101,10 +145,24 @@ class RowDoesNotExistError(Exception):
 class ThreedimodelSqlite(ThreedimodelSqliteBase):
     """
     Interface to the 3Di model sqlite file
+
+    `row_id` is the v2_global_settings row whose settings are read. It can
+    be omitted for the methods that are not bound to a row, like
+    `iter_settings` and `get_global_settings_ids`.
     """
 
-    def __init__(self, sqlite_file: Path, row_id: int):
-        super().__init__(sqlite_file=sqlite_file)
+    def __init__(
+        self,
+        sqlite_file: Path,
+        row_id: Optional[int] = None,
+        max_in_memory_size: int = DEFAULT_MAX_IN_MEMORY_SIZE,
+        connections: Optional[SqliteConnections] = None,
+    ):
+        super().__init__(
+            sqlite_file=sqlite_file,
+            max_in_memory_size=max_in_memory_size,
+            connections=connections,
+        )
         self.row_id = row_id
         self.table_schemas = get_sqlite_table_schemas()
         self._global_settings = None
@@ -150,11 +208,13 @@ class ThreedimodelSqlite(ThreedimodelSqliteBase):
         """
         :raises RowDoesNotExistError if the given table row does not exist
         """
+        if self.row_id is None:
+            raise RowDoesNotExistError("No v2_global_settings row given")
         field_names = self.table_schemas[SettingsTables.global_settings]
         fn = ",".join(field_names)
         fn += ",numerical_settings_id"
-        statement = f"SELECT {fn} FROM {SettingsTables.global_settings.value} WHERE id={self.row_id}"
-        self.cursor.execute(statement)
+        statement = f"SELECT {fn} FROM {SettingsTables.global_settings.value} WHERE id=?"
+        self.cursor.execute(statement, (self.row_id,))
         try:
             return dict(self.cursor.fetchone())
         except TypeError:
@@ -169,19 +229,89 @@ class ThreedimodelSqlite(ThreedimodelSqliteBase):
         field_names = self.table_schemas[SettingsTables.numerical_settings]
         fn = ",".join(field_names)
         row_id = self.global_settings["numerical_settings_id"]
-        statement = f"SELECT {fn} FROM {SettingsTables.numerical_settings.value} WHERE id={row_id}"
-        self.cursor.execute(statement)
+        statement = f"SELECT {fn} FROM {SettingsTables.numerical_settings.value} WHERE id=?"
+        self.cursor.execute(statement, (row_id,))
         return dict(self.cursor.fetchone())
 
     def _get_aggregation_settings(self) -> Dict:
+        return dict(enumerate(self.iter_aggregation_settings()))
+
+    def iter_aggregation_settings(
+        self,
+        global_settings_id: Optional[int] = None,
+        flow_variables: Optional[Iterable[str]] = None,
+        methods: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Iterates over the v2_aggregation_settings rows of a global settings
+        row, optionally only those of the given flow variables and/or
+        aggregation methods (e.g. 'cum', 'current'). The rows are filtered
+        by the database and fetched lazily, in order of their id.
+
+        :param global_settings_id: defaults to the row of this instance
+        :raises ValueError if neither is given
+        """
+        if global_settings_id is None:
+            global_settings_id = self.row_id
+        if global_settings_id is None:
+            raise ValueError("No v2_global_settings row given")
         field_names = self.table_schemas[SettingsTables.aggregation_settings]
         fn = ",".join(field_names)
-        statement = f"SELECT {fn} FROM {SettingsTables.aggregation_settings.value}"
-        self.cursor.execute(statement)
-        d = dict()
-        for i, entry in enumerate(self.cursor.fetchall()):
-            d[i] = dict(entry)
-        return d
+        conditions = ["global_settings_id=?"]
+        params = [global_settings_id]
+        for column, values in (
+            ("flow_variable", flow_variables),
+            ("aggregation_method", methods),
+        ):
+            if values is None:
+                continue
+            values = list(values)
+            conditions.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        statement = (
+            f"SELECT {fn} FROM {SettingsTables.aggregation_settings.value} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY id"
+        )
+        # use a separate cursor, so the iterator does not interfere
+        # with queries made while it is being consumed
+        cursor = self.cursor.connection.cursor()
+        cursor.execute(statement, params)
+        for row in cursor:
+            yield dict(row)
+
+    def iter_settings(self) -> Iterator[Tuple[int, Dict]]:
+        """
+        Iterates over all v2_global_settings rows. Every row is fetched
+        together with its v2_numerical_settings row by a single joined query.
+
+        :returns an iterator of (<row id>, <settings dict>) tuples, the
+        settings dict being the same as `as_dict()` returns for that row.
+        Numerical fields are `None` if the row has no numerical settings.
+        """
+        global_fields = self.table_schemas[SettingsTables.global_settings]
+        global_fields = global_fields + ["numerical_settings_id"]
+        numerical_fields = self.table_schemas[SettingsTables.numerical_settings]
+        columns = ",".join(
+            [f"g.{name}" for name in global_fields]
+            + [f"n.{name}" for name in numerical_fields]
+        )
+        statement = (
+            f"SELECT g.id,{columns} "
+            f"FROM {SettingsTables.global_settings.value} AS g "
+            f"LEFT JOIN {SettingsTables.numerical_settings.value} AS n "
+            f"ON n.id = g.numerical_settings_id ORDER BY g.id"
+        )
+        # use a separate cursor, so the iterator does not interfere
+        # with queries made while it is being consumed
+        cursor = self.cursor.connection.cursor()
+        cursor.execute(statement)
+        n_global = len(global_fields)
+        for row in cursor:
+            row_id, values = row[0], tuple(row)[1:]
+            yield row_id, {
+                **dict(zip(global_fields, values[:n_global])),
+                **dict(zip(numerical_fields, values[n_global:])),
+            }
 
     def as_dict(self) -> Dict:
         """
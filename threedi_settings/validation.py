@@ -0,0 +1,218 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from threedi_settings.definitions import bundled_index
+from threedi_settings.fingerprint import fingerprint
+from threedi_settings.payloads import AGGREGATION_PAYLOAD, SETTINGS_PAYLOADS
+
+
+# swagger type -> check
+TYPE_CHECKS = {
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "string": lambda v: isinstance(v, str),
+}
+
+# marks fields that are not part of a payload
+_MISSING = object()
+
+# payload key -> swagger definition name
+PAYLOAD_DEFINITIONS = {
+    **{key: name for key, (name, _) in SETTINGS_PAYLOADS.items()},
+    AGGREGATION_PAYLOAD: "AggregationSettings",
+}
+
+
+@dataclass(frozen=True)
+class FieldError:
+    payload: str
+    field: str
+    value: Any
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    """
+    Validation errors of a batch of payload records, keyed by the
+    position of the record in the batch.
+    """
+
+    errors: Dict[int, List[FieldError]] = field(default_factory=dict)
+
+    @property
+    def field_counts(self) -> Counter:
+        """:returns the number of errors per (payload, field)"""
+        return Counter(
+            (error.payload, error.field)
+            for errors in self.errors.values()
+            for error in errors
+        )
+
+    def add(self, index: int, error: FieldError):
+        self.errors.setdefault(index, []).append(error)
+
+
+@dataclass(frozen=True)
+class FieldConstraint:
+    """the compiled checks of a single payload field"""
+
+    payload: str
+    field: str
+    checks: Tuple[Tuple[Callable[[Any], bool], str], ...]
+    # whether `None` is a valid value
+    nullable: bool = False
+
+    def failures(self, values: List[Any]) -> Iterator[Tuple[int, FieldError]]:
+        """
+        Checks a column of values of this field.
+
+        :returns an iterator of (<position in values>, <error>)
+        """
+        for check, message in self.checks:
+            for i, value in enumerate(values):
+                if value is _MISSING or value is None:
+                    continue
+                if not check(value):
+                    yield i, FieldError(self.payload, self.field, value, message)
+
+
+def compile_constraint(payload: str, field_name: str, field_def: Dict) -> FieldConstraint:
+    checks = []
+    swagger_type = field_def.get("type")
+    if swagger_type in TYPE_CHECKS:
+        checks.append((TYPE_CHECKS[swagger_type], f"must be of type {swagger_type}"))
+    is_numeric = swagger_type in {"integer", "number"}
+    if is_numeric and field_def.get("minimum") is not None:
+        minimum = field_def["minimum"]
+        checks.append((lambda v, m=minimum: v >= m, f"must be >= {minimum}"))
+    if is_numeric and field_def.get("maximum") is not None:
+        maximum = field_def["maximum"]
+        checks.append((lambda v, m=maximum: v <= m, f"must be <= {maximum}"))
+    if field_def.get("enum"):
+        choices = frozenset(field_def["enum"])
+        checks.append(
+            (lambda v, c=choices: v in c, f"must be one of {sorted(choices)}")
+        )
+    return FieldConstraint(
+        payload, field_name, tuple(checks), bool(field_def.get("nullable"))
+    )
+
+
+class PayloadValidator:
+    """
+    Checks payload records (see `threedi_settings.payloads`) against the
+    type, minimum, maximum and enum constraints of the settings
+    definitions, before anything is sent to the API. `None` is only
+    accepted for nullable fields.
+
+    The constraints are compiled once. A batch is validated column by
+    column: the values of a field are collected over all records and
+    checked in one pass. `iter_valid` validates records with identical
+    payloads only once.
+    """
+
+    def __init__(self, index: Optional[Dict] = None):
+        """
+        :param index: settings definitions index as built by
+            `threedi_settings.definitions.build_index`, defaults to the
+            index shipped with the package
+        """
+        index = index if index is not None else bundled_index().index
+        self.constraints: List[FieldConstraint] = []
+        for payload, definition_name in PAYLOAD_DEFINITIONS.items():
+            for field_name, field_def in index.get(definition_name, {}).items():
+                self.constraints.append(
+                    compile_constraint(payload, field_name, field_def)
+                )
+        # content key -> errors, of the records seen by iter_valid
+        self._verdicts: Dict[str, List[FieldError]] = {}
+
+    def validate(self, records: List[Dict]) -> ValidationReport:
+        report = ValidationReport()
+        # aggregation payloads are lists, flatten them into rows that
+        # point back to their record
+        aggregation_rows = [
+            (i, payload)
+            for i, record in enumerate(records)
+            for payload in record.get(AGGREGATION_PAYLOAD) or []
+        ]
+        for constraint in self.constraints:
+            if constraint.payload == AGGREGATION_PAYLOAD:
+                owners = [i for i, _ in aggregation_rows]
+                values = [
+                    payload.get(constraint.field, _MISSING)
+                    for _, payload in aggregation_rows
+                ]
+            else:
+                owners = list(range(len(records)))
+                values = [
+                    (record.get(constraint.payload) or {}).get(
+                        constraint.field, _MISSING
+                    )
+                    for record in records
+                ]
+            for i, value in enumerate(values):
+                if value is None and not constraint.nullable:
+                    report.add(
+                        owners[i],
+                        FieldError(
+                            constraint.payload,
+                            constraint.field,
+                            value,
+                            "must not be empty",
+                        ),
+                    )
+            for i, error in constraint.failures(values):
+                report.add(owners[i], error)
+        return report
+
+    def iter_valid(
+        self,
+        records: Iterable[Dict],
+        rejected: List[Tuple[Dict, List[FieldError]]],
+        batch_size: int = 1000,
+    ) -> Iterator[Dict]:
+        """
+        Validates `records` in batches of `batch_size` and yields the
+        valid records only. Invalid records are added to `rejected`.
+        """
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from self._filter(batch, rejected)
+                batch = []
+        if batch:
+            yield from self._filter(batch, rejected)
+
+    @staticmethod
+    def _content_key(record: Dict) -> str:
+        # the exact payloads: unlike the settings fingerprint, 1 and 1.0
+        # differ, as the type checks tell them apart
+        return fingerprint(
+            {
+                key: record.get(key)
+                for key in [*SETTINGS_PAYLOADS, AGGREGATION_PAYLOAD]
+            }
+        )
+
+    def _filter(self, batch, rejected) -> Iterator[Dict]:
+        keys = [self._content_key(record) for record in batch]
+        unseen = {}
+        for key, record in zip(keys, batch):
+            if key not in self._verdicts:
+                unseen.setdefault(key, record)
+        report = self.validate(list(unseen.values()))
+        for i, key in enumerate(unseen):
+            self._verdicts[key] = report.errors.get(i, [])
+        for key, record in zip(keys, batch):
+            errors = self._verdicts[key]
+            if errors:
+                rejected.append((record, errors))
+                continue
+            yield record
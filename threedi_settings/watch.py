@@ -0,0 +1,92 @@
+# (c) Nelen & Schuurmans.  GPL licensed, see LICENSE.rst.
+# -*- coding: utf-8 -*-
+import logging
+from pathlib import Path
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from threedi_settings.sqlite_files import split_zip_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 2.0
+
+# files next to a sqlite database that are written instead of (or
+# before) the database itself
+SQLITE_SIDECARS = ("-wal", "-journal")
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    Polls a set of files for changes. A file counts as changed if its
+    modification time or size (or that of its sqlite journal) changed.
+    For a member of a zip archive (``model.zip/model.sqlite``) the
+    archive is checked.
+
+    Bursts of writes are debounced: a change is reported once the file
+    has not changed for `debounce` seconds.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        sleep: Callable[[float], None] = time.sleep,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.paths = list(dict.fromkeys(paths))
+        self.interval = interval
+        self.debounce = debounce
+        self._sleep = sleep
+        self._timer = timer
+        self._snapshots = {path: self.snapshot(path) for path in self.paths}
+
+    @staticmethod
+    def snapshot(path: Path) -> Tuple:
+        zip_path = split_zip_path(path)
+        if zip_path is not None:
+            return (_stat(zip_path[0]),)
+        if path.suffix.lower() != ".sqlite":
+            return (_stat(path),)
+        return (_stat(path),) + tuple(
+            _stat(path.with_name(path.name + suffix)) for suffix in SQLITE_SIDECARS
+        )
+
+    def poll(self) -> Set[Path]:
+        """:returns the paths that changed since the last poll"""
+        changed = set()
+        for path in self.paths:
+            snapshot = self.snapshot(path)
+            if snapshot != self._snapshots[path]:
+                self._snapshots[path] = snapshot
+                changed.add(path)
+        return changed
+
+    def iter_changes(self) -> Iterator[Set[Path]]:
+        """yields the sets of changed paths, forever"""
+        # path -> time of its last change
+        pending: Dict[Path, float] = {}
+        while True:
+            now = self._timer()
+            for path in self.poll():
+                logger.debug("%s changed", path)
+                pending[path] = now
+            ready = {
+                path for path, changed_at in pending.items()
+                if now - changed_at >= self.debounce
+            }
+            if ready:
+                for path in ready:
+                    del pending[path]
+                yield ready
+            self._sleep(self.interval)